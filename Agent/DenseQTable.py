@@ -0,0 +1,191 @@
+import numpy as np
+from Enviroment.Datas import Datas
+
+
+class DenseQTable:
+    """
+    Q-Table densa: els estats es codifiquen a un enter i els valors Q es guarden
+    en una matriu NumPy contigua (n_estats x n_accions).
+
+    Exposa la mateixa interfície de mapping que el defaultdict {(estat, acció): valor}
+    (items, keys, values, len, [], dict(...)) perquè la persistència i les mètriques
+    de l'agent funcionin igual. A diferència del defaultdict, llegir no crea entrades:
+    només compten les entrades escrites (update o càrrega).
+    """
+
+    # Cardinalitat de cada component de l'estat de Train._get_general_state:
+    # (distància, velocitat, proximitat, tendència, retard, perill, canvi de via)
+    STATE_DIMS = (10, 7, 3, 3, 3, 2, 2)
+
+    def __init__(self, data=None, state_dims=None):
+        self.state_dims = tuple(state_dims) if state_dims is not None else self.STATE_DIMS
+        self.actions = list(Datas.AGENT_ACTIONS.keys())
+        self.n_actions = len(self.actions)
+        self.n_states = int(np.prod(self.state_dims))
+
+        # Pesos del sistema de numeració mixt (l'última component és la menys significativa)
+        strides = []
+        acc = 1
+        for d in reversed(self.state_dims):
+            strides.append(acc)
+            acc *= d
+        self._strides = tuple(reversed(strides))
+        self._strides_np = np.array(self._strides, dtype=np.int64)
+        self._dims_np = np.array(self.state_dims, dtype=np.int64)
+
+        self.q_values = np.zeros((self.n_states, self.n_actions), dtype=np.float64)
+        self.known = np.zeros((self.n_states, self.n_actions), dtype=bool)
+
+        # Cache estat -> índex (com a molt n_states entrades)
+        self._index = {}
+
+        if data:
+            self.load_dict(data)
+
+    # ------------------------------------------------------------------
+    # Codificació d'estats
+    # ------------------------------------------------------------------
+
+    def encode(self, state):
+        idx = self._index.get(state)
+        if idx is None:
+            if len(state) != len(self.state_dims):
+                raise KeyError(f"Estat amb {len(state)} components, se n'esperen {len(self.state_dims)}: {state}")
+            idx = 0
+            for v, d, stride in zip(state, self.state_dims, self._strides):
+                if not 0 <= v < d:
+                    raise KeyError(f"Estat fora de rang: {state}")
+                idx += int(v) * stride
+            self._index[state] = idx
+        return idx
+
+    def encode_many(self, states):
+        """Codifica una llista d'estats a un array d'índexs (vectoritzat)."""
+        arr = np.asarray(states, dtype=np.int64).reshape(-1, len(self.state_dims))
+        if ((arr < 0) | (arr >= self._dims_np)).any():
+            raise KeyError("Hi ha estats fora de rang al lot")
+        return arr @ self._strides_np
+
+    def decode(self, idx):
+        return tuple(int(v) for v in np.unravel_index(int(idx), self.state_dims))
+
+    # ------------------------------------------------------------------
+    # Consultes i actualitzacions
+    # ------------------------------------------------------------------
+
+    def row(self, state):
+        """Valors Q de totes les accions d'un estat, com a llista Python."""
+        return self.q_values[self.encode(state)].tolist()
+
+    def greedy_actions(self, idx):
+        """Argmax vectoritzat per a un array d'índexs d'estat (en cas d'empat, la primera)."""
+        return self.q_values[idx].argmax(axis=1)
+
+    def td_update(self, s, a, r, s2, alpha, gamma):
+        """
+        Actualització TD d'una sola transició.
+        s2 = None indica estat terminal.
+        """
+        i = self.encode(s)
+        current = self.q_values.item(i, a)
+        if s2 is None:
+            target = r
+        else:
+            target = r + gamma * max(self.row(s2))
+        self.q_values[i, a] = current + alpha * (target - current)
+        self.known[i, a] = True
+
+    def td_update_many(self, s_idx, a, r, s2_idx, terminal, alpha, gamma):
+        """
+        Actualització TD vectoritzada d'un lot de transicions, amb el mateix resultat
+        que aplicar td_update una a una en ordre.
+
+        El lot es divideix en onades: una transició obre onada nova si torna a escriure
+        una parella (estat, acció) ja escrita o si llegeix (s2) una fila ja modificada
+        dins l'onada. Cada onada s'aplica amb una sola operació NumPy.
+        """
+        s_idx = np.asarray(s_idx, dtype=np.int64)
+        a = np.asarray(a, dtype=np.int64)
+        r = np.asarray(r, dtype=np.float64)
+        s2_idx = np.asarray(s2_idx, dtype=np.int64)
+        terminal = np.asarray(terminal, dtype=bool)
+
+        start = 0
+        written_sa, written_rows = set(), set()
+        for k, (si, ai, s2i, term) in enumerate(zip(s_idx.tolist(), a.tolist(), s2_idx.tolist(), terminal.tolist())):
+            if (si, ai) in written_sa or (not term and s2i in written_rows):
+                self._td_wave(s_idx[start:k], a[start:k], r[start:k], s2_idx[start:k], terminal[start:k], alpha, gamma)
+                start = k
+                written_sa.clear(); written_rows.clear()
+            written_sa.add((si, ai))
+            written_rows.add(si)
+        self._td_wave(s_idx[start:], a[start:], r[start:], s2_idx[start:], terminal[start:], alpha, gamma)
+
+    def _td_wave(self, s_idx, a, r, s2_idx, terminal, alpha, gamma):
+        if len(s_idx) == 0: return
+        max_next = np.where(terminal, 0.0, self.q_values[s2_idx].max(axis=1))
+        target = r + gamma * max_next
+        current = self.q_values[s_idx, a]
+        self.q_values[s_idx, a] = current + alpha * (target - current)
+        self.known[s_idx, a] = True
+
+    # ------------------------------------------------------------------
+    # Interfície de mapping {(estat, acció): valor}
+    # ------------------------------------------------------------------
+
+    def _split_key(self, key):
+        state, action = key
+        return self.encode(state), self.actions.index(action)
+
+    def __getitem__(self, key):
+        i, j = self._split_key(key)
+        return self.q_values.item(i, j)
+
+    def __setitem__(self, key, value):
+        i, j = self._split_key(key)
+        self.q_values[i, j] = value
+        self.known[i, j] = True
+
+    def __contains__(self, key):
+        try:
+            i, j = self._split_key(key)
+        except (KeyError, ValueError, TypeError):
+            return False
+        return bool(self.known[i, j])
+
+    def __len__(self):
+        return int(self.known.sum())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return [k for k, _ in self.items()]
+
+    def values(self):
+        return self.q_values[self.known].tolist()
+
+    def items(self):
+        rows, cols = np.nonzero(self.known)
+        out = []
+        for i, j, v in zip(rows.tolist(), cols.tolist(), self.q_values[rows, cols].tolist()):
+            out.append(((self.decode(i), self.actions[j]), v))
+        return out
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def to_dict(self):
+        """Format de la Q-Table clàssica (pickle): {(estat, acció): valor}."""
+        return dict(self.items())
+
+    def load_dict(self, data):
+        """Carrega entrades {(estat, acció): valor}. Les que no es poden codificar s'ignoren."""
+        skipped = 0
+        for key, value in data.items():
+            try:
+                self[key] = float(value)
+            except (KeyError, ValueError, TypeError):
+                skipped += 1
+        if skipped:
+            print(f"[DenseQTable] {skipped} entrades ignorades (estat fora de l'espai codificable).")
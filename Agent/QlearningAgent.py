@@ -5,13 +5,34 @@ import os
 import json
 from collections import defaultdict
 from Enviroment.Datas import Datas
+from Agent.DenseQTable import DenseQTable
 
 class QLearningAgent:
-    def __init__(self, alpha=0.05, gamma=0.95, epsilon=0.1):
-        self.q = defaultdict(float)
+    # Backends de Q-Table disponibles:
+    # - "dict": defaultdict {(estat, acció): valor} (per defecte)
+    # - "dense": DenseQTable, estats codificats a enters sobre una matriu NumPy
+    BACKENDS = ("dict", "dense")
+
+    def __init__(self, alpha=0.05, gamma=0.95, epsilon=0.1, backend="dict", seed=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend de Q-Table desconegut: {backend} (opcions: {self.BACKENDS})")
+        self.backend = backend
+        self.q = self._new_table()
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
+        # Generador propi (mai el random global) per a les decisions, d'una en una (action) o per
+        # lots (action_batch, en el mateix ordre). seed pot ser un enter o una SeedSequence.
+        seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.py_rng = random.Random(int(seed_seq.generate_state(1, np.uint64)[0]))
+        # Congelat: update i update_batch no modifiquen la taula (p. ex. simulacions de prova, vegeu TrafficManager.branch)
+        self.frozen = False
+
+    def _new_table(self, data=None):
+        """Crea una Q-Table buida (o amb les entrades de data) del backend triat."""
+        if self.backend == "dense":
+            return DenseQTable(data)
+        return defaultdict(float, data or {})
 
     def decay_epsilon(self, decay_rate=0.99, min_epsilon=0.01):
         """
@@ -41,25 +62,34 @@ class QLearningAgent:
     
     def action(self, state):
         # Exploració (Epsilon-greedy)
-        if random.random() < self.epsilon:
-            return random.choice(list(Datas.AGENT_ACTIONS.keys()))
+        if self.py_rng.random() < self.epsilon:
+            return self.py_rng.choice(list(Datas.AGENT_ACTIONS.keys()))
             
         # Explotació: Busquem el valor màxim a la Q-Table
-        # Com que self.q és un defaultdict, si l'estat no existeix retornarà 0.0 sense donar error
-        qs = [self.q[(state, a)] for a in Datas.AGENT_ACTIONS]
+        # Si l'estat no existeix retorna 0.0, i amb get consultar-lo no crea entrades a la Q-Table
+        if self.backend == "dense":
+            qs = self.q.row(state)
+        else:
+            qs = [self.q.get((state, a), 0.0) for a in Datas.AGENT_ACTIONS]
         
         # Si tots són 0 (estat nou), triem a l'atzar per evitar biaix de sempre triar la primera acció (0)
         if all(v == 0 for v in qs):
-            return random.choice(list(Datas.AGENT_ACTIONS.keys()))
+            return self.py_rng.choice(list(Datas.AGENT_ACTIONS.keys()))
              
         # Retornem l'índex de l'acció amb més valor Q
         # Utilitzem np.argmax o un mètode robust per llistes
         max_val = max(qs)
         # Si hi ha empat, triem a l'atzar entre els millors
         best_actions = [i for i, val in enumerate(qs) if val == max_val]
-        return random.choice(best_actions)
+        return self.py_rng.choice(best_actions)
 
     def update(self, s, a, r, s2):
+        if self.frozen:
+            return
+        if self.backend == "dense":
+            self.q.td_update(s, a, r, s2, self.alpha, self.gamma)
+            return
+
         if s2 is None:
             # Estat terminal
             self.q[(s, a)] += self.alpha * (r - self.q[(s, a)])
@@ -67,6 +97,64 @@ class QLearningAgent:
             max_q_next = max(self.q[(s2, a2)] for a2 in Datas.AGENT_ACTIONS)
             self.q[(s, a)] += self.alpha * (r + self.gamma * max_q_next - self.q[(s, a)])
 
+    def action_batch(self, states):
+        """
+        Decideix les accions de tot un lot d'estats, amb el mateix resultat que cridar
+        action() per a cada estat en ordre. Els valors Q i les millors accions del lot es
+        calculen amb operacions vectorials; els números aleatoris (exploració, estats nous
+        i desempats) es treuen de py_rng estat a estat, igual que action().
+
+        :param states: Llista d'estats (tuples).
+        :return: Llista d'accions (enters), en el mateix ordre que states.
+        """
+        if not states:
+            return []
+        actions = list(Datas.AGENT_ACTIONS.keys())
+
+        if self.backend == "dense":
+            idx = self.q.encode_many(states)
+            qs = self.q.q_values[idx]
+            greedy = self.q.greedy_actions(idx).tolist()
+        else:
+            qs = np.array([[self.q.get((s, a), 0.0) for a in actions] for s in states], dtype=np.float64)
+            greedy = qs.argmax(axis=1).tolist()
+
+        best = qs == qs.max(axis=1, keepdims=True)
+        unique = (best.sum(axis=1) == 1).tolist()
+        unseen = (qs == 0).all(axis=1).tolist()
+
+        rand, choice = self.py_rng.random, self.py_rng.choice
+        chosen = []
+        for i in range(len(states)):
+            if rand() < self.epsilon or unseen[i]:
+                chosen.append(choice(actions))
+            else:
+                # Amb una sola millor acció, action() també en fa el sorteig (i consumeix el generador)
+                chosen.append(choice([greedy[i]] if unique[i] else np.flatnonzero(best[i]).tolist()))
+        return chosen
+
+    def update_batch(self, transitions):
+        """
+        Aplica un lot de transicions (s, a, r, s2) en un sol pas.
+        El resultat és el mateix que cridar update() per a cada transició en ordre.
+        """
+        if not transitions or self.frozen:
+            return
+        if self.backend != "dense":
+            for s, a, r, s2 in transitions:
+                self.update(s, a, r, s2)
+            return
+
+        states, acts, rewards, next_states = zip(*transitions)
+        terminal = [s2 is None for s2 in next_states]
+        # Els estats terminals no es llegeixen; posem l'estat d'origen per poder codificar
+        next_filled = [s if s2 is None else s2 for s, s2 in zip(states, next_states)]
+        self.q.td_update_many(
+            self.q.encode_many(states), acts, rewards,
+            self.q.encode_many(next_filled), terminal,
+            self.alpha, self.gamma
+        )
+
 
     ############################################################################################
     ####################   MÈTRIQUES DE CONVERGÈNCIA (Q-TABLE)   ###############################
@@ -75,8 +163,10 @@ class QLearningAgent:
     def qtable_snapshot(self):
         """Retorna una còpia (dict) de la Q-Table actual per poder comparar evolució.
 
-        Nota: fem dict(self.q) per deslligar-nos del defaultdict.
+        Nota: fem dict(self.q) per deslligar-nos del defaultdict (o de la DenseQTable).
         """
+        if self.backend == "dense":
+            return self.q.to_dict()
         return dict(self.q)
 
     @staticmethod
@@ -156,8 +246,9 @@ class QLearningAgent:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
             
             # Convertim a dict normal per guardar (pickle de vegades es queixa amb lambdas de defaultdict)
+            data = self.q.to_dict() if self.backend == "dense" else dict(self.q)
             with open(filename, "wb") as f:
-                pickle.dump(dict(self.q), f)
+                pickle.dump(data, f)
             print(f"[Agent] Q-Table guardada correctament a '{filename}'. Entrades: {len(self.q)}")
         except Exception as e:
             print(f"[Error] No s'ha pogut guardar la Q-Table: {e}")
@@ -168,17 +259,17 @@ class QLearningAgent:
             try:
                 with open(filename, "rb") as f:
                     loaded_data = pickle.load(f)
-                    # [CORRECCIÓ CLAU] Convertim el dict carregat de nou a defaultdict(float)
-                    self.q = defaultdict(float, loaded_data)
+                    # [CORRECCIÓ CLAU] Convertim el dict carregat de nou a defaultdict(float) (o DenseQTable)
+                    self.q = self._new_table(loaded_data)
                     
                 print(f"[Agent] Q-Table carregada! Entrades recuperades: {len(self.q)}")
             except Exception as e:
                 print(f"[Error] Fitxer trobat però corrupte o incompatible: {e}")
-                # Si falla, ens assegurem que self.q sigui un defaultdict buit i no quedi en estat inconsistent
-                self.q = defaultdict(float)
+                # Si falla, ens assegurem que self.q sigui una taula buida i no quedi en estat inconsistent
+                self.q = self._new_table()
         else:
             print(f"[Agent] No s'ha trobat '{filename}'. S'inicia amb Q-Table buida.")
-            self.q = defaultdict(float)
+            self.q = self._new_table()
 
     def export_qtable_to_json(self, filename="Agent/Qtables/q_table.json"):
         """
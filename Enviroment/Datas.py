@@ -3,7 +3,7 @@ from enum import Enum
 class Datas:
     """
     Base de dades estàtica (Configuració).
-    Conté la definició de la línia R1, estacions, connexions i temps de parada.
+    Conté la definició de les línies (de moment la R1), estacions, connexions i temps de parada.
     """
 
     #temps en minuts que un tren es para a una estació
@@ -52,6 +52,12 @@ class Datas:
         ("BLANES", "TORDERA"),
     ]
 
+    #línies de la xarxa: nom -> estacions en ordre (sentit NORD, la tornada és la llista al revés)
+    #les estacions compartides entre línies són el mateix node i els trams compartits, la mateixa via
+    LINES = {
+        "R1": R1_STA,
+    }
+
     AGENT_ACTIONS = {
         0: "ACELERAR",
         1: "MANTENER",
@@ -87,14 +93,30 @@ class Datas:
         ("BLANES", "TORDERA"): 6
     }
 
+    #temps reals de tots els trams de la xarxa (de moment, els de la R1)
+    SEGMENT_TIMES = R1_SEGMENT_TIMES
+
+    @staticmethod
+    def network_connections():
+        #trams físics de totes les línies, cada parell d'estacions un sol cop encara que el facin diverses línies
+        seen = set()
+        connections = []
+        for stations in Datas.LINES.values():
+            for a, b in zip(stations, stations[1:]):
+                pair = frozenset((a, b))
+                if pair in seen: continue
+                seen.add(pair)
+                connections.append((a, b))
+        return connections
+
     @staticmethod
     def get_travel_time(station_a, station_b):
         #retorna el temps entre dues estacions
         #anada
-        t = Datas.R1_SEGMENT_TIMES.get((station_a, station_b))
+        t = Datas.SEGMENT_TIMES.get((station_a, station_b))
         if t is not None: return t
         #tornada
-        t = Datas.R1_SEGMENT_TIMES.get((station_b, station_a))
+        t = Datas.SEGMENT_TIMES.get((station_b, station_a))
         if t is not None: return t
         
         return 4.0
\ No newline at end of file
@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+
+class DecisionBatch:
+    """
+    Decisions d'un tick en mode per lots (TrafficManager.batched i VectorEnv), amb el mateix
+    resultat que el mode seqüencial.
+
+    Els trens s'hi afegeixen en l'ordre en què es visiten: els que han de decidir perceben
+    quan els toca, però no actuen fins que es buida el lot (flush). Llavors una sola crida
+    a action_batch tria les accions de tot el lot, cada tren actua en ordre i una sola
+    crida a update_batch aprèn de totes les transicions.
+
+    Endarrerir l'acció d'un tren només és invisible si cap tren posterior llegeix el que
+    aquest escriu en actuar. Per això el lot es buida:
+    - abans que percebi un tren que mira una via o una estació que algun tren del lot pot
+      modificar (Train.batch_reads i Train.batch_writes), que pot modificar l'estat dels
+      altres sense decidir (surt de l'estació o ha acabat) o que va en creuer;
+    - abans d'afegir un tren que decideix des d'un estat que el lot ja ha d'aprendre (si
+      l'agent aprèn, la seva decisió ha de veure l'actualització);
+    - just després d'afegir un tren que pot despertar trens adormits (WakeScheduler), perquè
+      es despertin al mateix tick que en el mode seqüencial.
+
+    Els números aleatoris es treuen en el mateix ordre que en el mode seqüencial:
+    action_batch els treu estat a estat, i les ajudes d'entrenament surten del generador
+    de cada tren (Train.nudge).
+    """
+
+    def __init__(self, brain, dt_minutes):
+        self.brain = brain
+        self.dt = dt_minutes
+        self.rewards = defaultdict(float)  # món -> suma de les recompenses del tick
+
+        self._groups = []     # [(món, [(tren, estat), ...])] en l'ordre de visita
+        self._edges = set()   # Vies que el lot pot modificar
+        self._nodes = set()   # Estacions on pot arribar algun tren del lot
+        self._states = set()  # Estats que el lot aprendrà
+
+    def __len__(self):
+        return sum(len(pending) for _, pending in self._groups)
+
+    def blocks(self, train):
+        """Si cal buidar el lot abans que el tren percebi (vegeu la classe)."""
+        if not self._groups:
+            return False
+        reads = train.batch_reads(self.dt)
+        if reads is None:
+            return True
+        edges, node = reads
+        return node in self._nodes or not self._edges.isdisjoint(edges)
+
+    def add(self, manager, train, state):
+        """Afegeix un tren que ha percebut i ha de decidir."""
+        if state in self._states:
+            self.flush()
+        if not self._groups or self._groups[-1][0] is not manager:
+            self._groups.append((manager, []))
+        self._groups[-1][1].append((train, state))
+
+        edges, node = train.batch_writes()
+        self._edges.update(edges)
+        if node is not None:
+            self._nodes.add(node)
+        if not self.brain.frozen:
+            self._states.add(state)
+        if manager.scheduler is not None and manager.scheduler.watches(edges):
+            self.flush()
+
+    def flush(self):
+        """Decideix, actua i aprèn per a tots els trens del lot, en ordre."""
+        if not self._groups:
+            return
+        groups, self._groups = self._groups, []
+        self._edges.clear()
+        self._nodes.clear()
+        self._states.clear()
+
+        actions = self.brain.action_batch([state for _, pending in groups for _, state in pending])
+        transitions = []
+        start = 0
+        for manager, pending in groups:
+            end = start + len(pending)
+            world = manager.act_batch(pending, actions[start:end], self.dt)
+            self.rewards[manager] += sum(r for _, _, r, _ in world)
+            transitions.extend(world)
+            start = end
+        self.brain.update_batch(transitions)
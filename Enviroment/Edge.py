@@ -1,6 +1,5 @@
 from .EdgeType import EdgeType
 import math
-import pygame
 
 class Edge:
     """
@@ -22,6 +21,15 @@ class Edge:
         self.node2 = node2
         self.edge_type = edge_type
         self.track_id = track_id
+
+        #posició a NetworkGraph.edges (l'assigna el graf)
+        self.id = -1
+
+        #mateixa via física en sentit contrari (l'enllaça NetworkGraph.add_edge)
+        self.inverse_edge = None
+
+        #límit de velocitat d'una incidència d'escenari (vegeu Scenario); None és el límit per defecte d'obstacle
+        self.restricted_speed_kmh = None
         
         #vector entre nodes per obtenir longitud en píxels
         dx = self.node2.x - self.node1.x
@@ -42,6 +50,8 @@ class Edge:
         #velocitat física usada per simular el temps real del tren
         if self.edge_type == EdgeType.NORMAL:
             self.max_speed_kmh = 160.0 
+        elif self.restricted_speed_kmh is not None:
+            self.max_speed_kmh = self.restricted_speed_kmh
         else: 
             self.max_speed_kmh = 10.0
         
@@ -82,4 +92,5 @@ class Edge:
         start = (self.node1.x + off_x, self.node1.y + off_y)
         end = (self.node2.x + off_x, self.node2.y + off_y)
         
+        import pygame  # només per dibuixar: la simulació headless no el necessita
         pygame.draw.line(screen, color, start, end, width)
\ No newline at end of file
@@ -0,0 +1,156 @@
+class _OccupancySlot:
+    """
+    Posició d'un tren dins d'una via. Forma part d'una llista doblement enllaçada
+    ordenada per progrés (el més avançat primer).
+    """
+    __slots__ = ("train_id", "progress", "key", "prev", "next")
+
+    def __init__(self, train_id, progress, key):
+        self.train_id = train_id
+        self.progress = progress
+        self.key = key
+        self.prev = None  # Tren de davant (líder)
+        self.next = None  # Tren de darrere (seguidor)
+
+
+class EdgeOccupancy:
+    """
+    Ocupació ordenada d'una via (Edge): quins trens hi ha i amb quin progrés (0.0 - 1.0).
+
+    L'ordre és per progrés descendent. En cas d'empat, el tren actualitzat més recentment
+    va darrere, igual que l'antiga llista que es reordenava a cada tick.
+
+    - Inserció: la posició es busca caminant des de la cua, on entren els trens nous (O(1)
+      en el cas habitual; O(k) si el tren queda per davant de k trens).
+    - Actualització de progrés: in situ si el tren no avança ningú; si n'avança k, es
+      recol·loca caminant des de la seva posició antiga, O(k).
+    - Eliminació, líder, seguidor, cap i cua: O(1) gràcies a la llista enllaçada.
+
+    `version` augmenta amb qualsevol canvi, perquè els trens sàpiguen si el que
+    van percebre d'aquesta via encara és vàlid.
+    """
+    __slots__ = ("_slots", "_head", "_tail", "_seq", "version")
+
+    def __init__(self):
+        self._slots = {}   # train_id -> _OccupancySlot
+        self._head = None  # El més avançat
+        self._tail = None  # El que acaba d'entrar
+        self._seq = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, train_id):
+        return train_id in self._slots
+
+    def __iter__(self):
+        """Itera (train_id, progrés) del més avançat al menys avançat."""
+        slot = self._head
+        while slot is not None:
+            yield slot.train_id, slot.progress
+            slot = slot.next
+
+    def _next_key(self, train_id, progress):
+        self._seq += 1
+        return (-progress, self._seq, train_id)
+
+    def _link(self, slot, near=None):
+        """Enllaça slot al seu lloc per clau (-progrés, seq, train_id), buscant-lo des de near (o la cua)."""
+        # Cap al cap mentre la clau sigui menor (el tren va més avançat)...
+        prev, nxt = (near if near is not None else self._tail), None
+        while prev is not None and slot.key < prev.key:
+            prev, nxt = prev.prev, prev
+        # ... o cap a la cua mentre sigui major
+        if nxt is None:
+            nxt = prev.next if prev is not None else self._head
+            while nxt is not None and nxt.key < slot.key:
+                prev, nxt = nxt, nxt.next
+        slot.prev, slot.next = prev, nxt
+
+        if prev is None: self._head = slot
+        else: prev.next = slot
+        if nxt is None: self._tail = slot
+        else: nxt.prev = slot
+
+    def _unlink(self, slot):
+        if slot.prev is None: self._head = slot.next
+        else: slot.prev.next = slot.next
+        if slot.next is None: self._tail = slot.prev
+        else: slot.next.prev = slot.prev
+        slot.prev = slot.next = None
+
+    def update(self, train_id, progress):
+        """Insereix el tren o n'actualitza el progrés."""
+        self.version += 1
+        slot = self._slots.get(train_id)
+        key = self._next_key(train_id, progress)
+
+        if slot is None:
+            slot = _OccupancySlot(train_id, progress, key)
+            self._slots[train_id] = slot
+            self._link(slot)
+            return
+
+        # Cas habitual: el tren avança sense passar ningú, la seva posició no canvia
+        if (slot.prev is None or slot.prev.key < key) and (slot.next is None or key < slot.next.key):
+            slot.key = key
+            slot.progress = progress
+            return
+
+        # Ha avançat (o l'han avançat): es recol·loca des d'on era
+        near = slot.prev if slot.prev is not None else slot.next
+        self._unlink(slot)
+        slot.key = key
+        slot.progress = progress
+        self._link(slot, near)
+
+    def remove(self, train_id):
+        """Treu el tren de la via. Retorna True si hi era."""
+        slot = self._slots.pop(train_id, None)
+        if slot is None:
+            return False
+        self._unlink(slot)
+        self.version += 1
+        return True
+
+    def snapshot(self):
+        """Parells (train_id, progrés) en ordre, per a restore (vegeu SimulationSnapshot)."""
+        return tuple(self)
+
+    def restore(self, items):
+        """Torna a l'ocupació d'un snapshot(). Inserir en ordre manté els empats com estaven."""
+        self.clear()
+        for train_id, progress in items:
+            self.update(train_id, progress)
+
+    def clear(self):
+        self._slots.clear()
+        self._head = self._tail = None
+        self.version += 1
+
+    def progress_of(self, train_id):
+        slot = self._slots.get(train_id)
+        return slot.progress if slot else None
+
+    def head(self):
+        """(train_id, progrés) del tren més avançat, o None si la via és buida."""
+        return (self._head.train_id, self._head.progress) if self._head else None
+
+    def tail(self):
+        """(train_id, progrés) de l'últim tren que ha entrat, o None si la via és buida."""
+        return (self._tail.train_id, self._tail.progress) if self._tail else None
+
+    def leader(self, train_id):
+        """(train_id, progrés) del tren just davant, o None si no n'hi ha (o no hi som)."""
+        slot = self._slots.get(train_id)
+        if slot is None or slot.prev is None:
+            return None
+        return slot.prev.train_id, slot.prev.progress
+
+    def follower(self, train_id):
+        """(train_id, progrés) del tren just darrere, o None si no n'hi ha (o no hi som)."""
+        slot = self._slots.get(train_id)
+        if slot is None or slot.next is None:
+            return None
+        return slot.next.train_id, slot.next.progress
@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class EventLog:
+    """
+    Registre binari d'esdeveniments de la simulació, en un buffer circular de mida fixa
+    reservat d'entrada (un array estructurat de NumPy). Registrar un esdeveniment és
+    escriure una fila: no es formata cap text fins que algú el vol llegir.
+
+    Cada esdeveniment té: hora de simulació, tipus, tren, tram (estació d'origen i de
+    destinació, com a índexs a `names`), via i un valor que depèn del tipus:
+    - SPAWN, DEPART, TRACK_SWITCH: 0.
+    - ARRIVE: retard respecte de l'horari en minuts (NaN si l'estació no hi és).
+    - ATP: velocitat límit (km/h) que l'ATP imposa.
+    - OBSTACLE: velocitat màxima (km/h) de la via afectada (tren = -1).
+    - STOP: distància al líder (km) quan el tren s'ha hagut d'aturar per no tocar-lo.
+
+    Sense fitxer, quan el buffer és ple els esdeveniments nous sobreescriuen els més antics.
+    Amb fitxer (path), el buffer es buida al fitxer abans de sobreescriure res: el fitxer
+    conté tots els esdeveniments com a files binàries de DTYPE, i els noms de les estacions
+    van a path + '.names' (un per línia). Vegeu read.
+    """
+
+    SPAWN, DEPART, ARRIVE, TRACK_SWITCH, ATP, OBSTACLE, STOP = range(7)
+    KIND_NAMES = ("SPAWN", "DEPART", "ARRIVE", "TRACK_SWITCH", "ATP", "OBSTACLE", "STOP")
+
+    DTYPE = np.dtype([
+        ("time", "<f8"),
+        ("kind", "u1"),
+        ("track", "i1"),
+        ("train", "<i4"),
+        ("node", "<i4"),
+        ("next_node", "<i4"),
+        ("value", "<f4"),
+    ])
+
+    def __init__(self, capacity=65536, path=None):
+        self.capacity = int(capacity)
+        self.path = path
+        self._buffer = np.zeros(self.capacity, dtype=self.DTYPE)
+        self._count = 0    # Esdeveniments registrats des de l'inici
+        self._drained = 0  # Dels quals ja són al fitxer
+        self._oldest = 0   # Primer esdeveniment que encara és al buffer després d'un rewind
+
+        # Noms d'estació -> índex (només creix)
+        self.names = []
+        self._codes = {}
+        self._names_saved = 0
+
+        if path is not None:
+            open(path, 'wb').close()
+            open(path + '.names', 'w', encoding='utf-8').close()
+
+    def __len__(self):
+        return self._count - self._first()
+
+    @property
+    def total(self):
+        """Esdeveniments registrats des de l'inici (inclosos els ja buidats o perduts)."""
+        return self._count
+
+    @property
+    def dropped(self):
+        """Esdeveniments sobreescrits abans de poder-los buidar (sempre 0 amb fitxer)."""
+        return max(0, self._first() - self._drained)
+
+    def code(self, name):
+        if name is None: return -1
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def record(self, kind, time, train=-1, node=None, next_node=None, track=-1, value=0.0):
+        if self.path is not None and self._count - self._drained >= self.capacity:
+            self.drain()
+        self._buffer[self._count % self.capacity] = (
+            time, kind, track, train, self.code(node), self.code(next_node), value
+        )
+        self._count += 1
+
+    def _first(self):
+        return max(self._oldest, self._count - self.capacity)
+
+    def _slice(self, start):
+        """Esdeveniments del buffer des del número `start` fins a l'últim, en ordre cronològic."""
+        start = max(start, self._first())
+        idx = np.arange(start, self._count) % self.capacity
+        return self._buffer[idx]
+
+    def recent(self, n=None):
+        """Els n últims esdeveniments que encara són al buffer (tots per defecte)."""
+        start = self._first() if n is None else self._count - n
+        return self._slice(start)
+
+    def drain(self):
+        """Escriu al fitxer els esdeveniments pendents. Retorna quants n'ha escrit (0 sense fitxer)."""
+        if self.path is None: return 0
+        pending = self._slice(self._drained)
+        with open(self.path, 'ab') as f:
+            pending.tofile(f)
+        if len(self.names) > self._names_saved:
+            with open(self.path + '.names', 'a', encoding='utf-8') as f:
+                f.writelines(name + '\n' for name in self.names[self._names_saved:])
+            self._names_saved = len(self.names)
+        self._drained = self._count
+        return len(pending)
+
+    def mark(self):
+        """Posició actual del registre, per tornar-hi amb rewind."""
+        return self._count
+
+    def rewind(self, mark):
+        """
+        Descarta els esdeveniments posteriors a mark (p. ex. els d'una branca de prova, vegeu
+        TrafficManager.branch). Els que ja s'han buidat al fitxer no es poden descartar.
+        """
+        mark = max(mark, self._drained)
+        if mark >= self._count: return
+        # Els esdeveniments descartats poden haver sobreescrit alguns dels anteriors
+        self._oldest = min(self._first(), mark)
+        self._count = mark
+
+    def clear(self):
+        self._oldest = self._drained = self._count
+
+    @classmethod
+    def read(cls, path):
+        """Llegeix un fitxer escrit per drain. Retorna (esdeveniments, noms d'estació)."""
+        events = np.fromfile(path, dtype=cls.DTYPE)
+        with open(path + '.names', encoding='utf-8') as f:
+            names = f.read().splitlines()
+        return events, names
+
+    @classmethod
+    def describe(cls, event, names):
+        """Línia de text d'un esdeveniment (per depurar, no per al bucle de simulació)."""
+        node = names[event['node']] if event['node'] >= 0 else "-"
+        next_node = names[event['next_node']] if event['next_node'] >= 0 else "Fi"
+        train = f"Tren {event['train']}" if event['train'] >= 0 else "Xarxa"
+        return (f"[T={event['time']:7.1f}] {cls.KIND_NAMES[event['kind']]:12} | {train:10} | "
+                f"{node}->{next_node} (Via {event['track']}) | {event['value']:.1f}")
+
+    def lines(self, n=None):
+        return [self.describe(event, self.names) for event in self.recent(n)]
@@ -0,0 +1,183 @@
+import csv
+import io
+import zipfile
+from array import array
+import numpy as np
+
+
+class GtfsTimetable:
+    """
+    Horaris reals d'un feed GTFS estàtic (fitxer zip local), en taules compactes indexades per enters.
+
+    - Parades: stop_ids, stop_names i stop_index (stop_id -> índex).
+    - Viatges: trip_ids, trip_route, trip_service i trip_direction, per índex de viatge.
+    - Seqüència de parades de cada viatge en format CSR: les parades del viatge t són les files
+      trip_offsets[t]:trip_offsets[t + 1] de stops (índex de parada), arrivals i departures
+      (minuts des de la mitjanit; NaN si el feed no en dona).
+    - segment_times: temps de recorregut mitjà entre dues parades consecutives d'algun viatge,
+      {(índex_a, índex_b): minuts}.
+
+    stop_times.txt es llegeix fila a fila (pot tenir milions de files): cada fila només afegeix
+    uns quants números a arrays compactes, i l'ordenació per viatge es fa al final amb NumPy.
+
+    Vegeu TrafficManager.load_timetable per fer sortir els trens segons aquests horaris.
+    """
+
+    def __init__(self):
+        self.stop_ids = []
+        self.stop_names = []
+        self.stop_index = {}
+
+        self.trip_ids = []
+        self.trip_index = {}
+        self.trip_route = []
+        self.trip_service = []
+        self.trip_direction = array('b')
+
+        self.trip_offsets = np.zeros(1, dtype=np.int64)
+        self.stops = np.zeros(0, dtype=np.int32)
+        self.arrivals = np.zeros(0, dtype=np.float32)
+        self.departures = np.zeros(0, dtype=np.float32)
+
+        self.segment_times = {}
+
+    def __len__(self):
+        return len(self.trip_ids)
+
+    def __repr__(self):
+        return f"GtfsTimetable({len(self.stop_ids)} parades, {len(self.trip_ids)} viatges, {len(self.stops)} pas per parada)"
+
+    @classmethod
+    def load(cls, zip_path, route_ids=None):
+        """
+        Llegeix stops.txt, trips.txt i stop_times.txt del feed.
+
+        :param route_ids: Si es dona, només els viatges d'aquestes rutes (route_id).
+        """
+        timetable = cls()
+        with zipfile.ZipFile(zip_path) as feed:
+            timetable._read_stops(feed)
+            timetable._read_trips(feed, None if route_ids is None else set(route_ids))
+            timetable._read_stop_times(feed)
+        timetable._compute_segment_times()
+        return timetable
+
+    @staticmethod
+    def _rows(feed, name, columns, optional=()):
+        """Valors de les columnes demanades per cada fila d'un fitxer del feed, en streaming ('' si és opcional i falta)."""
+        with feed.open(name) as raw:
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+            header = [h.strip() for h in next(reader, [])]
+            missing = [c for c in columns if c not in header and c not in optional]
+            if missing:
+                raise ValueError(f"GTFS: a {name} hi falten les columnes {missing}")
+            idx = [header.index(c) if c in header else None for c in columns]
+            for row in reader:
+                if not row: continue
+                yield [row[i].strip() if i is not None and i < len(row) else '' for i in idx]
+
+    @staticmethod
+    def parse_time(value):
+        """'HH:MM:SS' (les hores poden passar de 24) a minuts des de la mitjanit; NaN si és buit."""
+        if not value:
+            return float('nan')
+        h, m, s = value.split(':')
+        return int(h) * 60 + int(m) + int(s) / 60.0
+
+    def _read_stops(self, feed):
+        for stop_id, stop_name in self._rows(feed, 'stops.txt', ('stop_id', 'stop_name')):
+            self.stop_index[stop_id] = len(self.stop_ids)
+            self.stop_ids.append(stop_id)
+            self.stop_names.append(stop_name)
+
+    def _read_trips(self, feed, route_ids):
+        columns = ('route_id', 'service_id', 'trip_id', 'direction_id')
+        for route_id, service_id, trip_id, direction in self._rows(feed, 'trips.txt', columns, optional=('direction_id',)):
+            if route_ids is not None and route_id not in route_ids: continue
+            self.trip_index[trip_id] = len(self.trip_ids)
+            self.trip_ids.append(trip_id)
+            self.trip_route.append(route_id)
+            self.trip_service.append(service_id)
+            self.trip_direction.append(1 if direction == '1' else 0)
+
+    def _read_stop_times(self, feed):
+        trips, sequences, stops = array('i'), array('i'), array('i')
+        arrivals, departures = array('f'), array('f')
+
+        columns = ('trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence')
+        trip_index, stop_index, parse_time = self.trip_index, self.stop_index, self.parse_time
+        for trip_id, arrival, departure, stop_id, sequence in self._rows(feed, 'stop_times.txt', columns):
+            trip = trip_index.get(trip_id)
+            stop = stop_index.get(stop_id)
+            if trip is None or stop is None: continue
+            trips.append(trip)
+            sequences.append(int(sequence))
+            stops.append(stop)
+            arrivals.append(parse_time(arrival or departure))
+            departures.append(parse_time(departure or arrival))
+
+        # Ordenem per viatge i seqüència i ho passem a CSR
+        trips = np.frombuffer(trips, dtype=np.int32)
+        order = np.lexsort((np.frombuffer(sequences, dtype=np.int32), trips))
+        self.stops = np.frombuffer(stops, dtype=np.int32)[order]
+        self.arrivals = np.frombuffer(arrivals, dtype=np.float32)[order]
+        self.departures = np.frombuffer(departures, dtype=np.float32)[order]
+        self.trip_offsets = np.zeros(len(self.trip_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(trips, minlength=len(self.trip_ids)), out=self.trip_offsets[1:])
+
+    def _compute_segment_times(self):
+        """Temps mitjà de cada tram (parada -> parada següent del mateix viatge)."""
+        trip_of_row = np.repeat(np.arange(len(self.trip_ids)), np.diff(self.trip_offsets))
+        run = self.arrivals[1:] - self.departures[:-1]
+        valid = (trip_of_row[1:] == trip_of_row[:-1]) & np.isfinite(run) & (run >= 0)
+
+        n_stops = len(self.stop_ids)
+        keys = self.stops[:-1][valid].astype(np.int64) * n_stops + self.stops[1:][valid]
+        if len(keys) == 0:
+            self.segment_times = {}
+            return
+        unique, inverse = np.unique(keys, return_inverse=True)
+        means = np.bincount(inverse, weights=run[valid]) / np.bincount(inverse)
+        self.segment_times = {
+            (int(key // n_stops), int(key % n_stops)): float(minutes)
+            for key, minutes in zip(unique.tolist(), means.tolist())
+        }
+
+    def trips(self, route_ids=None, service_ids=None):
+        """Índexs dels viatges de les rutes i serveis (service_id) donats (tots per defecte)."""
+        route_ids = None if route_ids is None else set(route_ids)
+        service_ids = None if service_ids is None else set(service_ids)
+        return [
+            t for t in range(len(self.trip_ids))
+            if (route_ids is None or self.trip_route[t] in route_ids)
+            and (service_ids is None or self.trip_service[t] in service_ids)
+        ]
+
+    def trip_stops(self, trip):
+        """(parades, arribades, sortides) del viatge, en ordre de pas."""
+        start, end = self.trip_offsets[trip], self.trip_offsets[trip + 1]
+        return self.stops[start:end], self.arrivals[start:end], self.departures[start:end]
+
+    def node_map(self, nodes, normalize, overrides=None):
+        """
+        {índex de parada: Node} de les parades que corresponen a una estació de la xarxa.
+
+        :param nodes: Estacions per nom normalitzat (TrafficManager.nodes).
+        :param normalize: Funció de normalització de noms (TrafficManager._normalize_name).
+        :param overrides: {stop_id: nom d'estació} per a les parades amb un nom diferent al de la xarxa.
+        """
+        overrides = overrides or {}
+        mapping = {}
+        for idx, (stop_id, stop_name) in enumerate(zip(self.stop_ids, self.stop_names)):
+            node = nodes.get(normalize(overrides.get(stop_id, stop_name)))
+            if node is not None:
+                mapping[idx] = node
+        return mapping
+
+    def segment_times_by_name(self, node_map):
+        """segment_times amb els noms de les estacions de la xarxa, com TrafficManager.segment_times."""
+        return {
+            (node_map[a].name, node_map[b].name): minutes
+            for (a, b), minutes in self.segment_times.items()
+            if a in node_map and b in node_map and node_map[a] is not node_map[b]
+        }
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import pickle
+
+
+class NetworkCache:
+    """
+    Xarxa compilada: el resultat de llegir el CSV d'estacions (noms normalitzats,
+    coordenades i posició a pantalla) i de resoldre les connexions, guardat en un
+    fitxer pickle perquè els TrafficManager següents no hagin de tornar a parsejar-lo.
+
+    La clau és un hash del CSV, de les connexions i de la mida de la pantalla:
+    si qualsevol d'aquests canvia, el fitxer antic deixa de fer-se servir.
+    """
+
+    # S'incrementa si canvia el format de les dades compilades
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir="Enviroment/data/network_cache"):
+        self.cache_dir = cache_dir
+
+    def key(self, csv_path, connections, width, height):
+        """Hash de tot el que determina la xarxa compilada."""
+        h = hashlib.sha1()
+        with open(csv_path, "rb") as f:
+            h.update(f.read())
+        h.update(repr((self.FORMAT_VERSION, list(connections), width, height)).encode("utf-8"))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"network_{key}.pkl")
+
+    def load(self, key):
+        """Retorna la xarxa compilada o None si no n'hi ha (o el fitxer no es pot llegir)."""
+        try:
+            with open(self.path(key), "rb") as f:
+                compiled = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(compiled, dict) or compiled.get('version') != self.FORMAT_VERSION:
+            return None
+        return compiled
+
+    def save(self, key, compiled):
+        """Escriu la xarxa compilada. Es fa a un fitxer temporal i es reanomena, per si hi ha altres processos llegint."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(dict(compiled, version=self.FORMAT_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"(NetworkCache) No s'ha pogut guardar la xarxa compilada: {e}")
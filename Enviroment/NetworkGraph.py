@@ -0,0 +1,93 @@
+from collections import deque
+
+
+class NetworkGraph:
+    """
+    Topologia de la xarxa amb índexs enters, compartida per totes les línies.
+
+    - Cada estació (Node) té un índex (Node.index), la seva posició a nodes.
+    - Cada via (Edge, un sentit d'una via física) té un identificador (Edge.id), la seva posició a edges.
+    - L'adjacència és per índex: adjacency[u] = {v: [id via track 0, id via track 1]} (-1 si no hi és).
+
+    Els trens i el manager busquen les vies pels nodes (edge_between), sense construir claus amb
+    noms. Els noms només es tradueixen a índexs per a les dades que venen de fora (escenaris,
+    fitxers), amb get_edge.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = []
+        self.node_index = {}  # nom d'estació -> índex
+        self.adjacency = []
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add_node(self, node):
+        node.index = len(self.nodes)
+        self.nodes.append(node)
+        self.node_index[node.name] = node.index
+        self.adjacency.append({})
+        return node.index
+
+    def add_edge(self, edge):
+        """Afegeix una via i l'enllaça amb la seva inversa (mateix track, sentit contrari) si ja hi és."""
+        edge.id = len(self.edges)
+        self.edges.append(edge)
+
+        slots = self.adjacency[edge.node1.index].setdefault(edge.node2.index, [])
+        while len(slots) <= edge.track_id:
+            slots.append(-1)
+        slots[edge.track_id] = edge.id
+
+        inverse = self.edge_between(edge.node2, edge.node1, edge.track_id)
+        edge.inverse_edge = inverse
+        if inverse is not None:
+            inverse.inverse_edge = edge
+        return edge.id
+
+    def edge_id(self, u, v, track_id=0):
+        """Id de la via de l'índex u a l'índex v pel track donat, o -1."""
+        slots = self.adjacency[u].get(v)
+        if slots is None or track_id >= len(slots):
+            return -1
+        return slots[track_id]
+
+    def edge_between(self, u_node, v_node, track_id=0):
+        """Via (Edge) de u_node a v_node pel track donat, o None."""
+        slots = self.adjacency[u_node.index].get(v_node.index)
+        if slots is None or track_id >= len(slots):
+            return None
+        edge_id = slots[track_id]
+        return self.edges[edge_id] if edge_id >= 0 else None
+
+    def get_edge(self, u_name, v_name, track_id=0):
+        """Com edge_between, a partir dels noms de les estacions."""
+        u = self.node_index.get(u_name)
+        v = self.node_index.get(v_name)
+        if u is None or v is None:
+            return None
+        edge_id = self.edge_id(u, v, track_id)
+        return self.edges[edge_id] if edge_id >= 0 else None
+
+    def neighbors(self, u):
+        """Índexs de les estacions connectades directament a l'índex u."""
+        return list(self.adjacency[u])
+
+    def shortest_path(self, u, v):
+        """Índexs de les estacions del camí amb menys trams de u a v (inclosos els dos), o None si no n'hi ha."""
+        previous = {u: None}
+        queue = deque([u])
+        while queue:
+            w = queue.popleft()
+            if w == v:
+                path = []
+                while w is not None:
+                    path.append(w)
+                    w = previous[w]
+                return path[::-1]
+            for x in self.adjacency[w]:
+                if x not in previous:
+                    previous[x] = w
+                    queue.append(x)
+        return None
@@ -1,5 +1,3 @@
-import pygame
-
 class Node:
     """
     representa una estacio
@@ -11,6 +9,7 @@ class Node:
         self.y = y
         self.id = node_id
         self.name = name
+        self.index = -1  #posició a NetworkGraph.nodes (l'assigna el graf)
         
         #varibales visuals
         self.radius = 5
@@ -23,6 +22,9 @@ class Node:
         self.max_capacity = 4
         self.current_trains = 0 
 
+        #avís opcional quan s'allibera una plaça (per despertar trens que esperen)
+        self.on_exit = None
+
     def has_capacity(self):
         #per saber si hi ha espai per parar el tren
         return self.current_trains < self.max_capacity
@@ -33,8 +35,12 @@ class Node:
     def exit_station(self):
         if self.current_trains > 0:
             self.current_trains -= 1
+            if self.on_exit is not None:
+                self.on_exit(self)
 
     def draw(self, screen):
+        import pygame  # només per dibuixar: la simulació headless no el necessita
+
         color = (0, 100, 200) 
         
         if getattr(self, 'is_siding', False):
@@ -0,0 +1,117 @@
+import functools
+import time
+
+
+class Profiler:
+    """
+    Temps i nombre de crides per fase del bucle de simulació, per saber on passa el temps un dia simulat.
+
+    Les fases són mètodes de les classes del simulador (vegeu probes). enable() els substitueix
+    a la classe per una versió que cronometra cada crida, i disable() torna a posar els originals.
+    Desactivat no hi ha cap sonda instal·lada i el cost és zero. Es pot activar i desactivar
+    en qualsevol moment, però les sondes són de classe: només hi pot haver un Profiler actiu a
+    cada procés (activar-ne un desactiva l'anterior), i mesura tots els mons del procés.
+
+    Les fases poden anar niades (p. ex. 'perception' és dins de 'tick'): cada fila és el temps
+    total dins d'aquell mètode, no exclusiu.
+
+        profiler = Profiler()
+        profiler.enable()
+        ... un dia de simulació ...
+        profiler.end_day()
+        print(profiler.report())
+    """
+
+    _active = None  # Profiler amb les sondes instal·lades
+
+    def __init__(self):
+        self.enabled = False
+        self._current = {}  # fase -> [segons, crides] del dia en curs
+        self.history = []   # (dies, {fase: (segons, crides)}) per cada dia (o pas de VectorEnv) tancat
+        self._originals = []
+
+    @staticmethod
+    def probes():
+        """(classe, mètode, fase) de cada sonda."""
+        from Agent.QlearningAgent import QLearningAgent
+        from Enviroment.TrafficManager import TrafficManager
+        from Enviroment.Train import Train
+        from Enviroment.TrainPhysics import TrainPhysics
+        from Enviroment.VectorEnv import VectorEnv
+
+        return [
+            (TrafficManager, 'update', 'tick'),
+            (VectorEnv, 'step', 'tick'),
+            (TrafficManager, '_handle_mechanics', 'mechanics'),
+            (TrafficManager, '_spawn_route', 'spawn'),
+            (TrafficManager, '_retire_train', 'archive'),
+            (TrafficManager, 'update_train_position', 'occupancy'),
+            (Train, 'sense', 'perception'),
+            (Train, '_compute_vision_ahead', 'perception.vision'),
+            (Train, '_get_general_state', 'state'),
+            (TrainPhysics, 'act_batch', 'physics'),
+            (QLearningAgent, 'action', 'agent.action'),
+            (QLearningAgent, 'action_batch', 'agent.action'),
+            (QLearningAgent, 'update', 'agent.update'),
+            (QLearningAgent, 'update_batch', 'agent.update'),
+        ]
+
+    def _probe(self, fn, phase):
+        stats = self._current.setdefault(phase, [0.0, 0])
+        clock = time.perf_counter
+
+        @functools.wraps(fn)
+        def probe(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats[0] += clock() - start
+                stats[1] += 1
+
+        return probe
+
+    def enable(self):
+        if self.enabled: return
+        if Profiler._active is not None:
+            Profiler._active.disable()
+        for owner, name, phase in self.probes():
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._probe(original, phase))
+        Profiler._active = self
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled: return
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+        Profiler._active = None
+        self.enabled = False
+
+    def end_day(self, days=1):
+        """Tanca el dia en curs (o els `days` dies simulats alhora per un pas de VectorEnv)."""
+        self.history.append((days, {phase: tuple(stats) for phase, stats in self._current.items() if stats[1]}))
+        for stats in self._current.values():
+            stats[0] = 0.0
+            stats[1] = 0
+
+    def per_day(self, since=0):
+        """Mitjana per dia de {fase: (segons, crides)} dels dies tancats a partir de history[since]."""
+        days = 0
+        totals = {}
+        for n, record in self.history[since:]:
+            days += n
+            for phase, (seconds, calls) in record.items():
+                total = totals.setdefault(phase, [0.0, 0])
+                total[0] += seconds
+                total[1] += calls
+        if days == 0:
+            return {}
+        return {phase: (seconds / days, calls / days) for phase, (seconds, calls) in totals.items()}
+
+    def report(self, since=0):
+        """Línia amb el temps (ms) i les crides per dia de cada fase, de més lenta a més ràpida."""
+        stats = sorted(self.per_day(since).items(), key=lambda item: -item[1][0])
+        return " | ".join(f"{phase} {seconds * 1000:.1f}ms ({calls:.0f})" for phase, (seconds, calls) in stats)
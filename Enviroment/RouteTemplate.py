@@ -0,0 +1,33 @@
+class RouteTemplate:
+    """
+    Ruta precompilada d'una línia: el que spawn_line_train necessita i que no depèn
+    de l'hora de sortida. Es construeix un sol cop per línia (vegeu TrafficManager.route_template).
+
+    - route_nodes: Nodes de la ruta (compartits pels trens de la línia, només de lectura).
+    - offsets: minuts des de la sortida fins a cada estació (sumes acumulades del temps
+      oficial de cada tram més Datas.STOP_STA_TIME), com a calculate_schedule.
+      Els viatges d'un horari GTFS (vegeu TrafficManager.load_timetable) només tenen hora a les
+      estacions on paren: node_ids diu a quines correspon cada offset.
+    - first_edges: via de sortida per a cada track_id (None si no existeix).
+    """
+    __slots__ = ("stations", "segment_times", "route_nodes", "node_ids", "offsets", "first_edges")
+
+    def __init__(self, stations, route_nodes, offsets, first_edges, node_ids=None, segment_times=None):
+        self.stations = stations  # Llista de manager.lines d'on surt (per saber si ha canviat)
+        self.segment_times = segment_times  # manager.segment_times amb què s'han calculat els offsets
+        self.route_nodes = route_nodes
+        self.node_ids = [n.id for n in route_nodes] if node_ids is None else node_ids
+        self.offsets = offsets
+        self.first_edges = first_edges
+
+    def is_stale(self, stations, segment_times):
+        """
+        Cert si la línia s'ha redefinit (manager.lines[nom] apunta a una altra llista) o si
+        els temps oficials han canviat (manager.segment_times apunta a un altre diccionari,
+        p. ex. després de load_timetable).
+        """
+        return stations is not self.stations or segment_times is not self.segment_times
+
+    def schedule(self, start_time):
+        """Horari {node_id: hora_prevista} d'un tren que surt a start_time."""
+        return {node_id: start_time + offset for node_id, offset in zip(self.node_ids, self.offsets)}
@@ -0,0 +1,91 @@
+import csv
+import numpy as np
+
+
+class DisruptionEvent:
+    """Incidència programada: a partir de `time` (minuts de simulació), la via u->v (track) queda limitada a speed_kmh durant `duration` minuts."""
+    __slots__ = ("time", "u_name", "v_name", "track_id", "speed_kmh", "duration")
+
+    def __init__(self, time, u_name, v_name, track_id, speed_kmh, duration):
+        self.time = float(time)
+        self.u_name = u_name
+        self.v_name = v_name
+        self.track_id = int(track_id)
+        self.speed_kmh = float(speed_kmh)
+        self.duration = float(duration)
+
+    def __repr__(self):
+        return (f"DisruptionEvent(t={self.time:.1f}, {self.u_name}->{self.v_name} via {self.track_id}, "
+                f"{self.speed_kmh:.0f} km/h, {self.duration:.1f} min)")
+
+
+class Scenario:
+    """
+    Llista d'incidències ordenada per temps, per reproduir exactament les mateixes avaries
+    en diferents execucions (vegeu TrafficManager.load_scenario). Amb un escenari carregat,
+    el manager no tira daus al CHAOS_INTERVAL: aplica les incidències quan toca i repara
+    cada via quan s'acaba la seva durada.
+
+    Format de fitxer: CSV amb ';' i una incidència per línia:
+        time;from;to;track;speed_kmh;duration
+    """
+
+    FIELDS = ["time", "from", "to", "track", "speed_kmh", "duration"]
+
+    def __init__(self, events=()):
+        self.events = sorted(events, key=lambda e: e.time)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    @classmethod
+    def generate(cls, segments, horizon, seed=None, interval=120.0, events_per_interval=1,
+                 speeds=(10.0,), duration=(120.0, 120.0)):
+        """
+        Genera de cop totes les incidències d'un horitzó amb un generador NumPy.
+
+        :param segments: Llista de vies físiques (u_name, v_name, track_id) candidates.
+        :param horizon: Minuts de simulació a cobrir.
+        :param seed: Llavor del generador (el mateix seed dona el mateix escenari).
+        :param interval: Minuts entre tandes d'incidències (com el CHAOS_INTERVAL).
+        :param events_per_interval: Incidències per tanda.
+        :param speeds: Velocitats límit possibles (km/h), triades uniformement.
+        :param duration: (mínim, màxim) de la durada en minuts, uniforme.
+        """
+        if not segments:
+            return cls()
+        rng = np.random.default_rng(seed)
+        n_intervals = int(horizon // interval)
+        n = n_intervals * events_per_interval
+
+        times = np.repeat(np.arange(1, n_intervals + 1) * interval, events_per_interval)
+        picks = rng.integers(0, len(segments), n)
+        chosen_speeds = rng.choice(np.asarray(speeds, dtype=np.float64), n)
+        durations = rng.uniform(duration[0], duration[1], n)
+
+        events = [
+            DisruptionEvent(t, *segments[i], speed, d)
+            for t, i, speed, d in zip(times.tolist(), picks.tolist(), chosen_speeds.tolist(), durations.tolist())
+        ]
+        return cls(events)
+
+    def save(self, filename):
+        with open(filename, mode='w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(self.FIELDS)
+            for e in self.events:
+                # str(float) és exacte en tornar-lo a llegir: el fitxer reprodueix el mateix escenari
+                writer.writerow([e.time, e.u_name, e.v_name, e.track_id, e.speed_kmh, e.duration])
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f, delimiter=';')
+            events = [
+                DisruptionEvent(row['time'], row['from'], row['to'], row['track'], row['speed_kmh'], row['duration'])
+                for row in reader
+            ]
+        return cls(events)
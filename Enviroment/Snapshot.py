@@ -0,0 +1,133 @@
+import random
+
+
+class SimulationSnapshot:
+    """
+    Fotografia de l'estat mutable d'un TrafficManager, per provar decisions uns minuts
+    endavant i tornar enrere (vegeu TrafficManager.snapshot, restore i branch).
+
+    La xarxa (nodes, vies, segments, línies i rutes) es comparteix: només es copia el que
+    canvia durant la simulació:
+    - Rellotge, comptadors de spawn/manteniment/caos, línia de spawn i obstacles reportats.
+    - Tipus i límit d'incidència de cada via (Edge.edge_type, restricted_speed_kmh) i trens
+      a cada estació (Node.current_trains).
+    - Posició dins de l'escenari d'incidències i les incidències actives, si n'hi ha.
+    - Posició dins de l'horari (load_timetable) i les sortides pendents.
+    - Ocupació de les vies no buides i l'índex invers tren -> vies.
+    - Llista de trens actius i l'estat de cada tren (atributs, amb
+      arrival_logs copiat; l'horari i la ruta no canvien i es comparteixen).
+    - Files del motor vectoritzat (TrainPhysics), si n'hi ha.
+    - Comptador d'identificadors de tren i estat dels generadors aleatoris (el del món,
+      el de cada tren i el de l'agent).
+    - Posició del registre d'esdeveniments i del de trajectes (TripLog): en restaurar es
+      descarten les files registrades després (les que ja s'han escrit al fitxer es queden).
+
+    La Q-Table de l'agent no en forma part.
+
+    Restaurar torna els mateixos objectes Train a l'estat de la fotografia, de manera que
+    un snapshot es pot restaurar tantes vegades com calgui.
+    """
+
+    def __init__(self, manager):
+        # Amb el planificador, els trens adormits o en creuer es posen al dia abans de copiar-los
+        if manager.scheduler is not None:
+            manager.scheduler.wake_all()
+
+        self.sim_time = manager.sim_time
+        self.last_spawn = manager.last_spawn
+        self.last_reset = manager.last_reset
+        self.last_chaos = manager.last_chaos
+        self.current_spawn_line = manager.current_spawn_line
+        self.reported_obstacles = dict(manager._reported_obstacles)
+
+        self.edge_types = [(e.edge_type, e.restricted_speed_kmh) for e in manager.all_edges]
+        self.node_trains = [n.current_trains for n in manager.nodes.values()]
+
+        self.timetable_pos = manager._timetable_pos
+        self.timetable_waiting = list(manager._timetable_waiting)
+
+        self.scenario_pos = manager._scenario_pos
+        self.disruptions = list(manager._disruptions)
+        self.disruption_counts = dict(manager._disruption_counts)
+
+        self.occupancy = {edge: occupancy.snapshot() for edge, occupancy in manager._train_positions.items() if occupancy}
+        self.train_edges = {train_id: set(edges) for train_id, edges in manager._train_edges.items()}
+
+        self.active_trains = list(manager.active_trains)
+        self.trains = [(t, self._train_state(t)) for t in self.active_trains]
+
+        self.physics = manager.physics.snapshot() if manager.physics is not None else None
+
+        self.events_mark = manager.events.mark()
+        self.trips_mark = manager.trip_log.mark()
+
+        self.next_train_id = manager._next_train_id
+        self.rng_state = manager.rng.getstate()
+        brain = manager._brain
+        self.brain_rng_state = brain.py_rng.getstate() if brain is not None else None
+
+    @staticmethod
+    def _train_state(train):
+        state = dict(train.__dict__)
+        state['arrival_logs'] = dict(train.arrival_logs)
+        state['rng'] = train.rng.getstate()
+        return state
+
+    def restore(self, manager):
+        """Torna el manager (i els seus trens) a l'estat de la fotografia."""
+        manager.sim_time = self.sim_time
+        manager.last_spawn = self.last_spawn
+        manager.last_reset = self.last_reset
+        manager.last_chaos = self.last_chaos
+        manager.current_spawn_line = self.current_spawn_line
+        manager._reported_obstacles = dict(self.reported_obstacles)
+
+        for edge, (edge_type, restricted) in zip(manager.all_edges, self.edge_types):
+            if edge.edge_type != edge_type or edge.restricted_speed_kmh != restricted:
+                edge.edge_type = edge_type
+                edge.restricted_speed_kmh = restricted
+                edge.update_properties()
+        for node, current_trains in zip(manager.nodes.values(), self.node_trains):
+            node.current_trains = current_trains
+
+        manager._timetable_pos = self.timetable_pos
+        manager._timetable_waiting = list(self.timetable_waiting)
+
+        manager._scenario_pos = self.scenario_pos
+        manager._disruptions = list(self.disruptions)
+        manager._disruption_counts = dict(self.disruption_counts)
+
+        # Només es toquen les vies ocupades ara o a la fotografia
+        for edge, occupancy in manager._train_positions.items():
+            if occupancy and edge not in self.occupancy:
+                occupancy.clear()
+        for edge, items in self.occupancy.items():
+            manager.occupancy(edge).restore(items)
+        manager._train_edges.clear()
+        for train_id, edges in self.train_edges.items():
+            manager._train_edges[train_id] = set(edges)
+
+        if self.physics is not None:
+            manager.physics.restore(self.physics)
+
+        manager.active_trains[:] = self.active_trains
+        for train, state in self.trains:
+            train.__dict__.clear()
+            train.__dict__.update(state)
+            train.arrival_logs = dict(state['arrival_logs'])
+            train.rng = random.Random()
+            train.rng.setstate(state['rng'])
+            train._invalidate_perception()
+
+        if manager.scheduler is not None:
+            manager.scheduler.clear()
+            for train in manager.active_trains:
+                manager.scheduler.add(train)
+
+        manager.events.rewind(self.events_mark)
+        manager.trip_log.rewind(self.trips_mark)
+
+        manager._next_train_id = self.next_train_id
+        manager.rng.setstate(self.rng_state)
+        if self.brain_rng_state is not None and manager._brain is not None:
+            manager._brain.py_rng.setstate(self.brain_rng_state)
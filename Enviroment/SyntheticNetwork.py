@@ -0,0 +1,145 @@
+import math
+import numpy as np
+
+from Enviroment.Edge import Edge
+
+
+class SyntheticNetwork:
+    """
+    Xarxa ferroviària sintètica, per mesurar com escala el simulador amb xarxes més grans que la R1.
+    Es passa al TrafficManager en lloc de la xarxa real: TrafficManager(network=SyntheticNetwork.generate(...)).
+
+    Forma de la xarxa (vegeu generate):
+    - Un tronc comú d'estacions en cadena, des de l'estació S00000.
+    - Cada línia fa un tros del tronc (des de l'inici fins a la seva estació d'enllaç) i continua
+      per un ramal propi. Les estacions d'enllaç es reparteixen pel tronc, de manera que els primers
+      trams els comparteixen totes les línies i els últims, només algunes.
+    - Cada línia pot tenir branques que surten d'una estació del seu ramal (línies L1_B1, L1_B2...).
+
+    Les dades tenen la mateixa forma que la xarxa real:
+    - stations, connections: com el resultat de TrafficManager._compile_network.
+    - lines: {nom: [estacions]}, amb la tornada de cada línia a nom + '_SUD'.
+    - segment_times: {(estació_a, estació_b): minuts}, com Datas.R1_SEGMENT_TIMES (vegeu
+      TrafficManager.travel_time i calculate_schedule).
+
+    Les posicions són en píxels amb l'escala d'Edge.PIXELS_TO_KM, perquè la longitud de cada via
+    sigui la del tram generat.
+    """
+
+    # Temps oficial d'un tram: com Edge.expected_minutes, a 90 km/h amb un 60% de marge
+    REFERENCE_SPEED_KMH = 90.0
+    SCHEDULE_MARGIN = 1.60
+
+    KM_PER_DEGREE = 111.0
+
+    def __init__(self, stations, connections, lines, segment_times):
+        self.stations = stations
+        self.connections = connections
+        self.lines = lines
+        self.segment_times = segment_times
+
+    def __repr__(self):
+        return (f"SyntheticNetwork({len(self.stations)} estacions, {len(self.connections)} trams, "
+                f"{len(self.lines) // 2} línies)")
+
+    def compiled(self):
+        """Xarxa en el format de TrafficManager._build_network."""
+        return {'stations': self.stations, 'connections': self.connections}
+
+    @classmethod
+    def generate(cls, n_stations=100, n_lines=4, branches=0, trunk_stations=None,
+                 segment_km=(2.0, 5.0), seed=None):
+        """
+        Genera una xarxa aleatòria (el mateix seed dona la mateixa xarxa).
+
+        :param n_stations: Nombre total d'estacions.
+        :param n_lines: Nombre de línies (sense comptar les branques).
+        :param branches: Branques de cada línia.
+        :param trunk_stations: Estacions del tronc comú (per defecte, una part igual a la de cada ramal).
+        :param segment_km: (mínim, màxim) de la longitud de cada tram en km, uniforme.
+        :param seed: Llavor del generador.
+        """
+        n_arms = n_lines * (1 + branches)
+        if trunk_stations is None:
+            trunk_stations = max(2, n_stations // (n_arms + 1))
+        if n_lines < 1 or trunk_stations < 2 or n_stations < trunk_stations + n_arms:
+            raise ValueError(f"No es pot fer una xarxa de {n_stations} estacions amb un tronc de "
+                             f"{trunk_stations} i {n_arms} ramals (cal almenys una estació per ramal)")
+
+        builder = _Builder(np.random.default_rng(seed), segment_km, cls)
+
+        trunk = [builder.station(0.0, 0.0)]
+        heading = 0.0
+        for _ in range(trunk_stations - 1):
+            heading += builder.rng.normal(0.0, 0.2)
+            trunk.append(builder.extend(trunk[-1], heading))
+
+        # Estacions que queden, repartides entre els ramals de les línies i de les branques
+        remaining = n_stations - trunk_stations
+        arm_sizes = [remaining // n_arms + (1 if k < remaining % n_arms else 0) for k in range(n_arms)]
+
+        lines = {}
+        for i in range(n_lines):
+            junction = max(1, round((i + 1) * (trunk_stations - 1) / n_lines))
+            side = 1.0 if i % 2 == 0 else -1.0
+            arm = builder.arm(trunk[junction], heading + side * builder.rng.uniform(0.4, 1.2), arm_sizes.pop())
+            route = trunk[:junction + 1] + arm
+            cls._add_line(lines, f"L{i + 1}", route)
+
+            for b in range(branches):
+                fork = int(builder.rng.integers(0, len(arm)))
+                branch = builder.arm(arm[fork], heading - side * builder.rng.uniform(0.4, 1.2), arm_sizes.pop())
+                cls._add_line(lines, f"L{i + 1}_B{b + 1}", trunk[:junction + 1] + arm[:fork + 1] + branch)
+
+        return cls(builder.stations, builder.connections, lines, builder.segment_times)
+
+    @staticmethod
+    def _add_line(lines, name, route):
+        lines[name] = route
+        lines[f"{name}_SUD"] = route[::-1]
+
+
+class _Builder:
+    """Estat de SyntheticNetwork.generate mentre es col·loquen les estacions."""
+
+    def __init__(self, rng, segment_km, network_cls):
+        self.rng = rng
+        self.segment_km = segment_km
+        self.cls = network_cls
+        self.stations = []
+        self.connections = []
+        self.segment_times = {}
+        self._positions = {}  # nom -> (x_km, y_km)
+
+    def station(self, x_km, y_km):
+        name = f"S{len(self.stations):05d}"
+        self._positions[name] = (x_km, y_km)
+        self.stations.append({
+            'id': str(len(self.stations)),
+            'norm': name,
+            'orig': name,
+            'lat': y_km / self.cls.KM_PER_DEGREE,
+            'lon': x_km / self.cls.KM_PER_DEGREE,
+            'x': x_km / Edge.PIXELS_TO_KM,
+            'y': -y_km / Edge.PIXELS_TO_KM,
+        })
+        return name
+
+    def extend(self, previous, heading):
+        """Nova estació a continuació de `previous`, a una distància aleatòria en la direcció heading."""
+        length = self.rng.uniform(*self.segment_km)
+        x, y = self._positions[previous]
+        name = self.station(x + length * math.cos(heading), y + length * math.sin(heading))
+        self.connections.append((previous, name))
+        self.segment_times[(previous, name)] = length / self.cls.REFERENCE_SPEED_KMH * 60.0 * self.cls.SCHEDULE_MARGIN
+        return name
+
+    def arm(self, start, heading, size):
+        """Ramal de `size` estacions que surt de l'estació start."""
+        arm = []
+        previous = start
+        for _ in range(size):
+            heading += self.rng.normal(0.0, 0.2)
+            previous = self.extend(previous, heading)
+            arm.append(previous)
+        return arm
@@ -1,16 +1,31 @@
-import pandas as pd
+import bisect
+import heapq
 import math
 import random
 import unicodedata
 import re
 from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+import numpy as np
 
 # Imports del projecte
 from Agent.QlearningAgent import QLearningAgent
 from Enviroment.Datas import Datas
+from Enviroment.DecisionBatch import DecisionBatch
 from Enviroment.Node import Node
 from Enviroment.Edge import Edge
+from Enviroment.EdgeOccupancy import EdgeOccupancy
 from Enviroment.EdgeType import EdgeType
+from Enviroment.EventLog import EventLog
+from Enviroment.TripLog import TripLog
+from Enviroment.NetworkCache import NetworkCache
+from Enviroment.NetworkGraph import NetworkGraph
+from Enviroment.RouteTemplate import RouteTemplate
+from Enviroment.Scenario import Scenario
+from Enviroment.Snapshot import SimulationSnapshot
+from Enviroment.TrainPhysics import TrainPhysics
+from Enviroment.WakeScheduler import WakeScheduler
 
 # Valors per defecte
 #DEFAULT_AGENT_PARAMS = [0.7, 0.99, 0.99]
@@ -18,32 +33,72 @@ DEFAULT_AGENT_PARAMS = [0.5, 0.99, 0.01]
 
 class TrafficManager:
     """
-    Classe central del Model (MVC). Actua com a 'Singleton' de facto.
+    Classe central del Model (MVC). Cada instància és un món independent:
+    l'ocupació de les vies, els segments i els obstacles viuen a la instància,
+    de manera que es poden tenir diverses simulacions dins del mateix procés.
     """
     
-    # Estat compartit
-    _reported_obstacles = {}
-    _train_positions = {}
-    _physical_segments = {}
-    
     # Configuració
     SPAWN_INTERVAL = 30    
     #cada 2 hores rotació de vies en obstacle
     RESET_INTERVAL = 120   
     CHAOS_INTERVAL = 120    
 
-    def __init__(self, width=1400, height=900, is_training=False):
+    # Fluxos aleatoris derivats de la llavor del món (vegeu _stream)
+    STREAM_MECHANICS = 0
+    STREAM_AGENT = 1
+    STREAM_TRAINS = 2
+
+    # Dades de la xarxa
+    NETWORK_CSV = 'Enviroment/data/estaciones_coordenadas.csv'
+
+    def __init__(self, width=1400, height=900, is_training=False, batched=False, vectorized=False,
+                 event_driven=False, fast_forward=False, network_cache=True, seed=None,
+                 event_log_capacity=65536, event_log_path=None, network=None,
+                 trip_log_path=None, trip_log_compress=False):
         self.is_training = is_training
 
+        # Llavor del món (enter, SeedSequence o None): el caos, l'agent per defecte i cada tren
+        # tenen el seu propi generador derivat d'aquesta llavor, mai el random global
+        self.seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = random.Random(self._stream_seed(self.STREAM_MECHANICS))
+        self._next_train_id = 1
+
+        # Mode per lots: les decisions del tick s'agrupen en crides a action_batch (vegeu DecisionBatch)
+        # Mode vectoritzat: a més, la física de tots els trens es calcula amb NumPy (TrainPhysics)
+        self.batched = batched or vectorized
+        # Topologia de la xarxa (estacions i vies indexades per enters), vegeu NetworkGraph
+        self.graph = NetworkGraph()
+        self.physics = TrainPhysics(self.graph.edges) if vectorized else None
+        # Mode per esdeveniments: els trens aturats o bloquejats dormen fins que cal despertar-los
+        # Avanç ràpid: a més, els trens en creuer per via lliure només avancen (implica event_driven)
+        self.scheduler = WakeScheduler(self, fast_forward) if (event_driven or fast_forward) else None
+
         #Esta hardcoded, es podria calcular segons la mida de la pantalla
         self.width = width
         self.height = height
 
-        self.nodes = {}
-        self.all_edges = []
+        # Registre binari d'esdeveniments (spawn, sortides, arribades, ATP, avaries...), vegeu EventLog.
+        # Amb event_log_path es va buidant a aquest fitxer en lloc de perdre els més antics
+        self.events = EventLog(event_log_capacity, event_log_path)
+        # Pas per estació de cada tren acabat, en columnes (vegeu TripLog). Amb trip_log_path
+        # s'escriu a disc per blocs; sense, només es guarden les files més recents
+        self.trip_log = TripLog(trip_log_path, compress=trip_log_compress)
+
+        # Xarxa compilada a disc per no parsejar el CSV a cada arrencada (vegeu NetworkCache)
+        self.network_cache = NetworkCache() if network_cache else None
+
+        # Estat del món (propi de cada instància)
+        self._reported_obstacles = {}
+        self._train_positions = {}  # Edge -> EdgeOccupancy
+        self._train_edges = defaultdict(set)  # train_id -> {Edge} (índex invers)
+
+        self.nodes = {}  # nom normalitzat -> Node
         self.lines = {}
+        self.segment_times = Datas.SEGMENT_TIMES  # (estació_a, estació_b) -> minuts oficials
+        self._route_templates = {}  # nom de línia -> RouteTemplate
         self.active_trains = []
-        self.completed_train_logs = []
+        self.day = 0  # Dies començats amb reset_day (columna day de trip_log)
 
         self.sim_time = 0.0
         self.last_spawn = -999 
@@ -51,56 +106,264 @@ class TrafficManager:
         self.last_chaos = 0
         
         self.current_spawn_line = 'R1_NORD' 
+        # Línies on surt un tren a cada spawn; None = les per defecte de cada mode
+        self.spawn_lines = None
+
+        # Horari real (vegeu load_timetable): llista de (hora_sortida, RouteTemplate, track) ordenada.
+        # None = un tren per línia cada SPAWN_INTERVAL
+        self.timetable = None
+        self._timetable_pos = 0
+        self._timetable_waiting = []  # sortides que ja toquen però no han pogut sortir (via ocupada)
+
+        # Escenari d'incidències reproduïble (vegeu load_scenario); None = caos aleatori
+        self.scenario = None
+        self._scenario_pos = 0
+        self._disruptions = []        # heap de (hora_final, ordre, [Edge])
+        self._disruption_counts = {}  # Edge -> incidències actives que la afecten
+
+        # Cervell: el per defecte es carrega la primera vegada que es fa servir (vegeu brain),
+        # així qui el substitueix de seguida (p. ex. l'entrenament) no desserialitza la taula dues vegades
+        self._brain = None
 
-        # Cervell
-        self.brain = QLearningAgent(
+        # Xarxa real (R1) o una xarxa donada, p. ex. sintètica (vegeu SyntheticNetwork)
+        if network is None:
+            self._load_network()
+        else:
+            self._use_network(network)
+
+        if self.scheduler is not None:
+            for node in self.nodes.values():
+                node.on_exit = self.scheduler.station_freed
+
+
+    @property
+    def all_edges(self):
+        """Totes les vies, en ordre d'Edge.id."""
+        return self.graph.edges
+
+    @property
+    def brain(self):
+        if self._brain is None:
+            self._brain = self._load_default_brain()
+        return self._brain
+
+    @brain.setter
+    def brain(self, agent):
+        self._brain = agent
+
+    def _load_default_brain(self):
+        brain = QLearningAgent(
             alpha=DEFAULT_AGENT_PARAMS[0], 
             gamma=DEFAULT_AGENT_PARAMS[1], 
-            epsilon=DEFAULT_AGENT_PARAMS[2]
+            epsilon=DEFAULT_AGENT_PARAMS[2],
+            seed=self._stream(self.STREAM_AGENT)
         )
         try:
-            self.brain.load_table("Agent/Qtables/q_table.pkl")
+            brain.load_table("Agent/Qtables/q_table.pkl")
             if not self.is_training:
                 print("(TrafficManager) Cervell (Q-Table) carregat correctament.")
         except Exception:
             print("(TrafficManager) No s'ha trobat taula prèvia. Iniciant des de zero.")
+        return brain
+
+    def _stream(self, *key):
+        """SeedSequence del flux `key` d'aquest món. Sempre la mateixa per a la mateixa llavor i clau."""
+        return np.random.SeedSequence(self.seed_seq.entropy, spawn_key=self.seed_seq.spawn_key + key)
+
+    def _stream_seed(self, *key):
+        return int(self._stream(*key).generate_state(1, np.uint64)[0])
 
-        self._load_network()
+    def next_train_id(self):
+        """Identificador del pròxim tren: un comptador per món (reproduïble, sense col·lisions)."""
+        train_id = self._next_train_id
+        self._next_train_id += 1
+        return train_id
 
+    def train_rng(self, train_id):
+        """Generador propi d'un tren, derivat de la llavor del món i del seu identificador."""
+        return random.Random(self._stream_seed(self.STREAM_TRAINS, train_id))
 
     #Bucle principal
     def update(self, dt_minutes):
+        self.begin_tick(dt_minutes)
+
+        # Update trens actius
+        if self.batched:
+            self._update_trains_batched(dt_minutes)
+            return
+
+        for t in self._trains_to_visit():
+            if self.scheduler is not None and self.scheduler.cruise(t, dt_minutes):
+                continue
+            t.update(dt_minutes)
+            
+            # Si acaba el tren, eliminem-lo
+            self._after_update(t)
+
+    def next_event_time(self, dt_minutes):
+        """
+        Hora del pròxim tick (amb passos de dt_minutes) en què la simulació farà alguna cosa.
+        Amb trens actius és el tick següent; sense trens, el primer en què toca spawn,
+        manteniment o caos.
+        """
+        t = self.sim_time + dt_minutes
+        if not self.active_trains:
+            while not self._event_due(t):
+                t += dt_minutes
+        return t
+
+    def skip_idle_ticks(self, dt_minutes, max_ticks=None, end_time=None):
+        """
+        Salta els ticks en què no hi ha cap tren i no toca cap esdeveniment (com a molt max_ticks,
+        i sense passar d'end_time): només avança el rellotge, igual que ho faria update.
+        Retorna quants ticks ha saltat.
+        """
+        skipped = 0
+        while not self.active_trains:
+            if max_ticks is not None and skipped >= max_ticks: break
+            if end_time is not None and self.sim_time >= end_time: break
+            t = self.sim_time + dt_minutes
+            if self._event_due(t):
+                break
+            self.sim_time = t
+            skipped += 1
+        if skipped and self.scheduler is not None:
+            self.scheduler.tick += skipped
+        return skipped
+
+    def advance_until(self, end_time, dt_minutes):
+        """Avança amb passos de dt_minutes fins a end_time, saltant els períodes buits. Mateix resultat que cridar update."""
+        while self.sim_time < end_time:
+            self.skip_idle_ticks(dt_minutes, end_time=end_time)
+            if self.sim_time < end_time:
+                self.update(dt_minutes)
+
+    def _event_due(self, t):
+        """Si un tick que deixa el rellotge a t dispara spawn, manteniment o caos (les mateixes condicions que update)."""
+        if self.scenario is not None:
+            return self._spawn_due(t) or self._scenario_due(t)
+        return (self._spawn_due(t)
+                or t - self.last_reset > self.RESET_INTERVAL
+                or (not self.is_training and t - self.last_chaos > self.CHAOS_INTERVAL))
+
+    def _spawn_due(self, t):
+        """Si a l'hora t toca fer sortir algun tren (per horari o per SPAWN_INTERVAL)."""
+        if self.timetable is not None:
+            return (bool(self._timetable_waiting)
+                    or (self._timetable_pos < len(self.timetable) and self.timetable[self._timetable_pos][0] <= t))
+        return t - self.last_spawn > self.SPAWN_INTERVAL
+
+    def begin_tick(self, dt_minutes):
+        """Primera part del tick, abans de moure els trens: rellotge, manteniment, caos i spawn."""
+        if self.scheduler is not None:
+            self.scheduler.begin_tick(dt_minutes, self.active_trains)
         self.sim_time += dt_minutes
         self._handle_mechanics()
 
         # SPAWN
-        if self.sim_time - self.last_spawn > self.SPAWN_INTERVAL:
+        if self.timetable is not None:
+            self._spawn_timetable()
+        elif self.sim_time - self.last_spawn > self.SPAWN_INTERVAL:
             self.last_spawn = self.sim_time
 
             # Decidim línia segons mode         
-            if self.is_training:
-                line_anada = self.current_spawn_line
-                line_tornada = f"{self.current_spawn_line}_SUD"
+            if self.spawn_lines is not None:
+                spawn_lines = self.spawn_lines
+            elif self.is_training:
+                spawn_lines = (self.current_spawn_line, f"{self.current_spawn_line}_SUD")
             else:
-                line_anada = 'R1_NORD'
-                line_tornada = 'R1_SUD'
+                spawn_lines = [f"{line}{direction}" for line in Datas.LINES for direction in ('_NORD', '_SUD')]
 
-            # Spawn trens
-            self.spawn_line_train(line_anada)
-            if line_tornada in self.lines:
-                self.spawn_line_train(line_tornada)
+            # Spawn trens (les línies que no existeixen no en fan)
+            for line_name in spawn_lines:
+                self.spawn_line_train(line_name)
 
-        # Update trens actius
-        for t in self.active_trains[:]:
-            t.update(dt_minutes)
-            
-            # Si acaba el tren, eliminem-lo
+    def _trains_to_visit(self):
+        """Trens a actualitzar aquest tick (tots, o només els desperts en mode per esdeveniments)."""
+        if self.scheduler is not None:
+            return self.scheduler.visit()
+        return self.active_trains[:]
+
+    def _retire_train(self, t):
+        self._archive_train_log(t)
+        self.remove_train(t.id) 
+        self.active_trains.remove(t)
+        if self.physics is not None:
+            t.release()
+        if self.scheduler is not None:
+            self.scheduler.forget(t)
+
+    def _update_trains_batched(self, dt_minutes):
+        """
+        Tick en mode per lots: els trens que han de decidir s'agrupen en un DecisionBatch, que
+        tria les accions amb una sola crida a action_batch i aprèn amb una sola crida a
+        update_batch. El resultat és el mateix que el del mode seqüencial.
+        VectorEnv comparteix un mateix lot entre diversos mons.
+        """
+        batch = DecisionBatch(self.brain, dt_minutes)
+        self.visit_batched(batch, dt_minutes)
+        batch.flush()
+
+    def visit_batched(self, batch, dt_minutes):
+        """
+        Visita els trens del tick en ordre, com update, però els que han de decidir s'afegeixen
+        al lot en lloc d'actuar (act_batch els fa actuar quan es buida). La resta fan el seu tick aquí.
+        """
+        for t in self._trains_to_visit():
+            if self.scheduler is not None and self.scheduler.is_cruising(t):
+                # El creuer s'acaba si algun tren del lot entra a la seva via
+                batch.flush()
+                if self.scheduler.cruise(t, dt_minutes):
+                    continue
+            if batch.blocks(t):
+                batch.flush()
+
+            state = t.perceive(dt_minutes)
+            if state is not None:
+                batch.add(self, t, state)
+                continue
             if t.finished:
-                self._archive_train_log(t)
-                self.remove_train(t.id) 
-                self.active_trains.remove(t)
+                batch.flush()
+            self._after_update(t)
+
+    def act_batch(self, pending, actions, dt_minutes):
+        """
+        Aplica les accions d'un lot (amb les ajudes d'entrenament) tren a tren i en ordre, i
+        deixa cada tren com al final del seu tick (_after_update) abans que actuï el següent.
+        Retorna les transicions (s, a, r, s2) en l'ordre dels trens.
+        """
+        actions = [t.nudge(a) for (t, _), a in zip(pending, actions)]
+
+        transitions = []
+        if self.physics is not None:
+            states = {t.id: state for t, state in pending}
+            for t, action_idx, reward, ns in self.physics.act_batch([t for t, _ in pending], actions, dt_minutes,
+                                                                     after=self._after_update):
+                transitions.append((states[t.id], action_idx, reward, ns))
+        else:
+            for (t, state), action_idx in zip(pending, actions):
+                transition = t.act(action_idx, dt_minutes)
+                if transition is not None:
+                    transitions.append((state,) + transition)
+                self._after_update(t)
+        return transitions
+
+    def _after_update(self, t):
+        """Final del tick d'un tren: si ha acabat es retira i, si no, es mira si es pot adormir o anar en creuer."""
+        if t.finished:
+            self._retire_train(t)
+        elif self.scheduler is not None:
+            self.scheduler.maybe_sleep(t)
+            self.scheduler.maybe_cruise(t)
 
     def _handle_mechanics(self):
+        # Amb escenari, les incidències i les reparacions les marca l'escenari
+        if self.scenario is not None:
+            if self.sim_time - self.last_reset > self.RESET_INTERVAL:
+                self.last_reset = self.sim_time
+            self._replay_scenario()
+            return
+
         # Manteniment (Reparació automàtica)
         if self.sim_time - self.last_reset > self.RESET_INTERVAL:
             self.last_reset = self.sim_time
@@ -115,86 +378,353 @@ class TrafficManager:
             
             if len(normals) > 0:
                 # Triem 1 segment aleatori per trencar
-                target_edge = random.choice(normals)
+                target_edge = self.rng.choice(normals)
                 
                 # Trenquem la direcció original (A -> B)
                 target_edge.edge_type = EdgeType.OBSTACLE
                 target_edge.update_properties()
-                TrafficManager.report_issue(target_edge.node1.name, target_edge.node2.name, target_edge.track_id)
+                self.report_issue(target_edge.node1.name, target_edge.node2.name, target_edge.track_id)
                 
                 # Trenquem la direcció inversa (B -> A)
-                # Busquem la via que connecta els mateixos nodes al revés amb el mateix track_id
-                inverse_edge = TrafficManager.get_edge(target_edge.node2.name, target_edge.node1.name, target_edge.track_id)
+                # La via que connecta els mateixos nodes al revés amb el mateix track_id
+                inverse_edge = target_edge.inverse_edge
                 
                 if inverse_edge:
                     inverse_edge.edge_type = EdgeType.OBSTACLE
                     inverse_edge.update_properties()
-                    TrafficManager.report_issue(inverse_edge.node1.name, inverse_edge.node2.name, inverse_edge.track_id)
-                    
-                print(f"(CAOS) Avaria a la via {target_edge.node1.name}-{target_edge.node2.name} (Via {target_edge.track_id})")
+                    self.report_issue(inverse_edge.node1.name, inverse_edge.node2.name, inverse_edge.track_id)
+
+                if self.scheduler is not None:
+                    self.scheduler.obstacles_changed()
+
+                self._log_obstacle(target_edge)
     
+    # Escenaris (vegeu Scenario)
+    def load_scenario(self, scenario):
+        """
+        Reprodueix les incidències de l'escenari (un Scenario o el camí d'un fitxer) en lloc del
+        caos aleatori i del manteniment periòdic. None torna al comportament per defecte.
+        """
+        if isinstance(scenario, str):
+            scenario = Scenario.load(scenario)
+        self.scenario = scenario
+        self.reset_network_status()
+
+    def generate_scenario(self, horizon, seed=None, **kwargs):
+        """
+        Escenari aleatori sobre les vies d'aquesta xarxa, amb els intervals del manager per defecte
+        (una avaria cada CHAOS_INTERVAL que dura RESET_INTERVAL). Vegeu Scenario.generate.
+        """
+        kwargs.setdefault('interval', self.CHAOS_INTERVAL)
+        kwargs.setdefault('duration', (self.RESET_INTERVAL, self.RESET_INTERVAL))
+        return Scenario.generate(self._physical_tracks(), horizon, seed=seed, **kwargs)
+
+    def _physical_tracks(self):
+        """Una entrada (u_name, v_name, track_id) per via física (cada Edge i la seva inversa compten un cop)."""
+        segments, seen = [], set()
+        for e in self.all_edges:
+            if e in seen: continue
+            seen.add(e)
+            if e.inverse_edge is not None:
+                seen.add(e.inverse_edge)
+            segments.append((e.node1.name, e.node2.name, e.track_id))
+        return segments
+
+    def _replay_scenario(self):
+        """Repara les vies de les incidències acabades i aplica les que comencen (les dues direccions)."""
+        changed = False
+
+        while self._disruptions and self._disruptions[0][0] <= self.sim_time:
+            _, _, edges = heapq.heappop(self._disruptions)
+            for e in edges:
+                self._disruption_counts[e] -= 1
+                if self._disruption_counts[e] > 0: continue
+                del self._disruption_counts[e]
+                e.edge_type = EdgeType.NORMAL
+                e.restricted_speed_kmh = None
+                e.update_properties()
+                self._reported_obstacles.pop((e.node1.name, e.node2.name, e.track_id), None)
+                changed = True
+
+        events = self.scenario.events
+        while self._scenario_pos < len(events) and events[self._scenario_pos].time <= self.sim_time:
+            event = events[self._scenario_pos]
+            self._scenario_pos += 1
+
+            edge = self.get_edge(event.u_name, event.v_name, event.track_id)
+            if edge is None: continue
+            edges = [edge] if edge.inverse_edge is None else [edge, edge.inverse_edge]
+            for e in edges:
+                e.edge_type = EdgeType.OBSTACLE
+                e.restricted_speed_kmh = event.speed_kmh
+                e.update_properties()
+                self.report_issue(e.node1.name, e.node2.name, e.track_id)
+                self._disruption_counts[e] = self._disruption_counts.get(e, 0) + 1
+            heapq.heappush(self._disruptions, (event.time + event.duration, self._scenario_pos, edges))
+            self._log_obstacle(edge)
+            changed = True
+
+        if changed and self.scheduler is not None:
+            self.scheduler.obstacles_changed()
+
+    def _log_obstacle(self, edge):
+        self.events.record(EventLog.OBSTACLE, self.sim_time, -1, edge.node1.name, edge.node2.name,
+                           edge.track_id, edge.max_speed_kmh)
+
+    def _scenario_due(self, t):
+        """Si a l'hora t comença o s'acaba alguna incidència de l'escenari."""
+        events = self.scenario.events
+        return ((self._scenario_pos < len(events) and events[self._scenario_pos].time <= t)
+                or (bool(self._disruptions) and self._disruptions[0][0] <= t))
+
+    # Snapshots (vegeu SimulationSnapshot)
+    def snapshot(self):
+        """Fotografia de l'estat mutable de la simulació, per restaurar-la després."""
+        return SimulationSnapshot(self)
+
+    def restore(self, snapshot):
+        snapshot.restore(self)
+
+    @contextmanager
+    def branch(self, snapshot=None, learn=False):
+        """
+        Branca de prova: dins del with es pot aplicar una decisió (retenir un tren, canviar
+        de via) i avançar la simulació; en sortir, tot torna a l'estat del snapshot (per
+        defecte, el del moment d'entrar). Sense learn, l'agent no aprèn de la branca.
+
+            snap = manager.snapshot()
+            for candidate in candidates:
+                with manager.branch(snap):
+                    apply(candidate)
+                    for _ in range(5): manager.update(2.0)
+                    score[candidate] = evaluate(manager)
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        else:
+            snapshot.restore(self)
+
+        brain = self.brain
+        was_frozen = brain.frozen
+        brain.frozen = was_frozen or not learn
+        try:
+            yield self
+        finally:
+            brain.frozen = was_frozen
+            snapshot.restore(self)
+
+    def reset_day(self):
+        """Reset diari de l'entrenament: sense trens, rellotge a zero i vies reparades."""
+        self.active_trains.clear()
+        self.day += 1
+
+        self.clear_train_positions()
+        
+        self.sim_time = 0.0
+        self.last_spawn = -self.SPAWN_INTERVAL
+        self._timetable_pos = 0
+        self._timetable_waiting = []
+        self.reset_network_status()
+
     # Reset cada 2 hores
     def reset_network_status(self):
         for e in self.all_edges: 
             e.edge_type = EdgeType.NORMAL
+            e.restricted_speed_kmh = None
             e.update_properties()
-        TrafficManager._reported_obstacles.clear()
+        self._reported_obstacles.clear()
+        # L'escenari torna a començar (reset diari): sense incidències actives
+        self._scenario_pos = 0
+        self._disruptions = []
+        self._disruption_counts = {}
+        if self.scheduler is not None:
+            self.scheduler.obstacles_changed()
 
 
     def spawn_line_train(self, line_name):
-        from Enviroment.Train import Train 
-
-        if line_name not in self.lines: return
-        
-        station_names_raw = self.lines[line_name]
-        route_nodes = []
-        for name_raw in station_names_raw:
-            name_norm = self._normalize_name(name_raw)
-            if name_norm in self.nodes:
-                route_nodes.append(self.nodes[name_norm])
+        """Fa sortir ara un tren de la línia. Retorna el tren, o None si no ha pogut sortir."""
+        template = self.route_template(line_name)
+        if template is None: return None
         
         starting_track = 1 if "SUD" in line_name else 0
+        return self._spawn_route(template, starting_track, self.sim_time)
+
+    def _spawn_route(self, template, starting_track, departure_time):
+        """
+        Fa sortir un tren per la ruta de template, amb l'horari d'una sortida a departure_time.
+        Retorna el tren, o None si la via de sortida no és segura ara mateix.
+        """
+        from Enviroment.Train import Train 
+        from Enviroment.TrainView import TrainView
+
+        route_nodes = template.route_nodes
 
         if len(route_nodes) > 1:
             # Evitem fer spawn si la via de sortida està ocupada per prevenir xocs immediats.
-            start_node_name = route_nodes[0].name
-            next_node_name = route_nodes[1].name
-            
-            start_edge = TrafficManager.get_edge(start_node_name, next_node_name, starting_track)
+            start_edge = template.first_edges.get(starting_track)
             
             if start_edge:
                 # Comprovem congestió al davant
-                trains_on_edge = TrafficManager._train_positions.get(start_edge, [])
+                trains_on_edge = self._train_positions.get(start_edge)
                 if trains_on_edge:
-                    # La llista està ordenada per progrés (més avançat primer). 
-                    # L'últim és el que acaba d'entrar (progrés proper a 0).
-                    _, last_progress = trains_on_edge[-1]
+                    # L'ocupació està ordenada per progrés (més avançat primer). 
+                    # La cua és el que acaba d'entrar (progrés proper a 0).
+                    _, last_progress = trains_on_edge.tail()
                     
                     # Si l'últim tren està a menys del 5% del tram, no sortim encara.
                     if last_progress < 0.05:
-                        return 
+                        return None
 
                 # 2. Comprovem col·lisió frontal
-                dist_threat = TrafficManager.check_head_on_collision(start_edge, 0.0)
+                dist_threat = self.check_head_on_collision(start_edge, 0.0)
                 if dist_threat < 3.0: # Si ve un tren de cara a menys de 3km
                     # No fem spawn per evitar col·lisió immediata
-                    return
+                    return None
 
-            schedule = self.calculate_schedule(route_nodes, self.sim_time)
+            schedule = template.schedule(departure_time)
             
-            new_train = Train(
+            # Amb el motor vectoritzat el tren és una vista sobre una fila de TrainPhysics
+            train_class = Train if self.physics is None else partial(TrainView, self.physics)
+            new_train = train_class(
                 agent=self.brain, 
                 route_nodes=route_nodes, 
                 schedule=schedule, 
                 start_time_sim=self.sim_time, 
                 is_training=self.is_training,
-                prefered_track=starting_track
+                prefered_track=starting_track,
+                manager=self
             )
             
             self.active_trains.append(new_train)
-            if not self.is_training:
-                # Print per debug
-                print(f"(Spawn) Tren {new_train.id} sortint de {route_nodes[0].name} (Via {starting_track})")
+            if self.scheduler is not None:
+                self.scheduler.add(new_train)
+            new_train.log_event(EventLog.SPAWN)
+            return new_train
+        return None
+
+    # Horaris reals (vegeu GtfsTimetable)
+    def load_timetable(self, timetable, route_ids=None, service_ids=None, stop_names=None):
+        """
+        Fa sortir els trens segons un horari GTFS en lloc d'un per línia cada SPAWN_INTERVAL.
+        None torna al comportament per defecte.
+
+        Cada viatge es converteix en una ruta per la xarxa: les parades que són estacions de la xarxa,
+        unides pel camí més curt del graf (les estacions on el viatge no para també formen part de la
+        ruta, però no tenen hora). L'horari del tren és el del GTFS, encara que surti tard. Els temps
+        de recorregut del GTFS passen a segment_times.
+
+        :param timetable: GtfsTimetable o el camí d'un zip GTFS.
+        :param route_ids, service_ids: Filtre de viatges (vegeu GtfsTimetable.trips).
+        :param stop_names: {stop_id: nom d'estació} per a les parades amb un nom diferent al de la xarxa.
+        :return: Nombre de viatges carregats.
+        """
+        self._timetable_pos = 0
+        self._timetable_waiting = []
+        if timetable is None:
+            self.timetable = None
+            return 0
+        if isinstance(timetable, str):
+            from Enviroment.GtfsTimetable import GtfsTimetable
+            timetable = GtfsTimetable.load(timetable)
+
+        node_map = timetable.node_map(self.nodes, self._normalize_name, stop_names)
+        self.segment_times = {**self.segment_times, **timetable.segment_times_by_name(node_map)}
+
+        departures = []
+        for trip in timetable.trips(route_ids, service_ids):
+            compiled = self._compile_trip(timetable, trip, node_map)
+            if compiled is not None:
+                departures.append(compiled)
+        departures.sort(key=lambda d: d[0])
+        self.timetable = departures
+
+        # Les sortides anteriors a l'hora actual ja no es fan
+        self._timetable_pos = bisect.bisect_left([d[0] for d in departures], self.sim_time)
+        if self.scheduler is not None:
+            self.scheduler.obstacles_changed()
+        print(f"(TrafficManager) Horari carregat: {len(departures)} de {len(timetable)} viatges dins de la xarxa.")
+        return len(departures)
+
+    def _compile_trip(self, timetable, trip, node_map):
+        """(hora_sortida, RouteTemplate, track) d'un viatge, o None si no té dues parades unides a la xarxa."""
+        stops, arrivals, departures = timetable.trip_stops(trip)
+        timed = [(node_map[s], a, d) for s, a, d in zip(stops.tolist(), arrivals.tolist(), departures.tolist())
+                 if s in node_map and not math.isnan(d)]
+        if len(timed) < 2:
+            return None
+
+        route_nodes = [timed[0][0]]
+        for node, _, _ in timed[1:]:
+            if node is route_nodes[-1]: continue
+            path = self.graph.shortest_path(route_nodes[-1].index, node.index)
+            if path is None:
+                return None
+            route_nodes.extend(self.graph.nodes[i] for i in path[1:])
+        if len(route_nodes) < 2:
+            return None
+
+        # Hora prevista a cada parada (la sortida a l'origen), relativa a la sortida
+        start = timed[0][2]
+        offsets = {timed[0][0].id: 0.0}
+        for node, arrival, _ in timed[1:]:
+            offsets.setdefault(node.id, arrival - start)
+
+        first_edges = {track_id: self.edge_between(route_nodes[0], route_nodes[1], track_id) for track_id in (0, 1)}
+        template = RouteTemplate(None, route_nodes, list(offsets.values()), first_edges, node_ids=list(offsets))
+        return start, template, int(timetable.trip_direction[trip])
+
+    def _spawn_timetable(self):
+        """Fa sortir els trens de l'horari que ja toquen; els que no poden sortir ho tornen a provar el tick següent."""
+        departures = self.timetable
+        while self._timetable_pos < len(departures) and departures[self._timetable_pos][0] <= self.sim_time:
+            self._timetable_waiting.append(departures[self._timetable_pos])
+            self._timetable_pos += 1
+        if self._timetable_waiting:
+            self._timetable_waiting = [
+                d for d in self._timetable_waiting
+                if self._spawn_route(d[1], d[2], d[0]) is None
+            ]
+
+    def route_template(self, line_name):
+        """
+        Ruta precompilada de la línia (vegeu RouteTemplate), o None si la línia no existeix.
+        Es refà si manager.lines[line_name] o manager.segment_times s'han reassignat (p. ex. el
+        curriculum o un horari GTFS).
+        """
+        stations = self.lines.get(line_name)
+        if stations is None:
+            self._route_templates.pop(line_name, None)
+            return None
+
+        template = self._route_templates.get(line_name)
+        if template is None or template.is_stale(stations, self.segment_times):
+            template = self._route_templates[line_name] = self._compile_route(stations)
+        return template
+
+    def _compile_route(self, stations):
+        route_nodes = []
+        for name_raw in stations:
+            name_norm = self._normalize_name(name_raw)
+            if name_norm in self.nodes:
+                route_nodes.append(self.nodes[name_norm])
+
+        # Mateixes sumes que calculate_schedule, però des de 0: l'horari és l'hora de sortida més l'offset
+        schedule = self.calculate_schedule(route_nodes, 0.0)
+        offsets = [schedule[n.id] for n in route_nodes]
+
+        first_edges = {}
+        if len(route_nodes) > 1:
+            for track_id in (0, 1):
+                first_edges[track_id] = self.edge_between(route_nodes[0], route_nodes[1], track_id)
+        return RouteTemplate(stations, route_nodes, offsets, first_edges, segment_times=self.segment_times)
+
+    def travel_time(self, station_a, station_b):
+        """Temps oficial del tram en minuts, en qualsevol sentit (4 si no el tenim), com Datas.get_travel_time."""
+        t = self.segment_times.get((station_a, station_b))
+        if t is not None: return t
+        t = self.segment_times.get((station_b, station_a))
+        if t is not None: return t
+        return 4.0
 
     def calculate_schedule(self, route_nodes, start_time):
         """
@@ -213,7 +743,7 @@ class TrafficManager:
             v_name = route_nodes[i+1].name
             
             # Obtenim el temps real de l'horari
-            official_travel_time = Datas.get_travel_time(u_name, v_name)
+            official_travel_time = self.travel_time(u_name, v_name)
             
             # Afegim l'aturada tècnica (els horaris ja solen incloure part d'això,
             # però per la IA li donem el temps de viatge + parada)
@@ -225,30 +755,70 @@ class TrafficManager:
         return schedule
     
     def _archive_train_log(self, train):
-        log_entry = {
-            'id': train.id,
-            'schedule': train.schedule.copy(),
-            'actuals': train.arrival_logs.copy(),
-            'route_map': {n.id: n.name for n in train.route_nodes}
-        }
-        self.completed_train_logs.append(log_entry)
+        self.trip_log.record_train(train, self.day)
 
     #Carregar de dades externes
     def _load_network(self):
         print("(TrafficManager) Carregant xarxa ferroviària...")
+
+        # Xarxa compilada (vegeu NetworkCache): si el CSV, les connexions i la mida no han canviat,
+        # no cal tornar a parsejar el CSV
+        key = None
+        compiled = None
+        if self.network_cache is not None:
+            try:
+                key = self.network_cache.key(self.NETWORK_CSV, Datas.network_connections(), self.width, self.height)
+                compiled = self.network_cache.load(key)
+            except OSError as e:
+                print(f"Error: no es pot llegir {self.NETWORK_CSV}: {e}")
+                return
+
+        if compiled is None:
+            compiled = self._compile_network()
+            if compiled is None: return
+            if key is not None:
+                self.network_cache.save(key, compiled)
+
+        self._build_network(compiled)
+
+        # Cada línia en els dos sentits; les estacions i els trams compartits són els mateixos nodes i vies
+        for line, stations in Datas.LINES.items():
+            self.lines[f"{line}_NORD"] = stations
+            self.lines[f"{line}_SUD"] = stations[::-1]
         
+        print(f"(TrafficManager) Xarxa construïda: {len(self.nodes)} estacions, {len(self.all_edges)} vies.")
+
+    def _use_network(self, network):
+        """Construeix el món sobre una xarxa donada (p. ex. SyntheticNetwork) en lloc de la R1 del CSV."""
+        self._build_network(network.compiled())
+        self.lines.update(network.lines)
+        self.segment_times = network.segment_times
+        self.spawn_lines = list(network.lines)
+        self.current_spawn_line = next(iter(network.lines), None)
+
+        print(f"(TrafficManager) Xarxa construïda: {len(self.nodes)} estacions, {len(self.all_edges)} vies.")
+
+    def _compile_network(self):
+        """
+        Llegeix el CSV d'estacions i resol la xarxa: estacions (nom normalitzat, coordenades
+        i posició a pantalla) i connexions entre noms normalitzats. Retorna None si falla.
+        """
+        network_connections = Datas.network_connections()
         wanted_stations = set()
-        for s1, s2 in Datas.R1_CONNECTIONS:
+        for s1, s2 in network_connections:
             wanted_stations.add(self._normalize_name(s1))
             wanted_stations.add(self._normalize_name(s2))
 
-        csv_path = 'Enviroment/data/estaciones_coordenadas.csv'
+        # pandas només cal per parsejar el CSV, no quan la xarxa ve de la NetworkCache
+        import pandas as pd
+
+        csv_path = self.NETWORK_CSV
         try:
             df = pd.read_csv(csv_path, sep=';', encoding='latin1', skipinitialspace=True)
             df.columns = [c.strip().upper() for c in df.columns]
         except Exception as e:
             print(f"Error: no es pot llegir {csv_path}: {e}")
-            return
+            return None
 
         lats, lons, temp_st = [], [], []
         for _, row in df.iterrows():
@@ -272,7 +842,7 @@ class TrafficManager:
 
         if not lats: 
             print("Error: No s'han trobat estacions vàlides.")
-            return
+            return None
 
         min_lat, max_lat = min(lats), max(lats)
         min_lon, max_lon = min(lons), max(lons)
@@ -283,27 +853,29 @@ class TrafficManager:
             den_lon = (max_lon - min_lon) if (max_lon - min_lon) > 0 else 1
             den_lat = (max_lat - min_lat) if (max_lat - min_lat) > 0 else 1
 
-            x = ((st['lon'] - min_lon) / den_lon) * (self.width - margin) + 50
-            y = self.height - (((st['lat'] - min_lat) / den_lat) * (self.height - margin) + 50)
-            
-            node = Node(x, y, st['id'], name=st['orig'])
+            st['x'] = ((st['lon'] - min_lon) / den_lon) * (self.width - margin) + 50
+            st['y'] = self.height - (((st['lat'] - min_lat) / den_lat) * (self.height - margin) + 50)
+
+        connections = [(self._normalize_name(s1), self._normalize_name(s2)) for s1, s2 in network_connections]
+        return {'stations': temp_st, 'connections': connections}
+
+    def _build_network(self, compiled):
+        """Crea els nodes i les vies a partir de la xarxa compilada."""
+        for st in compiled['stations']:
+            node = Node(st['x'], st['y'], st['id'], name=st['orig'])
             node.lat, node.lon = st['lat'], st['lon']
             self.nodes[st['norm']] = node
+            self.graph.add_node(node)
 
-        for s1, s2 in Datas.R1_CONNECTIONS: 
-            self._add_connection(s1, s2)
-            
-        self.lines['R1_NORD'] = Datas.R1_STA
-        self.lines['R1_SUD'] = Datas.R1_STA[::-1]
-        
-        print(f"(TrafficManager) Xarxa construïda: {len(self.nodes)} estacions, {len(self.all_edges)} vies.")
+        for n1, n2 in compiled['connections']:
+            self._connect_nodes(n1, n2)
 
-    # Afegir connexió bidireccional entre dos nodes
-    def _add_connection(self, s1, s2):
-        n1, n2 = self._normalize_name(s1), self._normalize_name(s2)
-        
+    # Afegir connexió bidireccional entre dos nodes (pels seus noms normalitzats)
+    def _connect_nodes(self, n1, n2):
         if n1 in self.nodes and n2 in self.nodes:
             u, v = self.nodes[n1], self.nodes[n2]
+            # Un tram que fan diverses línies és una sola via física
+            if self.graph.edge_between(u, v) is not None: return
             
             # Via U -> V (Track 0)
             e0_normal = Edge(u, v, EdgeType.NORMAL, 0)
@@ -313,12 +885,9 @@ class TrafficManager:
             e1_normal = Edge(v, u, EdgeType.NORMAL, 1)
             e1_inversa = Edge(u, v, EdgeType.NORMAL, 1) # La que ve de cara al Track 1
 
-            self.all_edges.extend([e0_normal, e0_inversa, e1_normal, e1_inversa])
-            
-            TrafficManager.register_segment(u.name, v.name, 0, e0_normal)
-            TrafficManager.register_segment(v.name, u.name, 0, e0_inversa)
-            TrafficManager.register_segment(v.name, u.name, 1, e1_normal)
-            TrafficManager.register_segment(u.name, v.name, 1, e1_inversa)
+            # El graf enllaça cada via amb la seva inversa (mateix track, sentit contrari)
+            for edge in (e0_normal, e0_inversa, e1_normal, e1_inversa):
+                self.graph.add_edge(edge)
             
             if v.id not in u.neighbors: u.neighbors[v.id] = []
             if u.id not in v.neighbors: v.neighbors[u.id] = []
@@ -351,25 +920,27 @@ class TrafficManager:
             return float(min(hits, key=lambda x: abs(x - target))) if hits else None
         except: return None
 
-    # Metodes estàtics per a la gestió global de trens i vies
+    # Mètodes per a la gestió dels trens i vies del món
 
-    @staticmethod
-    def remove_train_from_edge(edge, train_id):
-        if edge and edge in TrafficManager._train_positions:
-            TrafficManager._train_positions[edge] = [
-                (tid, p) for tid, p in TrafficManager._train_positions[edge] if tid != train_id
-            ]
+    def remove_train_from_edge(self, edge, train_id):
+        if edge and edge in self._train_positions:
+            self._train_positions[edge].remove(train_id)
+            if self.scheduler is not None:
+                self.scheduler.edge_changed(edge)
+            edges = self._train_edges.get(train_id)
+            if edges is not None:
+                edges.discard(edge)
+                if not edges: del self._train_edges[train_id]
 
-    @staticmethod
-    def register_segment(u_name, v_name, track_id, edge_object):
-        TrafficManager._physical_segments[(u_name, v_name, track_id)] = edge_object
+    def get_edge(self, u_name, v_name, track_id=0):
+        """Via entre dues estacions pels seus noms (dades externes: escenaris, fitxers...)."""
+        return self.graph.get_edge(u_name, v_name, track_id)
 
-    @staticmethod
-    def get_edge(u_name, v_name, track_id=0):
-        return TrafficManager._physical_segments.get((u_name, v_name, track_id))
+    def edge_between(self, u, v, track_id=0):
+        """Via entre dos nodes, per índex (vegeu NetworkGraph)."""
+        return self.graph.edge_between(u, v, track_id)
     
-    @staticmethod
-    def check_head_on_collision(my_edge, my_progress):
+    def check_head_on_collision(self, my_edge, my_progress):
         """
         Comprova si ve un tren de cara a la mateixa vía física (mateix track_id).
         Retorna: Distància en km (float). Si és segur, retorna float('inf').
@@ -377,28 +948,26 @@ class TrafficManager:
         # Validacions bàsiques per evitar errors
         if not my_edge: return float('inf')
         
-        # Busquem la via inversa (el mateix segment físic però en sentit contrari)
-        u_name, v_name = my_edge.node1.name, my_edge.node2.name
-        
+        # Via inversa (el mateix segment físic però en sentit contrari), enllaçada per NetworkGraph.add_edge
         # En la representació actual:
         # - Track 0 en direcció U->V correspon a Track 0 en direcció V->U
         # - Track 1 en direcció U->V correspon a Track 1 en direcció V->U
-        inverse_edge = TrafficManager.get_edge(v_name, u_name, my_edge.track_id)
+        inverse_edge = my_edge.inverse_edge
         
         if not inverse_edge: 
             return float('inf')
             
         # Accés al diccionari de posicions
-        trains_inverse = TrafficManager._train_positions.get(inverse_edge)
+        trains_inverse = self._train_positions.get(inverse_edge)
         
         # Si no hi ha llista o està buida, no hi ha perill
         if not trains_inverse:
             return float('inf')
 
         # Càlcul de col·lisió directe (Sense iterar)
-        # trains_inverse està ordenada per progrés descendent: el [0] és el més avançat
+        # trains_inverse està ordenada per progrés descendent: el cap és el més avançat
         # i per tant l'únic que ens pot xocar de cara primer.
-        enemy_id, enemy_prog = trains_inverse[0] 
+        enemy_id, enemy_prog = trains_inverse.head()
         
         # Col·lisionen si: (El meu Progrés des de U) + (El seu Progrés des de V) >= 1.0
         gap_percent = 1.0 - (my_progress + enemy_prog)
@@ -408,14 +977,19 @@ class TrafficManager:
         
         return dist_km
 
-    @staticmethod
-    def check_alert(u_name, v_name, track_id):
-        return 1 if (u_name, v_name, track_id) in TrafficManager._reported_obstacles else 0
+    def check_alert(self, u_name, v_name, track_id):
+        return 1 if (u_name, v_name, track_id) in self._reported_obstacles else 0
     
-    @staticmethod
-    def get_safe_track(u_name, v_name):
+    def get_safe_track(self, u_name, v_name):
+        """Com safe_track_between, a partir dels noms de les estacions."""
+        u = self.graph.node_index.get(u_name)
+        v = self.graph.node_index.get(v_name)
+        if u is None or v is None: return None
+        return self.safe_track_between(self.graph.nodes[u], self.graph.nodes[v])
+
+    def safe_track_between(self, u, v):
         """
-        Busca una vía lliure (0 o 1) per anar de u_name a v_name.
+        Busca una vía lliure (0 o 1) per anar del node u al node v.
         Retorna el track_id segur o None si totes estan ocupades/peligroses.
         """
         # Probem les dues vies disponibles
@@ -426,7 +1000,7 @@ class TrafficManager:
         
         for t_id in possible_tracks:
             # Obtenim l'objecte via candidat
-            edge = TrafficManager.get_edge(u_name, v_name, t_id)
+            edge = self.graph.edge_between(u, v, t_id)
             if not edge: continue # Si no existeix (tram de via única), passem
             
             # Ignorar si la via està marcada com a OBSTACLE
@@ -438,16 +1012,16 @@ class TrafficManager:
 
             # Comprovem perill frontal (Tren venint de cara)
             # Simulem que estem a l'inici (progress=0.0)
-            dist_threat = TrafficManager.check_head_on_collision(edge, 0.0)
+            dist_threat = self.check_head_on_collision(edge, 0.0)
             
             # Si la distància és infinita (no hi ha ningú) o molt gran (>5km), és segura
             if dist_threat == float('inf') or dist_threat > 5.0:
                 
                 # Comprovar congestió en el mateix sentit
                 # Per evitar entrar si hi ha un tren just davant parat
-                trains_same_dir = TrafficManager._train_positions.get(edge, [])
+                trains_same_dir = self._train_positions.get(edge)
                 if trains_same_dir:
-                    last_train_id, last_prog = trains_same_dir[-1] # L'últim que va entrar
+                    last_train_id, last_prog = trains_same_dir.tail() # L'últim que va entrar
                     # Si l'últim tren està a menys del 5% del recorregut, esperem per no bloquejar
                     if last_prog < 0.05: 
                         continue 
@@ -456,61 +1030,60 @@ class TrafficManager:
                  
         return None # Cap via és segura, esperar
     
-    @staticmethod
-    def report_issue(u_name, v_name, track_id):
-        TrafficManager._reported_obstacles[(u_name, v_name, track_id)] = "ALERT"
+    def report_issue(self, u_name, v_name, track_id):
+        self._reported_obstacles[(u_name, v_name, track_id)] = "ALERT"
 
-    @staticmethod
-    def update_train_position(edge, train_id, progress):
+    def update_train_position(self, edge, train_id, progress):
         if not edge: return
         
         # Inicialització segura
-        if edge not in TrafficManager._train_positions:
-            TrafficManager._train_positions[edge] = []
+        occupancy = self.occupancy(edge)
         
-        # Actualització neta
-        current_list = TrafficManager._train_positions[edge]
-        # Filtrem el propi tren si ja hi era (per actualitzar dada)
-        new_list = [(tid, p) for tid, p in current_list if tid != train_id]
-        
-        # Afegim posició nova
-        new_list.append((train_id, progress))
-        
-        # Ordenem: El que té més progrés (més a prop de sortir) va primer
-        new_list.sort(key=lambda x: x[1], reverse=True)
-        
-        TrafficManager._train_positions[edge] = new_list
-
-    @staticmethod
-    def remove_train(train_id):
-        keys = list(TrafficManager._train_positions.keys())
-        for edge in keys:
-            TrafficManager._train_positions[edge] = [
-                (tid, p) for tid, p in TrafficManager._train_positions[edge] if tid != train_id
-            ]
+        # Actualitza (o insereix) mantenint l'ordre: el que té més progrés va primer
+        occupancy.update(train_id, progress)
+        self._train_edges[train_id].add(edge)
+        if self.scheduler is not None:
+            self.scheduler.edge_changed(edge)
+
+    def remove_train(self, train_id):
+        # Només toquem les vies que el tren ocupa realment
+        for edge in self._train_edges.pop(train_id, ()):
+            self._train_positions[edge].remove(train_id)
+            if self.scheduler is not None:
+                self.scheduler.edge_changed(edge)
 
-    @staticmethod
-    def get_distance_to_leader(edge, my_train_id):
-        if not edge or edge not in TrafficManager._train_positions:
+    def clear_train_positions(self):
+        """Buida l'ocupació de totes les vies (reset diari de l'entrenament)."""
+        # Es buiden in situ perquè les versions avancin i cap percepció antiga quedi vàlida
+        for occupancy in self._train_positions.values():
+            occupancy.clear()
+        self._train_edges.clear()
+        # Amb el motor vectoritzat, els trens retirats també alliberen les seves files
+        if self.physics is not None:
+            self.physics.clear()
+        if self.scheduler is not None:
+            self.scheduler.clear()
+
+    def occupancy(self, edge):
+        """Ocupació (EdgeOccupancy) d'una via, creant-la buida si encara no n'hi ha."""
+        occupancy = self._train_positions.get(edge)
+        if occupancy is None:
+            occupancy = self._train_positions[edge] = EdgeOccupancy()
+        return occupancy
+
+    def get_distance_to_leader(self, edge, my_train_id):
+        if not edge or edge not in self._train_positions:
             return float('inf')
         
-        trains_on_edge = TrafficManager._train_positions[edge]
-        if not trains_on_edge: return float('inf')
+        trains_on_edge = self._train_positions[edge]
         
-        # Busquem el nostre index
-        my_idx = -1
-        for i, (tid, prog) in enumerate(trains_on_edge):
-            if tid == my_train_id:
-                my_idx = i
-                break
-        
-        # Si no ens trobem (error sync) o som els primers (index 0), ningú davant
-        if my_idx <= 0:
+        # Si no ens trobem (error sync) o som els primers, ningú davant
+        leader = trains_on_edge.leader(my_train_id)
+        if leader is None:
             return float('inf')
             
-        # El líder és qui està just abans a la llista (index - 1)
-        leader_id, leader_prog = trains_on_edge[my_idx - 1]
-        _, my_prog = trains_on_edge[my_idx]
+        leader_id, leader_prog = leader
+        my_prog = trains_on_edge.progress_of(my_train_id)
         
         dist_km = (leader_prog - my_prog) * edge.real_length_km
         return max(0.0, dist_km) # Mai retornar negatiu per error de float
@@ -535,4 +1108,8 @@ class TrafficManager:
                 dest_name = t.target.name if t.target else "Fi"
                 seg = f"{t.node.name[:8]}->{dest_name[:8]}"
                 print(f"{t.id % 1000:03d} | {seg:18} | v={t.current_speed:5.1f} | Delay: {delay:+5.1f}m")
+
+        print("--- ÚLTIMS ESDEVENIMENTS ---")
+        for line in self.events.lines(20):
+            print(line)
         print("==========================================\n")
\ No newline at end of file
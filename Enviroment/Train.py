@@ -1,9 +1,7 @@
-import pygame
 import math
-import random
 from Enviroment.Datas import Datas
-from Enviroment.TrafficManager import TrafficManager 
 from Enviroment.EdgeType import EdgeType
+from Enviroment.EventLog import EventLog
 
 class Train:
     """
@@ -14,20 +12,25 @@ class Train:
     BRAKING = 200.0         # Frenada forta
     MAX_SPEED_TRAIN = 140.0 #Velocitat màxima dels trens
     BRAKING_DISTANCE_KM = 0.05 #Distància de seguretat per frenar davant estació
+    NUDGE_PROB = 0.2 #Probabilitat de forçar acceleració si el tren està aturat (entrenament)
 
-    def __init__(self, agent, route_nodes, schedule, start_time_sim, is_training=False, prefered_track=0):
+    def __init__(self, agent, route_nodes, schedule, start_time_sim, is_training=False, prefered_track=0, manager=None):
         """
         agent: Referència al QLearningAgent compartit.
         route_nodes: Llista d'objectes Node que formen la ruta.
         schedule: Diccionari {node_id: temps_arribada_previst}.
         start_time_sim: Hora d'inici de la simulació.
+        manager: TrafficManager (món) on circula el tren.
         """
+        self.manager = manager
         self.agent = agent
         self.route_nodes = route_nodes
         self.schedule = schedule
         self.is_training = is_training
 
-        self.id = id(self)
+        #identificador i generador aleatori propis, donats pel món (reproduïbles)
+        self.id = manager.next_train_id()
+        self.rng = manager.train_rng(self.id)
         self.finished = False
         self.crashed = False
         self.current_edge = None
@@ -53,6 +56,7 @@ class Train:
         #Estat de la parada
         self.is_waiting = False    
         self.wait_timer = 0.0      
+        self.track_blocked = False #L'últim intent de sortir de l'estació no ha trobat via segura
         self.WAIT_TIME_MIN = Datas.STOP_STA_TIME   
         
         self.last_dist_leader = float('inf')
@@ -60,6 +64,14 @@ class Train:
         #ATP ha de ser només en cas d'emergència
         self.atp_penalty = 0.0
 
+        #Percepció pendent entre perceive() i act()
+        self._pending = None
+
+        #Cache de percepció (vegeu sense): es refà quan canvia l'ocupació de les vies que mira
+        self._perception = None
+        self._perception_deps = None
+        self._parallel_cache = (None, None)
+
         #Inicialitzem el primer segment
         self.setup_segment(preferred_track=prefered_track)
 
@@ -79,17 +91,17 @@ class Train:
              target_track = self.current_edge.track_id
 
         #via "preferida"
-        edge = TrafficManager.get_edge(self.node.name, self.target.name, target_track)
+        edge = self.manager.edge_between(self.node, self.target, target_track)
 
         #en el cas que la via que tenim com a preferida hem de buscar una alternativa
         if edge and getattr(edge, 'edge_type', None) == EdgeType.OBSTACLE:
-            safe = TrafficManager.get_safe_track(self.node.name, self.target.name)
+            safe = self.manager.safe_track_between(self.node, self.target)
             if safe is not None:
-                edge = TrafficManager.get_edge(self.node.name, self.target.name, safe)
+                edge = self.manager.edge_between(self.node, self.target, safe)
             else:
                 #qualsevol via no obstacle
-                other0 = TrafficManager.get_edge(self.node.name, self.target.name, 0)
-                other1 = TrafficManager.get_edge(self.node.name, self.target.name, 1)
+                other0 = self.manager.edge_between(self.node, self.target, 0)
+                other1 = self.manager.edge_between(self.node, self.target, 1)
                 edge = None
                 if other0 and getattr(other0, 'edge_type', None) != EdgeType.OBSTACLE:
                     edge = other0
@@ -98,7 +110,7 @@ class Train:
 
         #Fallback a via 0 si no hi ha elecció i no és obstacle
         if not edge:
-            edge = TrafficManager.get_edge(self.node.name, self.target.name, 0)
+            edge = self.manager.edge_between(self.node, self.target, 0)
             if edge and getattr(edge, 'edge_type', None) == EdgeType.OBSTACLE:
                 edge = None
 
@@ -111,7 +123,7 @@ class Train:
             #Registrem el tren al TrafficManager ARA MATEIX.
             #Així, si un altre tren consulta la via en aquest mateix 'tick',
             #ja veurà que està ocupada per nosaltres.
-            TrafficManager.update_train_position(self.current_edge, self.id, 0.0)
+            self.manager.update_train_position(self.current_edge, self.id, 0.0)
             
         else:
             self.finished = True
@@ -140,9 +152,10 @@ class Train:
         
         return projected_arrival_time - expected_arrival
 
-    def _get_general_state(self, dist_leader, dist_oncoming):
+    def _get_general_state(self, dist_leader, dist_oncoming, delay=None):
         """
         Rep els valors calculats prèviament per evitar recalcular-los.
+        delay: retard projectat si ja s'ha calculat en aquest mateix estat del tren.
         """
         #distancia fins el desti
         if self.total_distance > 0:
@@ -167,7 +180,7 @@ class Train:
         else: trend_state = 1               
 
         #el retras que poguem portar
-        delay = self.calculate_delay()
+        if delay is None: delay = self.calculate_delay()
         if delay < 1: diff_disc = 0    
         elif delay < 5: diff_disc = 1  
         else: diff_disc = 2            
@@ -181,12 +194,11 @@ class Train:
         can_switch = 0
         if self.current_edge:
             #other edge és la via paralela
-            other_track = 1 if self.current_edge.track_id == 0 else 0
-            other_edge = TrafficManager.get_edge(self.node.name, self.target.name, other_track)
+            other_edge = self.get_parallel_edge()
             
             if other_edge:
                 #verifiquem que la via on cambiem estigui lliure de trens en sentit contrari
-                dist_enemy_other = TrafficManager.check_head_on_collision(other_edge, 0.0)
+                dist_enemy_other = self.sense()[3]
                 
                 #nomes cambiem si 
                 #l'altre via esta lliure de sentit contrari
@@ -201,13 +213,80 @@ class Train:
     lògica de moviment
     '''
 
+    def sense(self):
+        """
+        Capa de percepció del tren. Retorna (dist_líder_mateixa_via, dist_visió, dist_de_cara,
+        dist_de_cara_via_paral·lela), calculats un sol cop i reutilitzats mentre no canviï
+        l'ocupació de cap de les vies consultades (inclòs el moviment del propi tren, que
+        actualitza la seva via) ni la via on és el tren.
+        """
+        deps = self._perception_deps
+        if deps is not None and deps[0] is self.current_edge:
+            for occupancy, version in deps[1]:
+                if occupancy.version != version:
+                    break
+            else:
+                return self._perception
+
+        watched = []
+        self._perception = self._compute_perception(watched)
+        self._perception_deps = (self.current_edge, [(o, o.version) for o in watched])
+        return self._perception
+
+    def _compute_perception(self, watched):
+        #watched: s'hi afegeixen les ocupacions de les vies de les quals depèn el resultat
+        edge = self.current_edge
+        if edge:
+            watched.append(self.manager.occupancy(edge))
+            if edge.inverse_edge:
+                watched.append(self.manager.occupancy(edge.inverse_edge))
+
+        leader = self.manager.get_distance_to_leader(edge, self.id)
+        vision = self._compute_vision_ahead(leader, watched)
+
+        pct = self.distance_covered / self.total_distance if self.total_distance > 0 else 0
+        oncoming = self.manager.check_head_on_collision(self.current_edge, pct)
+
+        other = self.get_parallel_edge()
+        if other and other.inverse_edge:
+            watched.append(self.manager.occupancy(other.inverse_edge))
+        parallel_oncoming = self.manager.check_head_on_collision(other, 0.0) if other else float('inf')
+
+        return leader, vision, oncoming, parallel_oncoming
+
+    def _invalidate_perception(self):
+        #per als canvis de posició que no passen per update_train_position
+        self._perception_deps = None
+
     def get_vision_ahead(self):
         """
         evitem punt secundari mirant a la següent via si estem a prop del final
         Retorna la distància al líder en la via actual o la suma de distàncies
         """
-        #via actual
-        dist = TrafficManager.get_distance_to_leader(self.current_edge, self.id)
+        return self.sense()[1]
+
+    def get_leader_distance(self):
+        """Distància al líder a la mateixa via (infinit si no n'hi ha)."""
+        return self.sense()[0]
+
+    def get_oncoming_distance(self):
+        """Distància al tren que ve de cara per la mateixa via física (infinit si no n'hi ha)."""
+        return self.sense()[2]
+
+    def get_parallel_edge(self):
+        """Via paral·lela al tram actual (mateix origen i destí, l'altre track). Només canvia amb la via."""
+        edge, other = self._parallel_cache
+        if edge is not self.current_edge:
+            other = None
+            if self.current_edge:
+                other_track = 1 if self.current_edge.track_id == 0 else 0
+                other = self.manager.edge_between(self.node, self.target, other_track)
+            self._parallel_cache = (self.current_edge, other)
+        return other
+
+    def _compute_vision_ahead(self, dist, watched=None):
+        #dist: distància al líder a la via actual
+        #watched: si es passa, s'hi afegeix l'ocupació de la següent via quan es consulta
         
         #Si no hi ha ningú davant (infinit) I estem a prop del final (>90% recorregut),
         #mirem la següent via.
@@ -217,14 +296,16 @@ class Train:
                 next_u = self.route_nodes[self.current_node_idx + 1] #l meu target actual
                 next_v = self.route_nodes[self.current_node_idx + 2] #El següent al target
                 
-                next_edge = TrafficManager.get_edge(next_u.name, next_v.name)
+                next_edge = self.manager.edge_between(next_u, next_v)
                 if next_edge:
+                    if watched is not None:
+                        watched.append(self.manager.occupancy(next_edge))
                     #Busquem l'últim tren de la següent via
-                    #La llista està ordenada per progrés descendent el primer tren es el mes avançat
-                    trains_next = TrafficManager._train_positions.get(next_edge, [])
+                    #L'ocupació està ordenada per progrés descendent el primer tren es el mes avançat
+                    trains_next = self.manager._train_positions.get(next_edge)
                     if trains_next:
-                        #últim de la llista és el que té menys progrés
-                        leader_id, leader_prog = trains_next[-1] 
+                        #la cua és el que té menys progrés
+                        leader_id, leader_prog = trains_next.tail() 
                         
                         dist_to_end_of_current = self.total_distance - self.distance_covered
                         dist_of_leader_in_next = leader_prog * next_edge.real_length_km
@@ -252,55 +333,132 @@ class Train:
         self.distance_covered += distance_step
 
     def update(self, dt_minutes):
-        if self.finished: return
+        """
+        Pas complet d'un tren: percepció, decisió de l'agent, moviment i aprenentatge.
+        El mode per lots del TrafficManager fa servir perceive/act per separat (vegeu DecisionBatch).
+        """
+        state = self.perceive(dt_minutes)
+        if state is None: return
+
+        #decisió de l'agent
+        try: action_idx = self.agent.action(state)
+        except: action_idx = 0 
+        
+        #ajude per un millor entrenament
+        action_idx = self.nudge(action_idx)
+
+        transition = self.act(action_idx, dt_minutes)
+        if transition is None: return
+        try:
+            action_idx, reward, ns = transition
+            self.agent.update(state, action_idx, reward, ns)
+        except: pass
+
+    def can_nudge(self, action_idx):
+        """Si el tren està aturat en entrenament, l'ajuda pot forçar l'acció d'accelerar."""
+        return self.current_speed < 1.0 and action_idx != 0 and self.is_training
+
+    def nudge(self, action_idx):
+        """Acció final després de l'ajuda d'entrenament (amb el generador propi del tren)."""
+        if self.can_nudge(action_idx):
+            if self.rng.random() < self.NUDGE_PROB: action_idx = 0
+        return action_idx
+
+    def batch_reads(self, dt_minutes):
+        """
+        (vies, estació) de les quals depèn perceive() aquest tick, o None si perceive pot
+        canviar l'estat d'altres trens (tren acabat o que surt de l'estació). Vegeu DecisionBatch.
+        """
+        if self.finished: return None
+        if self.is_waiting:
+            return ((), None) if self.wait_timer - dt_minutes > 0 else None
+        edge = self.current_edge
+        if not edge: return None
+
+        edges = [edge, edge.inverse_edge]
+        other = self.get_parallel_edge()
+        if other: edges.append(other.inverse_edge)
+        if self.distance_covered > (self.total_distance * 0.9):
+            edges.append(self._next_route_edge())
+
+        node = self.target if self.total_distance - self.distance_covered < 0.05 else None
+        return edges, node
+
+    def batch_writes(self):
+        """(vies, estació) que pot modificar act(): la via actual, la paral·lela i l'estació de destí."""
+        edges = [self.current_edge]
+        other = self.get_parallel_edge()
+        if other: edges.append(other)
+        return edges, self.target
+
+    def perceive(self, dt_minutes):
+        """
+        Primera meitat del pas: gestiona parades i esperes i, si el tren ha de decidir,
+        retorna l'estat per a l'agent. Retorna None si aquest tick no hi ha decisió.
+        """
+        self._pending = None
+        if self.finished: return None
         self.atp_penalty = 0.0 
 
         #logica de parada a estació, o apartadero
         if self.is_waiting:
             self.sim_time += dt_minutes
             self.wait_timer -= dt_minutes
+            self.track_blocked = False
             
             if self.wait_timer <= 0:
                 next_idx = self.current_node_idx + 1
                 if next_idx < len(self.route_nodes) - 1:
                     next_u, next_v = self.route_nodes[next_idx], self.route_nodes[next_idx + 1]
-                    safe_track = TrafficManager.get_safe_track(next_u.name, next_v.name)
+                    safe_track = self.manager.safe_track_between(next_u, next_v)
                     
                     if safe_track is not None:
-                        target_edge = TrafficManager.get_edge(next_u.name, next_v.name, safe_track)
-                        if target_edge and TrafficManager.check_head_on_collision(target_edge, 0.0) < 10.0:
-                            self.wait_timer = 0.5; return 
+                        target_edge = self.manager.edge_between(next_u, next_v, safe_track)
+                        if target_edge and self.manager.check_head_on_collision(target_edge, 0.0) < 10.0:
+                            self.wait_timer = 0.5; self.track_blocked = True; return 
                         
                         self.depart_from_station(preferred_track=safe_track)
                     else: 
                         self.wait_timer = 0.5 
+                        self.track_blocked = True
                 else: 
                     self.depart_from_station() 
-            return 
+            return None
 
         #control d'accés a l'estació
         dist_remaining = self.total_distance - self.distance_covered
         if dist_remaining < 0.05 and self.target and not self.target.has_capacity():
             self.current_speed = 0.0
             self.sim_time += dt_minutes
-            return
+            return None
 
         #percepció
         try:
-            dist_leader = self.get_vision_ahead()
-            pct = self.distance_covered / self.total_distance if self.total_distance > 0 else 0
-            dist_oncoming = TrafficManager.check_head_on_collision(self.current_edge, pct)
+            dist_same_track, dist_leader, dist_oncoming, _ = self.sense()
             state = self._get_general_state(dist_leader, dist_oncoming)
-        except: self.finished = True; return
+        except: self.finished = True; return None
 
-        #decisió de l'agent
-        try: action_idx = self.agent.action(state)
-        except: action_idx = 0 
-        
-        #ajude per un millor entrenament
-        if self.current_speed < 1.0 and action_idx != 0 and self.is_training:
-            if random.random() < 0.2: action_idx = 0 
+        self._pending = (dist_leader, dist_oncoming, dist_remaining, dist_same_track)
+        return state
 
+    def act(self, action_idx, dt_minutes):
+        """
+        Segona meitat del pas: aplica l'acció triada (amb ATP i frenada d'estació) i mou el tren.
+        Retorna (acció_final, recompensa, nou_estat) per a l'agent, o None si no hi ha transició.
+        """
+        if self._pending is None: return None
+        dist_leader, dist_oncoming, dist_remaining, dist_same_track = self._pending
+        self._pending = None
+
+        action_idx = self._apply_kinematics(action_idx, dist_leader, dist_oncoming, dist_remaining, dist_same_track, dt_minutes)
+        return self._complete_step(action_idx, dist_leader, dt_minutes)
+
+    def _apply_kinematics(self, action_idx, dist_leader, dist_oncoming, dist_remaining, dist_same_track, dt_minutes):
+        """
+        Frenada d'estació, ATP, acció de l'agent i avanç del tren. Retorna l'acció final.
+        Les distàncies són les de la percepció d'aquest tick (dist_same_track: líder a la mateixa via).
+        TrainPhysics fa aquest mateix càlcul per a tots els trens alhora.
+        """
         #frenada automatica en entrar a l'estació
         if dist_remaining <= self.BRAKING_DISTANCE_KM:
             target_approach = (dist_remaining / self.BRAKING_DISTANCE_KM) * 80.0 + 40.0 
@@ -320,8 +478,6 @@ class Train:
             #mirem si el 1r tren esta a la mateixa via o a la següent
             #Si get_distance_to_leader retorna infinit, és que el primer tren no és a la via actual,
             #per tant, el que hem vist a 'dist_leader' és algú a la següent estació.
-            dist_same_track = TrafficManager.get_distance_to_leader(self.current_edge, self.id)
-            
             if dist_same_track == float('inf'):
                 #lider a la seguent estacio 
                 #deixem passa el tren
@@ -337,6 +493,7 @@ class Train:
         current_limit = min(self.max_speed_edge, override_speed)
         
         if self.current_speed > current_limit:
+            self.log_event(EventLog.ATP, current_limit)
             self.current_speed -= (self.BRAKING * 2.0) * dt_minutes 
             if self.current_speed < current_limit: self.current_speed = current_limit
             if self.is_training: self.atp_penalty -= 5.0
@@ -369,10 +526,15 @@ class Train:
             avail = dist_leader - 0.01 
             if dist_step > avail:
                 dist_step = max(0.0, avail)
+                if self.current_speed > 0.0: self.log_event(EventLog.STOP, dist_leader)
                 self.current_speed = 0.0 
 
         self.distance_covered += dist_step
-        TrafficManager.update_train_position(self.current_edge, self.id, self.distance_covered/self.total_distance)
+        return action_idx
+
+    def _complete_step(self, action_idx, dist_leader, dt_minutes):
+        """Registra la nova posició, calcula la recompensa i el nou estat (o None si no n'hi ha)."""
+        self.manager.update_train_position(self.current_edge, self.id, self.distance_covered/self.total_distance)
         self.sim_time += dt_minutes
 
         #recompenses i transició d'estat
@@ -386,17 +548,81 @@ class Train:
         if new_delay < prev_delay: reward += 1.0
         self.last_known_delay = new_delay
 
-        if self.distance_covered >= self.total_distance:
+        arrived = self.distance_covered >= self.total_distance
+        if arrived:
             if abs(new_delay) <= 2: reward += 100 
             else: reward += 10 - min(50, abs(new_delay) * 2)
             self.arrive_at_station_logic()
         
         self.last_dist_leader = dist_leader
+        if self.finished: return None
         try:
-            if not self.finished:
-                ns = self._get_general_state(self.get_vision_ahead(), TrafficManager.check_head_on_collision(self.current_edge, self.distance_covered/self.total_distance))
-                self.agent.update(state, action_idx, reward, ns)
-        except: pass
+            #si no hem arribat, el retard del nou estat és el que acabem de calcular
+            _, next_leader, next_oncoming, _ = self.sense()
+            ns = self._get_general_state(next_leader, next_oncoming, None if arrived else new_delay)
+        except: return None
+        return action_idx, reward, ns
+
+    '''
+    creuer (avanç ràpid quan la via és lliure)
+    '''
+
+    def cruise_horizon(self, dt_minutes):
+        """
+        Si el tren circula a velocitat màxima sense ningú davant ni de cara, retorna
+        (ticks, mira_seguent_via): quants ticks pot avançar a velocitat constant abans
+        de necessitar atenció (distància de frenada de l'estació, arribada o, si la
+        següent via és ocupada, el 90% del tram on la visió comença a mirar-la).
+        Retorna (0, False) si el tren no està en creuer.
+        """
+        if self.finished or self.is_waiting or not self.current_edge or self._pending is not None:
+            return 0, False
+        cruise_speed = min(self.MAX_SPEED_TRAIN, self.max_speed_edge)
+        if self.current_speed <= 0 or self.current_speed != cruise_speed:
+            return 0, False
+
+        leader, vision, oncoming, _ = self.sense()
+        if leader != float('inf') or vision != float('inf') or oncoming != float('inf'):
+            return 0, False
+
+        next_edge = self._next_route_edge()
+        next_occupancy = self.manager._train_positions.get(next_edge) if next_edge else None
+        watch_next = not next_occupancy
+
+        step = self.current_speed * (dt_minutes / 60.0)
+        bound = min(self.total_distance - self.BRAKING_DISTANCE_KM, self.total_distance - step)
+        if not watch_next:
+            bound = min(bound, self.total_distance * 0.9)
+        ticks = math.ceil((bound - self.distance_covered) / step)
+        return max(0, ticks), watch_next
+
+    def can_cruise(self, dt_minutes, watch_next):
+        """Comprovació exacta, tick a tick, que el pròxim pas encara és de creuer."""
+        dist_remaining = self.total_distance - self.distance_covered
+        if dist_remaining <= self.BRAKING_DISTANCE_KM:
+            return False
+        if self.distance_covered + self.current_speed * (dt_minutes / 60.0) >= self.total_distance:
+            return False
+        return watch_next or self.distance_covered <= self.total_distance * 0.9
+
+    def cruise(self, dt_minutes):
+        """
+        Pas de creuer: el mateix avanç que un tick amb l'acció de mantenir la velocitat,
+        sense percepció, decisió ni aprenentatge.
+        """
+        self.atp_penalty = 0.0
+        self.distance_covered += self.current_speed * (dt_minutes / 60.0)
+        self.manager.update_train_position(self.current_edge, self.id, self.distance_covered/self.total_distance)
+        self.sim_time += dt_minutes
+        self.last_dist_leader = float('inf')
+
+    def _next_route_edge(self):
+        """Via (track 0) del tram següent de la ruta, la que mira la visió, o None."""
+        if self.current_node_idx + 1 < len(self.route_nodes) - 1:
+            next_u = self.route_nodes[self.current_node_idx + 1]
+            next_v = self.route_nodes[self.current_node_idx + 2]
+            return self.manager.edge_between(next_u, next_v)
+        return None
 
     def attempt_track_switch(self):
         """
@@ -411,29 +637,26 @@ class Train:
             return False
 
         #comprovem si hi ha rao per canviar
-        dist_leader = self.get_vision_ahead()
-        pct_current = self.distance_covered / self.total_distance if self.total_distance > 0 else 0
-        dist_oncoming = TrafficManager.check_head_on_collision(self.current_edge, pct_current)
+        _, dist_leader, dist_oncoming, _ = self.sense()
         
         has_valid_reason = (dist_leader < 3.0) or (dist_oncoming < 5.0)
         if not has_valid_reason:
             return False
 
         #canvi en si mateix
-        current_track = self.current_edge.track_id
-        target_track = 1 if current_track == 0 else 0
-        new_edge = TrafficManager.get_edge(self.node.name, self.target.name, target_track)
+        new_edge = self.get_parallel_edge()
         
         if new_edge:
             pct = self.distance_covered / self.total_distance if self.total_distance > 0 else 0
-            dist_enemy = TrafficManager.check_head_on_collision(new_edge, pct)
+            dist_enemy = self.manager.check_head_on_collision(new_edge, pct)
             
             #marge de seguretat
             if dist_enemy > 3.0: 
-                TrafficManager.remove_train_from_edge(self.current_edge, self.id)
+                self.manager.remove_train_from_edge(self.current_edge, self.id)
                 self.current_edge = new_edge
                 self.max_speed_edge = new_edge.max_speed_kmh
-                TrafficManager.update_train_position(self.current_edge, self.id, pct)
+                self.manager.update_train_position(self.current_edge, self.id, pct)
+                self.log_event(EventLog.TRACK_SWITCH)
                 return True
 
         return False
@@ -447,6 +670,7 @@ class Train:
         """
         self.current_speed = 0.0 
         self.distance_covered = self.total_distance 
+        self._invalidate_perception()
         
         #ocupar espai estaciuo
         if self.target:
@@ -457,6 +681,7 @@ class Train:
             scheduled_arrival = self.schedule.get(self.target.id)
             
             wait_time_needed = self.WAIT_TIME_MIN #parada tecnica
+            delay = float('nan')
             
             if scheduled_arrival is not None:
                 #si anessim d'hora hem d'esperar més
@@ -467,6 +692,7 @@ class Train:
                     wait_time_needed += early_minutes
                    
             self.wait_timer = wait_time_needed
+            self.log_event(EventLog.ARRIVE, delay)
         else:
             self.wait_timer = self.WAIT_TIME_MIN
 
@@ -483,7 +709,7 @@ class Train:
             self.target.exit_station()
 
         if self.current_edge:
-            TrafficManager.remove_train_from_edge(self.current_edge, self.id)
+            self.manager.remove_train_from_edge(self.current_edge, self.id)
 
         self.is_waiting = False
         self.current_node_idx += 1
@@ -494,11 +720,23 @@ class Train:
         if self.current_node_idx < len(self.route_nodes) - 1:
             self.target = self.route_nodes[self.current_node_idx + 1]
             self.setup_segment(preferred_track=preferred_track)
+            if not self.finished: self.log_event(EventLog.DEPART)
         else:
             #fi del trajecte
             self.finished = True
             self.target = None
-            TrafficManager.remove_train(self.id)
+            self.manager.remove_train(self.id)
+
+    def log_event(self, kind, value=0.0):
+        """Registra un esdeveniment del tren al tram actual (vegeu EventLog)."""
+        edge = self.current_edge
+        self.manager.events.record(
+            kind, self.sim_time, self.id,
+            self.node.name if self.node else None,
+            self.target.name if self.target else None,
+            edge.track_id if edge else -1,
+            value
+        )
 
     def draw(self, screen):
         if self.finished or not self.node or not self.target: return
@@ -546,6 +784,7 @@ class Train:
             cur_x += off_x
             cur_y += off_y
 
+        import pygame  # només per dibuixar: la simulació headless no el necessita
         pygame.draw.circle(screen, color, (int(cur_x), int(cur_y)), 4)
 
     def __repr__(self):
@@ -0,0 +1,220 @@
+import numpy as np
+
+from Enviroment.EventLog import EventLog
+
+
+class TrainPhysics:
+    """
+    Motor de física vectoritzat (struct-of-arrays). L'estat cinemàtic de tots els trens
+    viu en columnes NumPy, una fila per tren, i la frenada d'estació, l'ATP, l'acció de
+    l'agent i l'avanç es calculen per a tots els trens del tick amb operacions vectorials.
+
+    Els trens (TrainView) són vistes sobre una fila: llegeixen i escriuen aquestes columnes,
+    de manera que la resta de la lògica (parades, canvis de via, dibuix) no canvia.
+
+    Dins d'un lot (vegeu DecisionBatch) cap tren llegeix el que escriuen els altres en
+    actuar, i per això calcular-los alhora dona el mateix que fer-los un a un.
+    """
+
+    # Columnes (nom -> tipus)
+    COLUMNS = {
+        "speed": np.float64,           # current_speed (km/h)
+        "distance": np.float64,        # distance_covered (km)
+        "total_distance": np.float64,  # Longitud del tram actual (km)
+        "max_speed_edge": np.float64,  # Velocitat màxima del tram actual (km/h)
+        "wait_timer": np.float64,      # Minuts d'espera restants a l'estació
+        "sim_time": np.float64,        # Rellotge propi del tren
+        "node_idx": np.int64,          # current_node_idx dins de la ruta
+        "edge_idx": np.int64,          # Índex a self.edges (-1 si no hi ha via)
+        "is_waiting": np.bool_,
+    }
+
+    def __init__(self, edges, capacity=64):
+        self.capacity = 0
+        self.n_rows = 0
+        self._free = []
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._grow(capacity)
+
+        # Vies de la xarxa (la llista NetworkGraph.edges): l'índex d'una via és el seu Edge.id
+        self.edges = edges
+
+    # ------------------------------------------------------------------
+    # Files i vies
+    # ------------------------------------------------------------------
+
+    def _grow(self, capacity):
+        for name, dtype in self.COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            column[:self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        self.edge_idx[self.capacity:] = -1
+        self.capacity = capacity
+
+    def allocate(self):
+        """Reserva una fila per a un tren nou i en retorna l'índex."""
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self.n_rows == self.capacity:
+                self._grow(self.capacity * 2)
+            row = self.n_rows
+            self.n_rows += 1
+        for name in self.COLUMNS:
+            getattr(self, name)[row] = 0
+        self.edge_idx[row] = -1
+        return row
+
+    def release(self, row):
+        self._free.append(row)
+
+    def clear(self):
+        """Allibera totes les files (reset diari). Els índexs de via es mantenen."""
+        self._free = []
+        self.n_rows = 0
+
+    def snapshot(self):
+        """Còpia de les files en ús (vegeu SimulationSnapshot)."""
+        columns = {name: getattr(self, name)[:self.n_rows].copy() for name in self.COLUMNS}
+        return columns, self.n_rows, list(self._free)
+
+    def restore(self, snapshot):
+        columns, n_rows, free = snapshot
+        if n_rows > self.capacity:
+            self._grow(n_rows)
+        for name, values in columns.items():
+            getattr(self, name)[:n_rows] = values
+        self.n_rows = n_rows
+        self._free = list(free)
+
+    def edge_to_index(self, edge):
+        return -1 if edge is None else edge.id
+
+    def index_to_edge(self, idx):
+        return self.edges[idx] if idx >= 0 else None
+
+    # ------------------------------------------------------------------
+    # Pas vectoritzat
+    # ------------------------------------------------------------------
+
+    def act_batch(self, trains, actions, dt_minutes, after=None):
+        """
+        Segona meitat del tick per a un lot de trens (equivalent a Train.act per a cadascun,
+        en ordre i amb els mateixos esdeveniments). Els trens han d'haver passat per perceive()
+        aquest mateix tick. Si es dona after, es crida amb cada tren just després del seu pas,
+        abans del pas del següent.
+
+        Els canvis de via (rars) escriuen a l'ocupació de les vies abans de moure's, i es fan
+        tren a tren amb Train.act; la resta del lot es calcula amb operacions vectorials.
+
+        :return: Llista de (tren, acció_final, recompensa, nou_estat) dels trens amb transició.
+        """
+        deciding = [(t, a) for t, a in zip(trains, actions) if t._pending is not None]
+        transitions = []
+        start = 0
+        for i in np.flatnonzero(np.fromiter((a == 3 for _, a in deciding), dtype=bool, count=len(deciding))).tolist():
+            transitions += self._act_rows(deciding[start:i], dt_minutes, after)
+            t = deciding[i][0]
+            transition = t.act(3, dt_minutes)
+            if transition is not None:
+                transitions.append((t,) + transition)
+            if after is not None:
+                after(t)
+            start = i + 1
+        transitions += self._act_rows(deciding[start:], dt_minutes, after)
+        return transitions
+
+    def _act_rows(self, deciding, dt_minutes, after):
+        """Pas vectoritzat d'un tros del lot sense canvis de via: parells (tren, acció)."""
+        if not deciding:
+            return []
+        Train = type(deciding[0][0])
+
+        rows = np.fromiter((t._row for t, _ in deciding), dtype=np.int64, count=len(deciding))
+        action = np.fromiter((a for _, a in deciding), dtype=np.int64, count=len(deciding))
+        pending = np.array([t._pending for t, _ in deciding], dtype=np.float64).reshape(-1, 4)
+        dist_leader, dist_oncoming, dist_remaining, dist_same_track = pending.T
+        for t, _ in deciding:
+            t._pending = None
+
+        speed = self.speed[rows]
+        edge_limit = self.max_speed_edge[rows]
+
+        # Frenada automàtica en entrar a l'estació
+        braking_km = Train.BRAKING_DISTANCE_KM
+        approach = dist_remaining <= braking_km
+        target_approach = (dist_remaining / braking_km) * 80.0 + 40.0
+        station_brake = approach & (speed > target_approach)
+        speed = np.where(station_brake, target_approach, speed)
+        action = np.where(station_brake, 2, action)
+
+        is_training = np.fromiter((t.is_training for t, _ in deciding), dtype=bool, count=len(deciding))
+        penalty = np.zeros(len(deciding), dtype=np.float64)
+
+        # Sistema ATP bàsic (el líder a la mateixa via és el de la percepció)
+        oncoming = dist_oncoming < 3.0
+        penalty[oncoming & (speed > 10)] = -100
+        leader_close = ~oncoming & (dist_leader < 3.0)
+        same_track_free = dist_same_track == np.inf
+        leader_next = leader_close & same_track_free
+        leader_same = leader_close & ~same_track_free
+
+        override = np.full(len(deciding), np.inf)
+        override[oncoming] = 0.0
+        override = np.where(leader_next, np.where(dist_leader < 0.1, 15.0, edge_limit), override)
+        same_limit = np.select(
+            [dist_leader < 0.2, dist_leader < 1.0, dist_leader < 2.0],
+            [0.0, 30.0, 60.0], 100.0
+        )
+        override = np.where(leader_same, same_limit, override)
+
+        current_limit = np.minimum(edge_limit, override)
+        atp = speed > current_limit
+        speed = np.where(atp, np.maximum(speed - (Train.BRAKING * 2.0) * dt_minutes, current_limit), speed)
+        penalty[atp & is_training] -= 5.0
+
+        # Acció de l'agent
+        accelerate = action == 0
+        accelerated = speed + Train.ACCELERATION * dt_minutes
+        accel_limit = np.minimum(Train.MAX_SPEED_TRAIN, edge_limit)
+        accelerated = np.where(accelerated > accel_limit, accel_limit, accelerated)
+        accelerated = np.where(accelerated < 1, 1.0, accelerated)
+
+        # Només es pot frenar si hi ha un motiu real
+        has_reason = (
+            (dist_remaining < braking_km * 2.0) |
+            (speed > edge_limit) |
+            (dist_leader < 5.0) |
+            (dist_oncoming < 5.0)
+        )
+        brake = (action == 2) & has_reason
+        braked = np.maximum(speed - Train.BRAKING * dt_minutes, 0.0)
+
+        speed = np.where(accelerate, accelerated, np.where(brake, braked, speed))
+        speed = np.where(speed > current_limit, current_limit, speed)
+
+        # Avanç, sense passar mai el líder
+        dist_step = speed * (dt_minutes / 60.0)
+        blocked = (dist_leader < np.inf) & (dist_step > dist_leader - 0.01)
+        dist_step = np.where(blocked, np.maximum(0.0, dist_leader - 0.01), dist_step)
+        stop = blocked & (speed > 0.0)
+        speed = np.where(blocked, 0.0, speed)
+
+        self.speed[rows] = speed
+        self.distance[rows] += dist_step
+
+        # Tren a tren i en ordre: els esdeveniments (ATP, STOP i, en arribar, ARRIVE), la nova posició i el nou estat
+        transitions = []
+        rows_out = zip(deciding, action.tolist(), penalty.tolist(), dist_leader.tolist(),
+                       atp.tolist(), current_limit.tolist(), stop.tolist())
+        for (t, _), a, p, dl, logs_atp, limit, logs_stop in rows_out:
+            if logs_atp: t.log_event(EventLog.ATP, limit)
+            if logs_stop: t.log_event(EventLog.STOP, dl)
+            t.atp_penalty = p
+            transition = t._complete_step(a, dl, dt_minutes)
+            if transition is not None:
+                transitions.append((t,) + transition)
+            if after is not None:
+                after(t)
+        return transitions
@@ -0,0 +1,47 @@
+from Enviroment.Train import Train
+
+
+def _column(name):
+    """Propietat que llegeix i escriu la fila del tren a la columna `name` de TrainPhysics."""
+    def fget(self):
+        return getattr(self._physics, name).item(self._row)
+
+    def fset(self, value):
+        getattr(self._physics, name)[self._row] = value
+
+    return property(fget, fset)
+
+
+class TrainView(Train):
+    """
+    Tren del motor vectoritzat: la mateixa lògica que Train, però l'estat cinemàtic
+    (velocitat, distància, espera, índex de node i via) és una fila de TrainPhysics.
+    Serveix per al dibuix, la depuració i la lògica de parades, que continua sent per tren.
+    """
+
+    current_speed = _column("speed")
+    distance_covered = _column("distance")
+    total_distance = _column("total_distance")
+    max_speed_edge = _column("max_speed_edge")
+    wait_timer = _column("wait_timer")
+    sim_time = _column("sim_time")
+    current_node_idx = _column("node_idx")
+    is_waiting = _column("is_waiting")
+
+    def __init__(self, physics, *args, **kwargs):
+        # La fila ha d'existir abans que Train.__init__ assigni l'estat inicial
+        self._physics = physics
+        self._row = physics.allocate()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def current_edge(self):
+        return self._physics.index_to_edge(self._physics.edge_idx.item(self._row))
+
+    @current_edge.setter
+    def current_edge(self, edge):
+        self._physics.edge_idx[self._row] = self._physics.edge_to_index(edge)
+
+    def release(self):
+        """Allibera la fila (el tren ja no circula)."""
+        self._physics.release(self._row)
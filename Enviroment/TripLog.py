@@ -0,0 +1,153 @@
+import gzip
+import os
+import numpy as np
+
+
+class TripLog:
+    """
+    Registre de pas per estació de cada tren acabat, en columnes numèriques d'amplada fixa
+    (un array estructurat de NumPy), per fer informes d'execucions llargues sense guardar
+    els logs de cada tren a memòria.
+
+    Cada fila és una parada prevista d'un tren: tren, dia, estació (índex a `names`), ordre
+    dins de la ruta, hora prevista, hora real i retard (minuts; NaN si el tren no hi ha arribat).
+
+    Les files s'escriuen en un buffer de mida fixa. Amb fitxer (path), quan el buffer és ple
+    s'afegeix sencer al final del fitxer (un sol write per bloc), així la memòria no creix amb
+    els dies simulats. Sense fitxer, quan el buffer és ple es descarta i només queden les files
+    més recents. Amb compress el fitxer és gzip (cada bloc és un membre del gzip).
+
+    El fitxer sense comprimir es pot llegir sense carregar-lo amb np.memmap (vegeu read),
+    i els noms de les estacions van a path + '.names' (un per línia), com a EventLog.
+    """
+
+    DTYPE = np.dtype([
+        ("train", "<i4"),
+        ("day", "<i4"),
+        ("station", "<i4"),
+        ("stop", "<i2"),
+        ("scheduled", "<f4"),
+        ("actual", "<f4"),
+        ("delay", "<f4"),
+    ])
+
+    def __init__(self, path=None, chunk_rows=65536, compress=False):
+        self.path = path
+        self.compress = compress
+        self.chunk_rows = int(chunk_rows)
+        self._buffer = np.zeros(self.chunk_rows, dtype=self.DTYPE)
+        self._size = 0        # Files al buffer
+        self._flushed = 0     # Files ja escrites (o descartades sense fitxer)
+        self._last_rows = None  # Còpia de les files de l'últim tren escrit (vegeu last_train)
+
+        # Noms d'estació -> índex (només creix)
+        self.names = []
+        self._codes = {}
+        self._names_saved = 0
+
+        if path is not None:
+            open(path, 'wb').close()
+            open(path + '.names', 'w', encoding='utf-8').close()
+
+    def __len__(self):
+        """Files registrades des de l'inici (incloses les ja escrites)."""
+        return self._flushed + self._size
+
+    def code(self, name):
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def record_train(self, train, day):
+        """Afegeix una fila per cada estació de l'horari del tren, en ordre de ruta."""
+        schedule, actuals = train.schedule, train.arrival_logs
+        stops = [node for node in train.route_nodes if node.id in schedule]
+        if not stops: return
+        if self._size + len(stops) > self.chunk_rows:
+            self.flush()
+            if len(stops) > self.chunk_rows:
+                self._buffer = np.zeros(len(stops), dtype=self.DTYPE)
+
+        rows = self._buffer[self._size:self._size + len(stops)]
+        for i, node in enumerate(stops):
+            scheduled = schedule[node.id]
+            actual = actuals.get(node.name, np.nan)
+            rows[i] = (train.id, day, self.code(node.name), i + 1, scheduled, actual, actual - scheduled)
+        self._size += len(stops)
+
+    def last_train(self):
+        """Files de l'últim tren registrat (també després d'un flush o d'un rewind)."""
+        if self._size:
+            # Les files de cada tren són consecutives i comencen per l'ordre 1
+            start = np.flatnonzero(self._buffer['stop'][:self._size] == 1)[-1]
+            return self._buffer[start:self._size]
+        if self._last_rows is not None:
+            return self._last_rows
+        return self._buffer[:0]
+
+    def recent(self):
+        """Files que encara són al buffer (les posteriors a l'últim flush)."""
+        return self._buffer[:self._size]
+
+    def flush(self):
+        """Escriu el buffer al fitxer (o el descarta sense fitxer). Retorna quantes files ha escrit."""
+        written = self._size
+        if written:
+            self._last_rows = self.last_train().copy()
+        if self.path is not None and written:
+            opener = gzip.open if self.compress else open
+            with opener(self.path, 'ab') as f:
+                f.write(self._buffer[:written].tobytes())
+            if len(self.names) > self._names_saved:
+                with open(self.path + '.names', 'a', encoding='utf-8') as f:
+                    f.writelines(name + '\n' for name in self.names[self._names_saved:])
+                self._names_saved = len(self.names)
+        if len(self._buffer) != self.chunk_rows:
+            self._buffer = np.zeros(self.chunk_rows, dtype=self.DTYPE)
+        self._flushed += written
+        self._size = 0
+        return written if self.path is not None else 0
+
+    close = flush
+
+    def mark(self):
+        """Posició actual del registre, per tornar-hi amb rewind."""
+        return len(self)
+
+    def rewind(self, mark):
+        """
+        Descarta les files posteriors a mark (p. ex. les d'una branca de prova, vegeu
+        TrafficManager.branch). Les que ja s'han escrit al fitxer no es poden descartar.
+        """
+        size = max(mark - self._flushed, 0)
+        if size >= self._size: return
+        self._size = size
+
+    @classmethod
+    def read(cls, path):
+        """
+        Llegeix un fitxer escrit per flush. Retorna (files, noms d'estació).
+        Sense comprimir, les files són un np.memmap de només lectura (no es carreguen a memòria).
+        """
+        with open(path + '.names', encoding='utf-8') as f:
+            names = f.read().splitlines()
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == b'\x1f\x8b'
+        if compressed:
+            with gzip.open(path, 'rb') as f:
+                return np.frombuffer(f.read(), dtype=cls.DTYPE), names
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=cls.DTYPE), names
+        return np.memmap(path, dtype=cls.DTYPE, mode='r'), names
+
+    @classmethod
+    def read_frame(cls, path):
+        """Com read, en un DataFrame de pandas amb el nom de l'estació com a categoria."""
+        import pandas as pd
+
+        rows, names = cls.read(path)
+        frame = pd.DataFrame(rows)
+        frame['station'] = pd.Categorical.from_codes(frame['station'], categories=names)
+        return frame
@@ -0,0 +1,93 @@
+import numpy as np
+
+from Enviroment.DecisionBatch import DecisionBatch
+
+
+class VectorEnv:
+    """
+    Diversos mons (TrafficManager) independents que avancen alhora i comparteixen un
+    sol QLearningAgent. Cada tick, els trens de tots els mons (en l'ordre dels mons) van
+    a un mateix DecisionBatch, de manera que les decisions i l'aprenentatge de tots els
+    mons s'agrupen en les mateixes crides a action_batch i update_batch. El resultat és
+    el mateix que fer update() de cada món, un després de l'altre, amb el mateix agent.
+
+    Cada món pot tenir la seva línia de curriculum (current_spawn_line). Els mons han de
+    ser en mode per lots (batched o vectorized).
+
+    step() retorna, per món:
+    - observacions: array (K, 3) amb [sim_time, trens_actius, retard_absolut_mitjà]
+      (el retard és 0 si no hi ha trens).
+    - recompenses: array (K,) amb la suma de les recompenses de les transicions del tick.
+    - dones: array (K,) de bool, cert quan el món ha arribat a minutes_per_day.
+      Els mons acabats no avancen fins que se'ls fa reset.
+    """
+
+    OBS_SIZE = 3
+
+    def __init__(self, managers, brain, dt_minutes=2.0, minutes_per_day=1440):
+        if not managers:
+            raise ValueError("VectorEnv necessita almenys un món")
+        for manager in managers:
+            if not manager.batched:
+                raise ValueError("Els mons de VectorEnv han de ser en mode per lots (batched=True)")
+            manager.brain = brain
+
+        self.managers = list(managers)
+        self.brain = brain
+        self.dt_minutes = dt_minutes
+        self.minutes_per_day = minutes_per_day
+        self.dones = np.ones(len(self.managers), dtype=bool)
+
+    def __len__(self):
+        return len(self.managers)
+
+    def reset(self, indices=None, spawn_lines=None):
+        """
+        Reset diari dels mons indicats (tots per defecte), opcionalment amb una línia
+        de spawn per a cadascun. Retorna les observacions de tots els mons.
+        """
+        if indices is None:
+            indices = range(len(self.managers))
+        indices = list(indices)
+        if spawn_lines is not None and len(spawn_lines) != len(indices):
+            raise ValueError("spawn_lines ha de tenir una línia per cada món a reiniciar")
+
+        for n, i in enumerate(indices):
+            manager = self.managers[i]
+            if spawn_lines is not None:
+                manager.current_spawn_line = spawn_lines[n]
+            manager.reset_day()
+            self.dones[i] = False
+        return self.observations()
+
+    def step(self):
+        """Avança un tick tots els mons no acabats. Retorna (observacions, recompenses, dones)."""
+        dt = self.dt_minutes
+        rewards = np.zeros(len(self.managers), dtype=np.float64)
+        running = [i for i in range(len(self.managers)) if not self.dones[i]]
+
+        # Rellotge i spawn de tots els mons (no depenen de l'agent), i després els trens, món a món
+        for i in running:
+            self.managers[i].begin_tick(dt)
+        batch = DecisionBatch(self.brain, dt)
+        for i in running:
+            self.managers[i].visit_batched(batch, dt)
+        batch.flush()
+
+        for i in running:
+            manager = self.managers[i]
+            rewards[i] = batch.rewards[manager]
+            if manager.sim_time >= self.minutes_per_day:
+                self.dones[i] = True
+
+        return self.observations(), rewards, self.dones.copy()
+
+    def observations(self):
+        obs = np.zeros((len(self.managers), self.OBS_SIZE), dtype=np.float64)
+        for i, manager in enumerate(self.managers):
+            trains = manager.active_trains
+            obs[i, 0] = manager.sim_time
+            obs[i, 1] = len(trains)
+            if trains:
+                obs[i, 2] = np.mean([abs(t.calculate_delay()) for t in trains])
+        return obs
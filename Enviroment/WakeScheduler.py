@@ -0,0 +1,354 @@
+import heapq
+from itertools import count
+
+
+class _Sleep:
+    """Registre d'un tren adormit: des de quin tick dorm, amb quin dt i per quin motiu."""
+    __slots__ = ("train", "seq", "kind", "since_tick", "dt")
+
+    def __init__(self, train, seq, kind, since_tick, dt):
+        self.train = train
+        self.seq = seq
+        self.kind = kind
+        self.since_tick = since_tick
+        self.dt = dt
+
+
+class WakeScheduler:
+    """
+    Planificador de despertars: els trens que no faran res fins a un cert moment
+    o fins a un cert esdeveniment deixen de visitar-se a cada tick.
+
+    Motius per adormir un tren (sempre després d'haver-lo actualitzat):
+    - TIMER: parat a l'estació (is_waiting) i el wait_timer encara no s'esgotarà al pròxim tick.
+      Es desperta (heap de temporitzadors) al tick en què s'esgota.
+    - TRACK: l'últim intent de sortir de l'estació no ha trobat via segura. Es desperta quan
+      canvia l'ocupació de les vies del tram següent (o les seves inverses) o els obstacles.
+    - PLATFORM: esperant plaça a l'estació de destí (Node.has_capacity). Es desperta quan
+      l'estació allibera una plaça (Node.exit_station).
+
+    En despertar, es reprodueixen els ticks que s'ha saltat (rellotge, temporitzador i
+    reintents fallits) amb les mateixes operacions que faria Train.perceive, i els trens
+    es visiten en el mateix ordre que active_trains, de manera que el resultat és idèntic
+    al de visitar-los tots.
+
+    Amb fast_forward, els trens que circulen a velocitat màxima per via lliure entren en
+    creuer: durant els ticks calculats per Train.cruise_horizon només avancen (Train.cruise),
+    sense percepció ni agent. Continuen visitant-se en ordre perquè la resta de trens els
+    vegin moure's igual. El creuer s'acaba abans si entra algú davant a la via, a la via
+    inversa o a la següent via vigilada, o si canvien els obstacles.
+    El resultat és idèntic al de visitar-los tots només si l'agent no aprèn i decideix sense
+    atzar: durant el creuer no se'l consulta, i QLearningAgent.action consumeix números
+    aleatoris a cada crida (exploració i desempats), de manera que els desempats posteriors
+    canvien. Per a l'entrenament és una aproximació.
+    """
+
+    TIMER = "timer"
+    TRACK = "track"
+    PLATFORM = "platform"
+
+    def __init__(self, manager, fast_forward=False):
+        self.manager = manager
+        self.fast_forward = fast_forward
+        self.tick = 0
+        self.dt = None
+
+        self._seq = count()
+        self._seqs = {}       # train_id -> ordre d'arribada (el d'active_trains)
+        self._awake = {}      # seq -> tren
+        self._sleeping = {}   # train_id -> _Sleep
+        self._timers = []     # heap de (tick_despertar, seq, tick_adormit, train_id)
+        self._edge_watchers = {}   # Edge -> {train_id}
+        self._node_watchers = {}   # Node -> {train_id}
+        self._track_watchers = set()
+
+        # Creuer: train_id -> [ticks_restants, mira_seguent_via, dt, vies_vigilades]
+        self._cruising = {}
+        self._cruise_watchers = {}  # Edge -> {train_id: via_pròpia}
+
+        # Estat de la passada del tick actual
+        self._in_pass = False
+        self._pass_started = False
+        self._current_seq = -1
+        self._heap = []
+
+    # ------------------------------------------------------------------
+    # Registre de trens
+    # ------------------------------------------------------------------
+
+    def add(self, train):
+        seq = next(self._seq)
+        self._seqs[train.id] = seq
+        self._awake[seq] = train
+
+    def forget(self, train):
+        seq = self._seqs.pop(train.id, None)
+        if seq is not None:
+            self._awake.pop(seq, None)
+        self._sleeping.pop(train.id, None)
+        self._end_cruise(train.id)
+
+    def clear(self):
+        """Oblida tots els trens (reset de la simulació)."""
+        self._seqs.clear()
+        self._awake.clear()
+        self._sleeping.clear()
+        self._timers.clear()
+        self._edge_watchers.clear()
+        self._node_watchers.clear()
+        self._track_watchers.clear()
+        self._cruising.clear()
+        self._cruise_watchers.clear()
+        self._heap = []
+
+    def __len__(self):
+        return len(self._seqs)
+
+    @property
+    def sleeping_count(self):
+        return len(self._sleeping)
+
+    @property
+    def cruising_count(self):
+        return len(self._cruising)
+
+    def _sync(self, trains):
+        """Si active_trains s'ha modificat per fora (afegits o treure trens), es resincronitza."""
+        ids = {t.id for t in trains}
+        for train_id in [tid for tid in self._seqs if tid not in ids]:
+            seq = self._seqs.pop(train_id)
+            self._awake.pop(seq, None)
+            self._sleeping.pop(train_id, None)
+            self._end_cruise(train_id)
+        for t in trains:
+            if t.id not in self._seqs:
+                self.add(t)
+
+    # ------------------------------------------------------------------
+    # Tick
+    # ------------------------------------------------------------------
+
+    def begin_tick(self, dt_minutes, trains):
+        """Inici del tick: desperta els temporitzadors vençuts (i tothom si canvia el dt)."""
+        self.tick += 1
+        self._pass_started = False
+        if len(self._seqs) != len(trains):
+            self._sync(trains)
+
+        if self.dt is not None and dt_minutes != self.dt:
+            for train_id in list(self._sleeping):
+                self._wake(train_id)
+        self.dt = dt_minutes
+
+        while self._timers and self._timers[0][0] <= self.tick:
+            _, _, since_tick, train_id = heapq.heappop(self._timers)
+            sleep = self._sleeping.get(train_id)
+            # Només si és el mateix son (no un d'anterior ja despertat per un altre motiu)
+            if sleep is not None and sleep.kind == self.TIMER and sleep.since_tick == since_tick:
+                self._wake(train_id)
+
+    def visit(self):
+        """Trens a actualitzar en aquest tick, en l'ordre d'active_trains."""
+        self._heap = list(self._awake)
+        heapq.heapify(self._heap)
+        self._in_pass = self._pass_started = True
+        try:
+            while self._heap:
+                seq = heapq.heappop(self._heap)
+                train = self._awake.get(seq)
+                if train is None: continue
+                self._current_seq = seq
+                yield train
+        finally:
+            self._in_pass = False
+            self._current_seq = -1
+
+    # ------------------------------------------------------------------
+    # Adormir i despertar
+    # ------------------------------------------------------------------
+
+    def maybe_sleep(self, train):
+        """Adorm el tren si els pròxims ticks no hi farà res (vegeu els motius a la classe)."""
+        if train.finished or train.id not in self._seqs or train.id in self._sleeping:
+            return
+        dt = self.dt
+
+        if train.is_waiting:
+            if train.track_blocked:
+                self._sleep(train, self.TRACK)
+                return
+            # Ticks fins que s'esgoti el temporitzador (amb les mateixes restes que perceive)
+            wait, ticks = train.wait_timer, 0
+            while wait > 0:
+                wait -= dt
+                ticks += 1
+            if ticks > 1:
+                sleep = self._sleep(train, self.TIMER)
+                heapq.heappush(self._timers, (self.tick + ticks, sleep.seq, self.tick, train.id))
+            return
+
+        target = train.target
+        if target and train.total_distance - train.distance_covered < 0.05 and not target.has_capacity():
+            self._sleep(train, self.PLATFORM)
+
+    def wake_all(self):
+        """
+        Desperta tots els trens i acaba tots els creuers, de manera que l'estat de cada
+        tren està al dia (p. ex. abans de fer-ne un snapshot, vegeu SimulationSnapshot).
+        """
+        for train_id in list(self._sleeping):
+            self._wake(train_id)
+        for train_id in list(self._cruising):
+            self._end_cruise(train_id)
+
+    def _sleep(self, train, kind):
+        seq = self._seqs[train.id]
+        del self._awake[seq]
+        sleep = self._sleeping[train.id] = _Sleep(train, seq, kind, self.tick, self.dt)
+
+        if kind == self.TRACK:
+            idx = train.current_node_idx + 1
+            u, v = train.route_nodes[idx], train.route_nodes[idx + 1]
+            for track in (0, 1):
+                edge = self.manager.edge_between(u, v, track)
+                if edge is None: continue
+                self._edge_watchers.setdefault(edge, set()).add(train.id)
+                if edge.inverse_edge is not None:
+                    self._edge_watchers.setdefault(edge.inverse_edge, set()).add(train.id)
+            self._track_watchers.add(train.id)
+        elif kind == self.PLATFORM:
+            self._node_watchers.setdefault(train.target, set()).add(train.id)
+        return sleep
+
+    def _wake(self, train_id):
+        sleep = self._sleeping.pop(train_id, None)
+        if sleep is None:
+            return
+
+        # Tick en què el tren tornarà a actualitzar-se
+        if self._in_pass:
+            wake_tick = self.tick if sleep.seq > self._current_seq else self.tick + 1
+        else:
+            wake_tick = self.tick if not self._pass_started else self.tick + 1
+        self._replay(sleep, wake_tick - sleep.since_tick - 1)
+
+        self._awake[sleep.seq] = sleep.train
+        if self._in_pass and wake_tick == self.tick:
+            heapq.heappush(self._heap, sleep.seq)
+
+    def _replay(self, sleep, ticks):
+        """Aplica al tren els ticks que ha dormit, igual que els hauria fet Train.perceive."""
+        train, dt = sleep.train, sleep.dt
+        if ticks <= 0:
+            return
+        if sleep.kind == self.PLATFORM:
+            train.current_speed = 0.0
+            sim_time = train.sim_time
+            for _ in range(ticks):
+                sim_time += dt
+            train.sim_time = sim_time
+            return
+
+        sim_time, wait = train.sim_time, train.wait_timer
+        for _ in range(ticks):
+            sim_time += dt
+            wait -= dt
+            # Reintent fallit: res ha canviat des de l'últim
+            if wait <= 0 and sleep.kind == self.TRACK:
+                wait = 0.5
+        train.sim_time, train.wait_timer = sim_time, wait
+
+    # ------------------------------------------------------------------
+    # Creuer (fast_forward)
+    # ------------------------------------------------------------------
+
+    def maybe_cruise(self, train):
+        """Posa el tren en creuer si va a velocitat màxima per via lliure (vegeu Train.cruise_horizon)."""
+        if not self.fast_forward or train.finished or train.id in self._sleeping or train.id in self._cruising:
+            return
+        ticks, watch_next = train.cruise_horizon(self.dt)
+        if ticks < 2:
+            return
+        edge = train.current_edge
+        watched = [(edge, True)]
+        if edge.inverse_edge is not None:
+            watched.append((edge.inverse_edge, False))
+        if watch_next:
+            next_edge = train._next_route_edge()
+            if next_edge is not None:
+                watched.append((next_edge, False))
+
+        for e, own_edge in watched:
+            self._cruise_watchers.setdefault(e, {})[train.id] = own_edge
+        self._cruising[train.id] = [ticks, watch_next, self.dt, [e for e, _ in watched]]
+
+    def is_cruising(self, train):
+        return train.id in self._cruising
+
+    def cruise(self, train, dt_minutes):
+        """
+        Fa el pas de creuer del tren si encara hi és. Retorna False si el tren
+        ha de fer el tick complet (no és en creuer o el creuer s'ha acabat).
+        """
+        cruise = self._cruising.get(train.id)
+        if cruise is None:
+            return False
+        if dt_minutes != cruise[2] or not train.can_cruise(dt_minutes, cruise[1]):
+            self._end_cruise(train.id)
+            return False
+        train.cruise(dt_minutes)
+        cruise[0] -= 1
+        if cruise[0] <= 0:
+            self._end_cruise(train.id)
+        return True
+
+    def _end_cruise(self, train_id):
+        cruise = self._cruising.pop(train_id, None)
+        if cruise is None:
+            return
+        for edge in cruise[3]:
+            cruisers = self._cruise_watchers.get(edge)
+            if cruisers is not None:
+                cruisers.pop(train_id, None)
+                if not cruisers: del self._cruise_watchers[edge]
+        seq = self._seqs.get(train_id)
+        train = self._awake.get(seq) if seq is not None else None
+        if train is not None:
+            # El que hauria deixat l'últim tick complet per a la recompensa del següent
+            train.last_known_delay = train.calculate_delay()
+
+    # ------------------------------------------------------------------
+    # Esdeveniments
+    # ------------------------------------------------------------------
+
+    def watches(self, edges):
+        """Si canviar l'ocupació d'alguna d'aquestes vies despertaria un tren adormit."""
+        return any(edge in self._edge_watchers for edge in edges)
+
+    def edge_changed(self, edge):
+        watchers = self._edge_watchers.pop(edge, None)
+        if watchers:
+            for train_id in watchers:
+                self._wake(train_id)
+
+        cruisers = self._cruise_watchers.get(edge)
+        if cruisers:
+            occupancy = self.manager._train_positions.get(edge)
+            for train_id, own_edge in list(cruisers.items()):
+                # A la via pròpia només importa que algú quedi davant (els de darrere no molesten)
+                if own_edge and (occupancy is None or occupancy.leader(train_id) is None):
+                    continue
+                self._end_cruise(train_id)
+
+    def station_freed(self, node):
+        watchers = self._node_watchers.pop(node, None)
+        if watchers:
+            for train_id in watchers:
+                self._wake(train_id)
+
+    def obstacles_changed(self):
+        watchers, self._track_watchers = self._track_watchers, set()
+        for train_id in watchers:
+            self._wake(train_id)
+        for train_id in list(self._cruising):
+            self._end_cruise(train_id)
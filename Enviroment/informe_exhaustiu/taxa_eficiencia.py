@@ -1,15 +1,20 @@
 import os
-import pandas as pd
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 
-# Carrega el CSV
 base_dir = os.path.dirname(os.path.abspath(__file__))
-file_path = os.path.join(base_dir, 'FULL_DATA_Personalitzat_a0.1.csv')
-df = pd.read_csv(file_path, sep=';')
+sys.path.insert(0, os.path.dirname(os.path.dirname(base_dir)))
+from Enviroment.TripLog import TripLog
 
-total_records = len(df)
-count_on_time = len(df[df['Estat'] == 'PUNTUAL'])
-count_advanced = len(df[df['Estat'] == 'AVANÇAT'])
+# Carrega el registre de trajectes (vegeu TripLog); retard NaN = el tren no hi ha arribat
+file_path = os.path.join(base_dir, 'TRIPS_Personalitzat_a0.1.bin')
+rows, _ = TripLog.read(file_path)
+delay = np.asarray(rows['delay'])
+
+total_records = len(delay)
+count_on_time = int(((delay >= -2) & (delay <= 2)).sum())
+count_advanced = int((delay < -2).sum())
 count_others = total_records - count_on_time - count_advanced
 
 efficiency_rate = (count_on_time / total_records) * 100 if total_records else 0.0
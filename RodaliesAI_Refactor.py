@@ -1,6 +1,7 @@
 import pygame
 import sys
 import traceback
+from Enviroment.Profiler import Profiler
 from Enviroment.TrafficManager import TrafficManager
 
 class RodaliesAI:
@@ -17,6 +18,8 @@ class RodaliesAI:
     # Configuració global de la simulació
     TIME_SCALE = 5.0  # Factor de temps: 1 segon real = 10 minuts simulats
     FPS = 60
+    EVENT_LOG_PATH = None  # Fitxer on desar tots els esdeveniments de la simulació (vegeu EventLog)
+    GTFS_FILE = None  # Zip GTFS amb l'horari real; None = un tren per línia cada SPAWN_INTERVAL
 
     def __init__(self):
         """
@@ -35,8 +38,13 @@ class RodaliesAI:
 
         # El TrafficManager s'encarrega de carregar CSVs, crear nodes, 
         # vies i gestionar la lògica dels trens.
-        self.manager = TrafficManager(self.width, self.height)
+        self.manager = TrafficManager(self.width, self.height, event_log_path=self.EVENT_LOG_PATH)
+        if self.GTFS_FILE:
+            self.manager.load_timetable(self.GTFS_FILE)
         
+        # Perfil per fases (tecla P per activar/desactivar, vegeu Profiler)
+        self.profiler = Profiler()
+
         print("Sistema iniciat, control delegat a TrafficManager.")
 
 
@@ -84,6 +92,16 @@ class RodaliesAI:
                     if hasattr(self.manager, 'brain'):
                         self.manager.brain.debug_qtable_stats()
 
+                # Perfil per fases: en desactivar-lo s'imprimeix el temps de cada fase
+                if event.key == pygame.K_p:
+                    if self.profiler.enabled:
+                        self.profiler.end_day()
+                        self.profiler.disable()
+                        print(f"Perfil: {self.profiler.report(len(self.profiler.history) - 1)}")
+                    else:
+                        self.profiler.enable()
+                        print("Perfil activat (P per aturar-lo i veure'l)")
+
     def _draw(self):
         # Importem l'Enum aquí per poder comprovar el tipus d'aresta (OBSTACLE vs NORMAL)
         from Enviroment.EdgeType import EdgeType
@@ -141,6 +159,7 @@ class RodaliesAI:
         if hasattr(self, 'manager'):
             print("Guardant estat del cervell (Q-Learning)...")
             self.manager.save_brain()
+            self.manager.events.drain()
         
         pygame.quit()
         sys.exit()
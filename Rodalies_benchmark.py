@@ -0,0 +1,316 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from Agent.QlearningAgent import QLearningAgent
+from Agent.DenseQTable import DenseQTable
+from Enviroment.Datas import Datas
+from Enviroment.SyntheticNetwork import SyntheticNetwork
+from Enviroment.TrafficManager import TrafficManager
+from Rodalies_training import RodaliesTraining
+
+
+class RodaliesBenchmark:
+    """
+    Banc de proves de rendiment del simulador i de l'agent, sempre amb la mateixa llavor i
+    el mateix escenari d'incidències, per poder comparar execucions entre si.
+
+    Mesura:
+    1. startup: temps de construcció del TrafficManager (sense i amb la xarxa compilada a disc).
+    2. simulation: minuts simulats per segon de TrafficManager.update, per a cada densitat
+       de trànsit (SPAWN_INTERVAL) i cada línia del curriculum (_setup_curriculum).
+    3. agent: decisions per segon de QLearningAgent.action/update (i les versions per lots)
+       sobre estats reals de la simulació, per a cada backend de Q-Table.
+    4. qtable: temps de save_table/load_table per a diferents mides de Q-Table.
+    5. scaling: arrencada i minuts simulats per segon sobre xarxes sintètiques cada cop més
+       grans (vegeu SyntheticNetwork), amb trens a totes les línies.
+
+    Els resultats es guarden en JSON (RESULTS_FILE) i es comparen amb la línia base
+    (BASELINE_FILE), si existeix. Cada mètrica indica si més és millor.
+    """
+
+    # === Parametres Globals ===
+    OUTPUT_DIR = "Enviroment/informe_exhaustiu/benchmarks"
+    RESULTS_FILE = "benchmark_latest.json"
+    BASELINE_FILE = "benchmark_baseline.json"
+
+    SEED = 1234
+    DT_STEP = 2.0
+    SIM_MINUTES = 360      # Minuts simulats per cada mesura de simulació
+    REPEATS = 3            # Repeticions de les mesures curtes (es guarda la mediana)
+
+    # Densitat de trànsit: minuts entre spawns (TrafficManager.SPAWN_INTERVAL)
+    DENSITIES = {"light": 60, "normal": 30, "peak": 10}
+
+    # Agent
+    DECISIONS = 20000
+    BATCH_SIZE = 64
+
+    # Mides de Q-Table en entrades (estat, acció). La taula completa té 7560 estats x 4 accions.
+    QTABLE_SIZES = (1000, 10000, 30240)
+
+    # Xarxes sintètiques: (estacions, línies, branques per línia)
+    SCALING_NETWORKS = ((25, 1, 0), (100, 4, 0), (400, 8, 1), (1600, 16, 1))
+
+    # Canvi relatiu per sota del qual una diferència amb la línia base es considera soroll
+    TOLERANCE = 0.10
+
+    SUITES = ("startup", "simulation", "agent", "qtable", "scaling")
+
+    def __init__(self):
+        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
+        self.metrics = {}
+        self._trainer = RodaliesTraining()
+
+    def _add(self, name, value, unit, higher_is_better):
+        self.metrics[name] = {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+        print(f"   {name:45} {value:12.4f} {unit}")
+
+    def _median_time(self, fn):
+        times = []
+        for _ in range(self.REPEATS):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    """
+    ############################################################################################
+    ############################################################################################
+
+    Mesures
+
+    ############################################################################################
+    ############################################################################################
+    """
+
+    def bench_startup(self):
+        print("\n>>> STARTUP <<<")
+        cold = self._median_time(lambda: TrafficManager(is_training=True, network_cache=False, seed=self.SEED))
+        self._add("startup.cold", cold, "s", False)
+
+        # La primera construcció deixa la xarxa compilada a disc
+        TrafficManager(is_training=True, seed=self.SEED)
+        warm = self._median_time(lambda: TrafficManager(is_training=True, seed=self.SEED))
+        self._add("startup.cached", warm, "s", False)
+
+    def _new_world(self, line, spawn_interval):
+        """Món de prova: llavor, escenari i agent fixos, amb la línia i la densitat donades."""
+        manager = TrafficManager(is_training=True, seed=self.SEED)
+        self._trainer._setup_curriculum(manager)
+        manager.brain = QLearningAgent(epsilon=0.1, seed=self.SEED)
+        manager.load_scenario(manager.generate_scenario(self.SIM_MINUTES, seed=self.SEED))
+        manager.SPAWN_INTERVAL = spawn_interval
+        manager.current_spawn_line = line
+        manager.reset_day()
+        return manager
+
+    def _curriculum_lines(self):
+        return self._trainer._setup_curriculum(TrafficManager(is_training=True, seed=self.SEED))
+
+    def bench_simulation(self):
+        print("\n>>> SIMULATION <<<")
+        ticks = int(self.SIM_MINUTES // self.DT_STEP)
+        for line in self._curriculum_lines():
+            for density, interval in self.DENSITIES.items():
+                manager = self._new_world(line, interval)
+                start = time.perf_counter()
+                for _ in range(ticks):
+                    manager.update(self.DT_STEP)
+                elapsed = time.perf_counter() - start
+                self._add(f"simulation.{density}.{line}", ticks * self.DT_STEP / elapsed, "sim_min/s", True)
+
+    def _sample_states(self):
+        """Estats reals de l'agent, recollits dels trens d'una simulació de la línia sencera."""
+        lines = self._curriculum_lines()
+        manager = self._new_world(lines[-1], self.DENSITIES["normal"])
+        states = []
+        while len(states) < self.DECISIONS and manager.sim_time < self.SIM_MINUTES:
+            manager.update(self.DT_STEP)
+            for t in manager.active_trains:
+                if t.is_waiting or t.finished or not t.current_edge: continue
+                _, dist_leader, dist_oncoming, _ = t.sense()
+                states.append(t._get_general_state(dist_leader, dist_oncoming))
+        if not states:
+            raise RuntimeError("La simulació de mostra no ha generat cap estat")
+        return list(itertools.islice(itertools.cycle(states), self.DECISIONS))
+
+    def bench_agent(self):
+        print("\n>>> AGENT <<<")
+        states = self._sample_states()
+        n = len(states)
+
+        for backend in QLearningAgent.BACKENDS:
+            agent = QLearningAgent(epsilon=0.1, backend=backend, seed=self.SEED)
+
+            start = time.perf_counter()
+            actions = [agent.action(s) for s in states]
+            self._add(f"agent.{backend}.action", n / (time.perf_counter() - start), "decisions/s", True)
+
+            transitions = [(s, a, -0.1, s2) for s, a, s2 in zip(states, actions, states[1:] + [None])]
+            start = time.perf_counter()
+            for s, a, r, s2 in transitions:
+                agent.update(s, a, r, s2)
+            self._add(f"agent.{backend}.update", n / (time.perf_counter() - start), "decisions/s", True)
+
+            batches = [states[i:i + self.BATCH_SIZE] for i in range(0, n, self.BATCH_SIZE)]
+            start = time.perf_counter()
+            for batch in batches:
+                agent.action_batch(batch)
+            self._add(f"agent.{backend}.action_batch", n / (time.perf_counter() - start), "decisions/s", True)
+
+            start = time.perf_counter()
+            for i in range(0, n, self.BATCH_SIZE):
+                agent.update_batch(transitions[i:i + self.BATCH_SIZE])
+            self._add(f"agent.{backend}.update_batch", n / (time.perf_counter() - start), "decisions/s", True)
+
+    def _synthetic_table(self, size):
+        """{(estat, acció): valor} amb `size` entrades de l'espai d'estats real, sempre les mateixes."""
+        rng = np.random.default_rng(self.SEED)
+        keys = [
+            (state, a)
+            for state in itertools.product(*(range(d) for d in DenseQTable.STATE_DIMS))
+            for a in Datas.AGENT_ACTIONS
+        ]
+        picks = rng.permutation(len(keys))[:size]
+        values = rng.normal(0.0, 10.0, len(picks))
+        return {keys[i]: v for i, v in zip(picks.tolist(), values.tolist())}
+
+    def bench_qtable(self):
+        print("\n>>> Q-TABLE SAVE/LOAD <<<")
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in self.QTABLE_SIZES:
+                data = self._synthetic_table(size)
+                for backend in QLearningAgent.BACKENDS:
+                    agent = QLearningAgent(backend=backend, seed=self.SEED)
+                    agent.q = agent._new_table(data)
+                    path = os.path.join(tmp, f"q_{backend}_{size}.pkl")
+
+                    self._add(f"qtable.{backend}.save.{size}", self._median_time(lambda: agent.save_table(path)), "s", False)
+                    self._add(f"qtable.{backend}.load.{size}", self._median_time(lambda: agent.load_table(path)), "s", False)
+
+    def bench_scaling(self):
+        print("\n>>> SCALING (XARXES SINTÈTIQUES) <<<")
+        ticks = int(self.SIM_MINUTES // self.DT_STEP)
+        for n_stations, n_lines, branches in self.SCALING_NETWORKS:
+            network = SyntheticNetwork.generate(n_stations, n_lines, branches, seed=self.SEED)
+            label = f"{n_stations}st_{n_lines}l_{branches}b"
+
+            start = time.perf_counter()
+            manager = TrafficManager(is_training=True, seed=self.SEED, network=network)
+            self._add(f"scaling.startup.{label}", time.perf_counter() - start, "s", False)
+
+            manager.brain = QLearningAgent(epsilon=0.1, seed=self.SEED)
+            manager.load_scenario(manager.generate_scenario(self.SIM_MINUTES, seed=self.SEED))
+            manager.reset_day()
+            start = time.perf_counter()
+            for _ in range(ticks):
+                manager.update(self.DT_STEP)
+            elapsed = time.perf_counter() - start
+            self._add(f"scaling.simulation.{label}", ticks * self.DT_STEP / elapsed, "sim_min/s", True)
+
+    """
+    ############################################################################################
+    ############################################################################################
+
+    Resultats i línia base
+
+    ############################################################################################
+    ############################################################################################
+    """
+
+    def run(self, suites=None):
+        """Executa les proves indicades (totes per defecte) i guarda els resultats. Retorna el camí del fitxer."""
+        suites = self.SUITES if suites is None else suites
+        for suite in suites:
+            getattr(self, f"bench_{suite}")()
+
+        results = {
+            "meta": {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": self.SEED,
+                "sim_minutes": self.SIM_MINUTES,
+                "dt_step": self.DT_STEP,
+                "suites": list(suites),
+            },
+            "metrics": self.metrics,
+        }
+        path = os.path.join(self.OUTPUT_DIR, self.RESULTS_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n[Benchmark] Resultats guardats a '{path}'")
+        return path
+
+    def save_baseline(self, results_path=None):
+        """Fa que uns resultats (els últims per defecte) siguin la línia base de les comparacions."""
+        results_path = results_path or os.path.join(self.OUTPUT_DIR, self.RESULTS_FILE)
+        baseline_path = os.path.join(self.OUTPUT_DIR, self.BASELINE_FILE)
+        with open(results_path, encoding="utf-8") as f:
+            results = json.load(f)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[Benchmark] Línia base actualitzada: '{baseline_path}'")
+
+    def compare(self, results_path=None, baseline_path=None):
+        """
+        Compara uns resultats amb la línia base. Per a cada mètrica comuna, speedup > 1 vol dir
+        millor que la línia base (més ràpid o més throughput).
+
+        :return: Diccionari {mètrica: speedup}, o None si no hi ha línia base.
+        """
+        results_path = results_path or os.path.join(self.OUTPUT_DIR, self.RESULTS_FILE)
+        baseline_path = baseline_path or os.path.join(self.OUTPUT_DIR, self.BASELINE_FILE)
+        if not os.path.exists(baseline_path):
+            print(f"[Benchmark] No hi ha línia base ('{baseline_path}'). Guarda-la amb --save-baseline.")
+            return None
+
+        with open(results_path, encoding="utf-8") as f:
+            current = json.load(f)["metrics"]
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+
+        print("\n>>> COMPARACIÓ AMB LA LÍNIA BASE <<<")
+        speedups = {}
+        for name, metric in current.items():
+            base = baseline.get(name)
+            if base is None or base["value"] <= 0 or metric["value"] <= 0: continue
+            if metric["higher_is_better"]:
+                speedup = metric["value"] / base["value"]
+            else:
+                speedup = base["value"] / metric["value"]
+            speedups[name] = speedup
+
+            if speedup < 1 - self.TOLERANCE: verdict = "PITJOR"
+            elif speedup > 1 + self.TOLERANCE: verdict = "MILLOR"
+            else: verdict = "="
+            print(f"   {name:45} x{speedup:6.2f}  {verdict}")
+
+        missing = sorted(set(baseline) - set(current))
+        if missing:
+            print(f"   (sense mesura actual: {', '.join(missing)})")
+        return speedups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de proves de rendiment de RODI AI")
+    parser.add_argument("--only", nargs="+", choices=RodaliesBenchmark.SUITES,
+                        help="Executa només aquestes proves")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guarda els resultats d'aquesta execució com a línia base")
+    args = parser.parse_args()
+
+    bench = RodaliesBenchmark()
+    bench.run(args.only)
+    bench.compare()
+    if args.save_baseline:
+        bench.save_baseline()
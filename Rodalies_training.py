@@ -1,15 +1,29 @@
 import time
 import os
+import traceback
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Imports del teu entorn
+from Enviroment.Profiler import Profiler
 from Enviroment.TrafficManager import TrafficManager
-from Enviroment.Train import Train
+from Enviroment.TripLog import TripLog
+from Enviroment.VectorEnv import VectorEnv
 from Agent.QlearningAgent import QLearningAgent
 
+
+def _pyplot():
+    """
+    Importa matplotlib només quan es genera un gràfic, amb un backend sense finestra,
+    perquè els processos que només simulen no el carreguin.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
 class RodaliesTraining:
     """
     Classe encarregada de gestionar l'entrenament intensiu. SENSE INTERFÍCIE GRÀFICA.
@@ -30,6 +44,43 @@ class RodaliesTraining:
     MINUTES_PER_DAY = 1440 
     SAVE_INTERVAL = 1000      
 
+    # Backend de la Q-Table de l'agent ("dict" o "dense", vegeu QLearningAgent.BACKENDS)
+    Q_BACKEND = "dict"
+
+    # Decisions per lots: un sol action_batch/update_batch per tick (vegeu TrafficManager.batched)
+    BATCHED_DECISIONS = False
+
+    # Física vectoritzada amb NumPy (vegeu TrainPhysics). Implica decisions per lots.
+    VECTORIZED_PHYSICS = False
+
+    # Trens aturats o bloquejats adormits fins que cal despertar-los (vegeu WakeScheduler)
+    EVENT_DRIVEN = False
+
+    # Trens en creuer per via lliure avançats sense percepció ni agent (vegeu WakeScheduler). Implica EVENT_DRIVEN.
+    FAST_FORWARD = False
+
+    # Mons simulats alhora amb un sol agent (vegeu VectorEnv): cada pas d'entrenament simula WORLDS dies.
+    # Amb més d'un món, els mons van en mode per lots.
+    WORLDS = 1
+
+    # Llavor de l'experiment (None = aleatòria). Cada món i l'agent en reben un flux independent.
+    SEED = None
+
+    # Fitxer d'escenari d'incidències a reproduir a cada dia (vegeu Scenario). None = sense escenari.
+    SCENARIO_FILE = None
+
+    # Temps i crides per fase del bucle de simulació, per dia, al costat de l'ETA (vegeu Profiler)
+    PROFILE = False
+
+    # Pas per estació de cada tren a OUTPUT_DIR/TRIPS_<label>.bin (vegeu TripLog), comprimit amb gzip o no.
+    # Sense comprimir, els informes el poden llegir amb np.memmap sense carregar-lo.
+    TRIP_LOG_COMPRESS = False
+    # A més, el CSV FULL_DATA_<label>.csv (llegible amb Excel o pandas) generat a partir del registre
+    SAVE_FULL_CSV = True
+
+    # Nombre de processos per al Grid Search paral·lel (None = un per configuració, fins al nombre de cores)
+    GRID_WORKERS = None
+
 
     # Convergencia de la Q-Table
     CONVERGENCE_INTERVAL_DAYS = 100
@@ -44,8 +95,16 @@ class RodaliesTraining:
         {'alpha': 0.1,  'gamma': 0.99, 'epsilon_decay': 0.8,  'label': 'Personalitzat (a=0.1)'}
     ]
 
-    def __init__(self):
-        """Inicialitza l'entorn de treball i crea els directoris necessaris."""
+    def __init__(self, **config):
+        """
+        Inicialitza l'entorn de treball i crea els directoris necessaris.
+
+        :param config: Valors que substitueixen els de la classe (p. ex. TOTAL_DAYS=100), vegeu _config.
+        """
+        for name, value in config.items():
+            if not name.isupper() or not hasattr(self, name):
+                raise AttributeError(f"RodaliesTraining no té l'opció de configuració {name}")
+            setattr(self, name, value)
         os.makedirs(self.OUTPUT_DIR, exist_ok=True)
         os.makedirs(self.PLOTS_DIR, exist_ok=True)
         os.makedirs(self.BRAINS_DIR, exist_ok=True)
@@ -109,141 +168,213 @@ class RodaliesTraining:
     #TEMPS PAS MES RAPID
     DT_STEP = 2.0
 
-    def run_experiment(self, params):
+    def run_experiment(self, params, brain_name="q_table"):
         """
         Executa UNA simulació completa (8000 dies) amb uns paràmetres concrets.
         
         :param params: Diccionari amb alpha, gamma, epsilon_decay i label.
-        :return: Tupla (historial_retards, logs_trens, manager_final).
+        :param brain_name: Nom base dels fitxers de la Q-Table (.pkl i .json) dins de BRAINS_DIR.
+        :return: Tupla (historial_retards, registre de trajectes (TripLog), manager_final).
         """
         print(f"\n>>> INICIANT EXPERIMENT: {params['label']} <<<")
 
         safe_label = params['label'].replace(' ', '_').replace('(', '').replace(')', '').replace('=', '')
         
-        brain_filename = f"q_table.pkl"
-        brain_path = os.path.join(self.BRAINS_DIR, brain_filename)
-        brain_json_path = os.path.join(self.BRAINS_DIR, "q_table.json")
-
-        manager = TrafficManager(width=1000, height=1000, is_training=True)
+        brain_path = os.path.join(self.BRAINS_DIR, f"{brain_name}.pkl")
+        brain_json_path = os.path.join(self.BRAINS_DIR, f"{brain_name}.json")
+
+        worlds = max(1, int(params.get('worlds', self.WORLDS)))
+        # Fluxos aleatoris independents: un per a l'agent i un per món
+        brain_seed, *world_seeds = np.random.SeedSequence(params.get('seed', self.SEED)).spawn(worlds + 1)
+        # Només el primer món escriu el registre de trajectes
+        trip_log_path = os.path.join(self.OUTPUT_DIR, f"TRIPS_{safe_label}.bin")
+        managers = [self._new_manager(params, batched=worlds > 1, seed=s, trip_log_path=trip_log_path if i == 0 else None)
+                    for i, s in enumerate(world_seeds)]
+        manager = managers[0]
         
         initial_epsilon = 1.0
         
-        manager.brain = QLearningAgent(
+        brain = QLearningAgent(
             alpha=params['alpha'], 
             gamma=params['gamma'], 
-            epsilon=initial_epsilon 
+            epsilon=initial_epsilon,
+            backend=params.get('backend', self.Q_BACKEND),
+            seed=brain_seed
         )
+        manager.brain = brain
 
         # Intentem carregar taula prèvia si existeix
-        manager.brain.load_table(filename=brain_path)
+        brain.load_table(filename=brain_path)
         
         # 3. Setup Curriculum
         curriculum_levels = self._setup_curriculum(manager)
+        for other in managers[1:]:
+            self._setup_curriculum(other)
         days_per_level = self.TOTAL_DAYS // len(curriculum_levels)
+
+        env = VectorEnv(managers, brain, dt_minutes=self.DT_STEP, minutes_per_day=self.MINUTES_PER_DAY) if worlds > 1 else None
         
+        # Sense PROFILE no s'instal·la cap sonda
+        profiler = Profiler() if params.get('profile', self.PROFILE) else None
+        if profiler is not None:
+            profiler.enable()
+        profile_mark = 0
+
         history_avg_delay = []
         start_time = time.time()
         current_level_idx = 0
 
         # Per a la convergència de la Q-Table
         convergence_rows = []
-        prev_q_snapshot = manager.brain.qtable_snapshot()
-
-        for day in range(1, self.TOTAL_DAYS + 1):
-            
-            # Calculem quin nivell toca segons el dia actual
-            new_level_idx = min((day - 1) // days_per_level, len(curriculum_levels) - 1)
-            
-            if new_level_idx != current_level_idx or day == 1:
-                current_level_idx = new_level_idx
-                level_name = curriculum_levels[current_level_idx]
+        prev_q_snapshot = brain.qtable_snapshot()
+
+        day = 0
+        while day < self.TOTAL_DAYS:
+            # Dies d'aquest pas (un per món)
+            batch_days = range(day + 1, min(day + worlds, self.TOTAL_DAYS) + 1)
+            level_names = []
+            for batch_day in batch_days:
+                # Calculem quin nivell toca segons el dia actual
+                new_level_idx = min((batch_day - 1) // days_per_level, len(curriculum_levels) - 1)
                 
-                # Actualitzem la línia de spawn del manager
-                manager.current_spawn_line = level_name 
+                if new_level_idx != current_level_idx or batch_day == 1:
+                    current_level_idx = new_level_idx
+                    
+                    # Reset d'exploració al canviar de nivell (important per aprendre el nou tram)
+                    brain.epsilon = 1.0 
+                    print(f"\n*** [Dia {batch_day}] CURRICULUM LEVEL UP! -> {curriculum_levels[current_level_idx]} ***")
+                level_names.append(curriculum_levels[current_level_idx])
+
+            if env is None:
+                daily_avgs = [self._simulate_day(manager, level_names[0])]
+            else:
+                daily_avgs = self._simulate_days(env, level_names)
+                manager = managers[len(level_names) - 1]
+            if profiler is not None:
+                profiler.end_day(len(level_names))
+
+            for level_name, daily_avg in zip(level_names, daily_avgs):
+                day += 1
+                history_avg_delay.append(daily_avg)
+
+                if day % 100 == 0:
+                    brain.decay_epsilon(params['epsilon_decay'], min_epsilon=0.01)
                 
-                # Reset d'exploració al canviar de nivell (important per aprendre el nou tram)
-                manager.brain.epsilon = 1.0 
-                print(f"\n*** [Dia {day}] CURRICULUM LEVEL UP! -> {level_name} ***")
-
-            # RESET DIARI D'ENTORN
-            manager.active_trains.clear()
-            manager.completed_train_logs.clear()
-
-            if hasattr(TrafficManager, '_train_positions'):
-                TrafficManager._train_positions.clear()
-            
-            manager.sim_time = 0.0
-            manager.last_spawn = -manager.SPAWN_INTERVAL
-            manager.reset_network_status()
-            
-            delays_in_step = []
-            steps_per_day = int(self.MINUTES_PER_DAY // self.DT_STEP)
-
-            # Executem 1440 minuts simulats
-            for _ in range(steps_per_day):
-                manager.update(dt_minutes=self.DT_STEP) 
+                if day % 100 == 0:
+                    elapsed = time.time() - start_time
+                    days_left = self.TOTAL_DAYS - day
+                    rate = day / elapsed if elapsed > 0 else 0
+                    eta_min = (days_left / rate) / 60 if rate > 0 else 0
+                    
+                    print(f"   Dia {day:05d} [{level_name}] "
+                          f"| Eps: {brain.epsilon:.4f} | Retard: {daily_avg:.2f}m "
+                          f"| ETA: {eta_min:.1f} min")
+                    if profiler is not None:
+                        print(f"      Perfil/dia: {profiler.report(profile_mark)}")
+                        profile_mark = len(profiler.history)
+                    
+                # convergencia Qtable
+                if day % self.CONVERGENCE_INTERVAL_DAYS == 0:
+                    curr_q_snapshot = brain.qtable_snapshot()
+                    metrics = QLearningAgent.qtable_convergence_metrics(
+                        prev_q_snapshot,
+                        curr_q_snapshot,
+                        atol=self.CONVERGENCE_ATOL,
+                    )
+                    convergence_rows.append({
+                        "day": day,
+                        "level": level_name,
+                        "epsilon": float(brain.epsilon),
+                        "daily_avg_delay": float(daily_avg),
+                        **metrics,
+                    })
+                    prev_q_snapshot = curr_q_snapshot
                 
-                # Recollida de mètriques en temps real
-                if manager.active_trains:
-                    # Calculem retard absolut actual
-                    step_delays = [abs(t.calculate_delay()) for t in manager.active_trains]
-                    delays_in_step.append(np.mean(step_delays))
-            
-            daily_avg = np.mean(delays_in_step) if delays_in_step else 0
-            history_avg_delay.append(daily_avg)
 
-            if day % 100 == 0:
-                manager.brain.decay_epsilon(params['epsilon_decay'], min_epsilon=0.01)
-            
-            if day % 100 == 0:
-                elapsed = time.time() - start_time
-                days_left = self.TOTAL_DAYS - day
-                rate = day / elapsed if elapsed > 0 else 0
-                eta_min = (days_left / rate) / 60 if rate > 0 else 0
-                
-                print(f"   Dia {day:05d} [{curriculum_levels[current_level_idx]}] "
-                      f"| Eps: {manager.brain.epsilon:.4f} | Retard: {daily_avg:.2f}m "
-                      f"| ETA: {eta_min:.1f} min")
-                
-            # convergencia Qtable
-            if day % self.CONVERGENCE_INTERVAL_DAYS == 0:
-                curr_q_snapshot = manager.brain.qtable_snapshot()
-                metrics = QLearningAgent.qtable_convergence_metrics(
-                    prev_q_snapshot,
-                    curr_q_snapshot,
-                    atol=self.CONVERGENCE_ATOL,
-                )
-                convergence_rows.append({
-                    "day": day,
-                    "level": curriculum_levels[current_level_idx],
-                    "epsilon": float(manager.brain.epsilon),
-                    "daily_avg_delay": float(daily_avg),
-                    **metrics,
-                })
-                prev_q_snapshot = curr_q_snapshot
-            
+                if day % self.SAVE_INTERVAL == 0:
+                    brain.save_table(brain_path)
+                    brain.export_qtable_to_json(brain_json_path)
 
-            if day % self.SAVE_INTERVAL == 0:
-                manager.brain.save_table(brain_path)
-                manager.brain.export_qtable_to_json(brain_json_path)
+        if profiler is not None:
+            profiler.disable()
 
         # Guardat final en acabar l'experiment
-        manager.brain.save_table(brain_path)
-        manager.brain.export_qtable_to_json(brain_json_path)
+        brain.save_table(brain_path)
+        brain.export_qtable_to_json(brain_json_path)
 
         # Guardem dades de convergència
         self._save_qtable_convergence(convergence_rows, safe_label)
 
-        self._save_complete_csv(manager.completed_train_logs, params)
-        return history_avg_delay, manager.completed_train_logs, manager
+        # El registre de trajectes és el del primer món, l'únic que el desa a disc
+        trip_log = managers[0].trip_log
+        self._close_trip_log(trip_log, params)
+        return history_avg_delay, trip_log, manager
     
 
+    def _new_manager(self, params, batched=False, seed=None, trip_log_path=None):
+        manager = TrafficManager(width=1000, height=1000, is_training=True, seed=seed,
+                                 trip_log_path=trip_log_path,
+                                 trip_log_compress=params.get('trip_log_compress', self.TRIP_LOG_COMPRESS),
+                                 batched=batched or params.get('batched', self.BATCHED_DECISIONS),
+                                 vectorized=params.get('vectorized', self.VECTORIZED_PHYSICS),
+                                 event_driven=params.get('event_driven', self.EVENT_DRIVEN),
+                                 fast_forward=params.get('fast_forward', self.FAST_FORWARD))
+        scenario = params.get('scenario', self.SCENARIO_FILE)
+        if scenario is not None:
+            manager.load_scenario(scenario)
+        return manager
+
+    def _simulate_day(self, manager, level_name):
+        """Simula un dia sencer en un sol món. Retorna el retard absolut mitjà del dia."""
+        # Actualitzem la línia de spawn del manager
+        manager.current_spawn_line = level_name 
+
+        # RESET DIARI D'ENTORN
+        manager.reset_day()
+        
+        delays_in_step = []
+        steps_per_day = int(self.MINUTES_PER_DAY // self.DT_STEP)
+
+        # Executem 1440 minuts simulats (els ticks sense trens ni esdeveniments se salten)
+        ticks = 0
+        while ticks < steps_per_day:
+            ticks += manager.skip_idle_ticks(self.DT_STEP, max_ticks=steps_per_day - ticks)
+            if ticks >= steps_per_day: break
+            manager.update(dt_minutes=self.DT_STEP) 
+            ticks += 1
+            
+            # Recollida de mètriques en temps real
+            if manager.active_trains:
+                # Calculem retard absolut actual
+                step_delays = [abs(t.calculate_delay()) for t in manager.active_trains]
+                delays_in_step.append(np.mean(step_delays))
+        
+        return np.mean(delays_in_step) if delays_in_step else 0
+
+    def _simulate_days(self, env, level_names):
+        """Simula un dia per món (tants com level_names) amb VectorEnv. Retorna el retard mitjà de cada dia."""
+        indices = range(len(level_names))
+        env.reset(indices, spawn_lines=level_names)
+
+        delays_in_step = [[] for _ in indices]
+        while not env.dones[:len(level_names)].all():
+            obs, _, _ = env.step()
+            for i in indices:
+                # Recollida de mètriques en temps real (només dels mons amb trens)
+                if obs[i, 1] > 0:
+                    delays_in_step[i].append(obs[i, 2])
+
+        return [np.mean(delays) if delays else 0 for delays in delays_in_step]
+
     def _save_qtable_convergence(self, convergence_rows, safe_label):
         """Guarda un CSV i un PNG de la convergència de la Q-Table (deltas entre snapshots)."""
         if not convergence_rows:
             print("[Convergència] Sense dades (convergence_rows buit).")
             return
 
+        import pandas as pd
+        plt = _pyplot()
+
         df = pd.DataFrame(convergence_rows)
 
         # CSV
@@ -305,97 +436,84 @@ class RodaliesTraining:
             f.write(f"Estabilitat (Std Dev): {stability:.4f} min\n")
             f.write(f"Epsilon Decay Rate: {params['epsilon_decay']}\n\n")
             
-            if logs:
+            last_train = logs.last_train()
+            if len(last_train):
                 f.write(f"--- MOSTRA DE L'ÚLTIM TREN (Dia {self.TOTAL_DAYS}) ---\n")
-                last_train = logs[-1]
-                schedule = sorted(last_train['schedule'].items(), key=lambda x: x[1])
-                actuals = last_train['actuals']
-                route_map = last_train['route_map']
                 
                 f.write(f"{'ESTACIÓ':<30} | {'PREVIST':<8} | {'REAL':<8} | {'DIF'}\n")
                 f.write("-" * 65 + "\n")
-                for nid, exp in schedule:
-                    name = route_map.get(nid, "?")
-                    act = actuals.get(name)
-                    if act:
-                        diff = act - exp
-                        f.write(f"{name:<30} | {int(exp):04d}     | {int(act):04d}     | {diff:+.1f}m\n")
+                for row in last_train:
+                    name = logs.names[row['station']]
+                    exp, act = row['scheduled'], row['actual']
+                    if not np.isnan(act):
+                        f.write(f"{name:<30} | {int(exp):04d}     | {int(act):04d}     | {row['delay']:+.1f}m\n")
                     else:
                         f.write(f"{name:<30} | {int(exp):04d}     | ----     | N/A\n")
         print(f"[Informe] Guardat: {filename}")
 
-    def _save_complete_csv(self, logs, params):
+    def _close_trip_log(self, trip_log, params):
+        """
+        Escriu al fitxer les últimes files del registre de trajectes (una per parada de cada tren:
+        Tren, Dia, Estació, Ordre, Previst, Real, Retard). Es llegeix amb TripLog.read o read_frame.
+        Amb SAVE_FULL_CSV també en genera el CSV (vegeu _save_complete_csv).
         """
-        Genera un CSV massiu amb cada parada de cada tren.
-        Format: TrenID, Dia, Estació, Hora_Prevista, Hora_Real, Retard, Estat
+        trip_log.close()
+        print(f"[Informe] Registre de trajectes guardat a: {trip_log.path} ({len(trip_log)} parades)")
+        if trip_log.path is not None and params.get('save_full_csv', self.SAVE_FULL_CSV):
+            self._save_complete_csv(trip_log.path, params)
+
+    def _save_complete_csv(self, trip_log_path, params):
+        """
+        Genera un CSV massiu amb cada parada de cada tren, a partir del registre de trajectes.
+        Format: TrenID, Dia, Origen, Destí, Estació, Ordre, Hora_Prevista, Hora_Real, Retard, Estat
+        El registre es llegeix tren a tren (np.memmap), sense carregar-lo sencer a memòria.
         """
         import csv
         safe_label = params['label'].replace(' ', '_').replace('(', '').replace(')', '').replace('=', '')
         filename = f"{self.OUTPUT_DIR}/FULL_DATA_{safe_label}.csv"
-        
-        print(f"Generant CSV complet ({len(logs)} trens registrats)...")
-        
+
+        rows, names = TripLog.read(trip_log_path)
+        print(f"Generant CSV complet ({len(rows)} parades registrades)...")
+
         with open(filename, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file, delimiter=';') # Punt i coma per Excel europeu
-            
-            # Capçalera
-            writer.writerow(['Tren_ID', 'Origen_Global', 'Desti_Global', 'Estacio', 'Ordre', 'Previst', 'Real', 'Retard_Min', 'Estat'])
-            
-            for train_data in logs:
-                # Dades generals del tren
-                # Assumim que l'ID del tren pot ser llarg, agafem els últims digits o l'hash
-                t_id = train_data.get('id', 0)
-                # Reconstruim la ruta ordenada
-                schedule_map = train_data.get('schedule', {})
-                actuals_map = train_data.get('actuals', {})
-                route_names = train_data.get('route_map', {})
-                
-                # Ordenem les estacions per hora prevista per saber l'ordre
-                sorted_schedule = sorted(schedule_map.items(), key=lambda x: x[1])
-                
-                if not sorted_schedule: continue
-                
-                origin_name = route_names.get(sorted_schedule[0][0], "?")
-                dest_name = route_names.get(sorted_schedule[-1][0], "?")
-                
-                for idx, (node_id, expected_time) in enumerate(sorted_schedule):
-                    station_name = route_names.get(node_id, f"Node_{node_id}")
-                    actual_time = actuals_map.get(station_name)
-                    
-                    if actual_time:
-                        delay = actual_time - expected_time
-                        status = "PUNTUAL"
-                        if delay > 2: status = "TARD"
-                        if delay > 10: status = "MOLT TARD"
-                        if delay < -2: status = "AVANÇAT"
-                        
-                        writer.writerow([
-                            t_id, origin_name, dest_name, 
-                            station_name, idx + 1, 
-                            f"{expected_time:.2f}", f"{actual_time:.2f}", 
-                            f"{delay:.2f}", status
-                        ])
-                    else:
-                        writer.writerow([
-                            t_id, origin_name, dest_name, 
-                            station_name, idx + 1, 
-                            f"{expected_time:.2f}", "---", 
-                            "---", "CANCEL·LAT/NO ARRIBAT"
-                        ])
-                        
+            writer.writerow(['Tren_ID', 'Dia', 'Origen_Global', 'Desti_Global', 'Estacio', 'Ordre',
+                             'Previst', 'Real', 'Retard_Min', 'Estat'])
+
+            # Les files de cada tren són consecutives i comencen per l'ordre 1
+            starts = np.flatnonzero(rows['stop'] == 1)
+            ends = np.append(starts[1:], len(rows))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                train_rows = rows[start:end]
+                origin_name = names[train_rows[0]['station']]
+                dest_name = names[train_rows[-1]['station']]
+                for row in train_rows:
+                    writer.writerow(self._csv_row(row, names, origin_name, dest_name))
+
         print(f"[Informe] CSV Complet guardat a: {filename}")
 
+    @staticmethod
+    def _csv_row(row, names, origin_name, dest_name):
+        expected_time, actual_time, delay = float(row['scheduled']), float(row['actual']), float(row['delay'])
+        common = [int(row['train']), int(row['day']), origin_name, dest_name, names[row['station']], int(row['stop'])]
+        if np.isnan(actual_time):
+            return common + [f"{expected_time:.2f}", "---", "---", "CANCEL·LAT/NO ARRIBAT"]
+        status = "PUNTUAL"
+        if delay > 2: status = "TARD"
+        if delay > 10: status = "MOLT TARD"
+        if delay < -2: status = "AVANÇAT"
+        return common + [f"{expected_time:.2f}", f"{actual_time:.2f}", f"{delay:.2f}", status]
+
     def run_grid_search(self):
         """
         Mètode principal. Itera sobre totes les configuracions d'hiperparàmetres,
         executa els experiments i genera el gràfic comparatiu final.
+
+        :return: Diccionari {label: historial_retards}, com run_grid_search_parallel.
         """
         print(f"=== INICIANT GRID SEARCH EXHAUSTIU ({self.TOTAL_DAYS} dies) ===")
         results = {}
         
-        # Configuració del gràfic
-        plt.figure(figsize=(15, 10))
-        
         # Iterem per cada configuració
         for params in self.HYPERPARAMS_GRID:
             history, logs, _ = self.run_experiment(params)
@@ -403,20 +521,25 @@ class RodaliesTraining:
             
             # Guardem informe individual
             self._save_report(logs, params, history)
-            
-            # Afegim la corba al gràfic (suavitzada amb mitjana mòbil)
-            data_series = pd.Series(history)
-            smooth_data = data_series.rolling(window=200).mean()
-            plt.plot(smooth_data, label=f"{params['label']}", linewidth=2)
 
-        history, logs, _ = self.run_experiment(self.HYPERPARAMS_GRID[3][0])
-        results[self.HYPERPARAMS_GRID[3]['label']] = history
+        self._plot_comparison(list(results.items()))
+        return results
 
-        self._save_report(logs, self.HYPERPARAMS_GRID[3], history)
+    def _plot_comparison(self, curves):
+        """
+        Gràfic comparatiu de les corbes de retard (suavitzades amb mitjana mòbil), amb el canvi
+        de nivell del Curriculum marcat, a PLOTS_DIR/curriculum_comparison.png.
 
-        data_series = pd.Series(history)
-        smooth_data = data_series.rolling(window=200).mean()
-        plt.plot(smooth_data, label=f"{self.HYPERPARAMS_GRID[3]['label']}", linewidth=2)
+        :param curves: Llista de (label, historial_retards), en l'ordre de la llegenda.
+        """
+        import pandas as pd
+        plt = _pyplot()
+        plt.figure(figsize=(15, 10))
+
+        for label, history in curves:
+            data_series = pd.Series(history)
+            smooth_data = data_series.rolling(window=200).mean()
+            plt.plot(smooth_data, label=f"{label}", linewidth=2)
 
         # Dibuixem línies verticals per marcar el canvi de nivells del Curriculum
         # Necessitem saber quants nivells hi ha (assumim 6 segons _setup_curriculum)
@@ -439,51 +562,96 @@ class RodaliesTraining:
         print(f"\n[GRÀFIC FINAL] Guardat a: {plot_path}")
         print("\n=== EXPERIMENT FINALITZAT ===")
 
+    def _config(self):
+        """Configuració de l'entrenament (atributs en majúscules, inclosos els canviats a la instància)."""
+        return {name: getattr(self, name) for name in dir(self) if name.isupper()}
+
+    def run_grid_search_parallel(self, workers=None):
+        """
+        Versió paral·lela de run_grid_search. Cada configuració s'executa en el seu propi procés,
+        amb el seu TrafficManager, la seva Q-Table (q_table_<label>.pkl) i els seus fitxers de sortida.
+        El temps total és aproximadament el de la configuració més lenta.
+
+        :param workers: Nombre de processos. Per defecte GRID_WORKERS o un per configuració.
+        :return: Diccionari {label: historial_retards} de les configuracions que han acabat bé.
+        """
+        if workers is None:
+            workers = self.GRID_WORKERS
+        if workers is None:
+            workers = min(len(self.HYPERPARAMS_GRID), os.cpu_count() or 1)
+        workers = max(1, int(workers))
+
+        print(f"=== INICIANT GRID SEARCH PARAL·LEL ({self.TOTAL_DAYS} dies, {workers} processos) ===")
+        results = {}
+        failed = []
+        # Els workers creen el seu RodaliesTraining: hi passem la configuració d'aquest
+        config = self._config()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_grid_search_worker, config, params): params['label']
+                for params in self.HYPERPARAMS_GRID
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    results[label] = future.result()
+                    print(f"[Grid] Configuració finalitzada: {label}")
+                except Exception as e:
+                    # Un worker que falla no atura la resta de configuracions
+                    failed.append(label)
+                    print(f"[Error] La configuració '{label}' ha fallat: {e}")
+
+        if failed:
+            print(f"[Grid] Configuracions fallides ({len(failed)}): {', '.join(failed)}")
+
+        if not results:
+            print("[Grid] Cap configuració ha acabat correctament. No es genera el gràfic.")
+            return results
+
+        # Mantenim l'ordre del grid al gràfic comparatiu
+        self._plot_comparison([(params['label'], results[params['label']])
+                               for params in self.HYPERPARAMS_GRID if params['label'] in results])
+        return results
+
     def personal_training(self):
         """
         Mètode principal. Itera sobre totes les configuracions d'hiperparàmetres,
         executa els experiments i genera el gràfic comparatiu final.
         """
         print(f"=== INICIANT GRID SEARCH EXHAUSTIU ({self.TOTAL_DAYS} dies) ===")
-        results = {}
-        
-        # Configuració del gràfic
-        plt.figure(figsize=(15, 10))
         
         # Configuracio personalitzada
         history, logs, _ = self.run_experiment(self.HYPERPARAMS_GRID[3])
-        results[self.HYPERPARAMS_GRID[3]['label']] = history
 
         self._save_report(logs, self.HYPERPARAMS_GRID[3], history)
 
-        data_series = pd.Series(history)
-        smooth_data = data_series.rolling(window=200).mean()
-        plt.plot(smooth_data, label=f"{self.HYPERPARAMS_GRID[3]['label']}", linewidth=2)
+        self._plot_comparison([(self.HYPERPARAMS_GRID[3]['label'], history)])
 
-        # Dibuixem línies verticals per marcar el canvi de nivells del Curriculum
-        # Necessitem saber quants nivells hi ha (assumim 6 segons _setup_curriculum)
-        levels_count = 6 
-        days_per_level = self.TOTAL_DAYS / levels_count
-        for i in range(1, levels_count):
-            plt.axvline(x=i*days_per_level, color='k', linestyle='--', alpha=0.3, 
-                       label='Nivell Up' if i==1 else "")
+def _grid_search_worker(config, params):
+    """
+    Punt d'entrada de cada procés del Grid Search paral·lel.
+    Ha d'estar a nivell de mòdul perquè el ProcessPoolExecutor el pugui serialitzar.
+
+    :param config: Configuració del RodaliesTraining que llança el Grid Search (vegeu _config),
+                   perquè el worker entreni igual que la versió seqüencial.
+    """
+    trainer = RodaliesTraining(**config)
+    safe_label = params['label'].replace(' ', '_').replace('(', '').replace(')', '').replace('=', '')
+    try:
+        history, logs, _ = trainer.run_experiment(params, brain_name=f"q_table_{safe_label}")
+        trainer._save_report(logs, params, history)
+    except Exception:
+        # Imprimim la traça dins del worker, el procés pare només rep l'excepció
+        traceback.print_exc()
+        raise
+    return history
 
-        # Format del gràfic
-        plt.xlabel('Dies (Episodis)')
-        plt.ylabel('Retard Promig (Mitjana Mòbil 200 dies)')
-        plt.title(f'Comparativa Q-Learning amb Curriculum ({self.TOTAL_DAYS} dies)')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        
-        # Guardar gràfic
-        plot_path = f"{self.PLOTS_DIR}/curriculum_comparison.png"
-        plt.savefig(plot_path, dpi=300)
-        print(f"\n[GRÀFIC FINAL] Guardat a: {plot_path}")
-        print("\n=== EXPERIMENT FINALITZAT ===")
 
 if __name__ == "__main__":
     trainer = RodaliesTraining()
     #trainer.run_grid_search()
+    #trainer.run_grid_search_parallel(workers=4)
 
     # Entrenament personalitzat
     trainer.personal_training()
\ No newline at end of file
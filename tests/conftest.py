@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Els mòduls del projecte s'importen des de l'arrel del repositori (Enviroment, Agent...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,93 @@
+"""Simulacions curtes i deterministes per a les proves (vegeu test_modes_equivalence i test_snapshot)."""
+import contextlib
+import io
+import os
+
+from Agent.QlearningAgent import QLearningAgent
+from Enviroment.SyntheticNetwork import SyntheticNetwork
+from Enviroment.TrafficManager import TrafficManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QTABLE = os.path.join(ROOT, "Agent", "Qtables", "q_table.pkl")
+
+MINUTES = 1440
+# Amb DT = 2 a la R1 un tren fa un tram en un o dos ticks i gairebé mai entra en creuer;
+# amb ticks més curts o trams més llargs (xarxa sintètica) sí
+CASES = {
+    "r1_dt2": (None, 2.0),
+    "r1_dt0.5": (None, 0.5),
+    "synthetic_dt1": (lambda: SyntheticNetwork.generate(n_stations=30, n_lines=2, segment_km=(6.0, 12.0), seed=3), 1.0),
+}
+
+
+class PolicyAgent(QLearningAgent):
+    """Agent congelat i determinista: una política fixa (funció de l'estat)."""
+
+    def __init__(self, policy):
+        super().__init__(epsilon=0.0, seed=0)
+        self.policy = policy
+        self.frozen = True
+
+    def action(self, state):
+        return self.policy(state)
+
+    def action_batch(self, states):
+        return [self.policy(state) for state in states]
+
+
+def greedy_agent():
+    agent = QLearningAgent(epsilon=0.0, seed=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.load_table(QTABLE)
+    agent.frozen = True
+    return agent
+
+
+def learning_agent():
+    return QLearningAgent(alpha=0.5, gamma=0.9, epsilon=0.3, seed=9)
+
+
+def new_world(make_agent, case="r1_dt2", seed=5, is_training=False, **modes):
+    """Un món nou, al principi del primer dia (amb is_training, els trens aturats reben ajudes)."""
+    make_network, _ = CASES[case]
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = TrafficManager(is_training=is_training, seed=seed, event_log_capacity=1 << 17,
+                                 network=make_network() if make_network else None, **modes)
+        manager.brain = make_agent()
+        manager.reset_day()
+    return manager
+
+
+def advance(manager, minutes, case="r1_dt2", on_tick=None):
+    """Avança el món els minuts donats, amb el pas de temps del cas."""
+    _, dt = CASES[case]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(int(minutes / dt)):
+            manager.update(dt)
+            if on_tick is not None:
+                on_tick(manager)
+    return manager
+
+
+def simulate(make_agent, case="r1_dt2", seed=5, on_tick=None, **modes):
+    return advance(new_world(make_agent, case, seed, **modes), MINUTES, case, on_tick)
+
+
+def fingerprint(manager):
+    """Tot el que ha passat (esdeveniments i pas per estació) i on és cada tren al final."""
+    if manager.scheduler is not None:
+        # Els trens adormits o en creuer posen el seu estat al dia en despertar-se
+        manager.scheduler.wake_all()
+    trains = sorted(
+        (t.id, t.current_node_idx, round(t.distance_covered, 9), t.current_speed, t.sim_time, t.finished)
+        for t in manager.active_trains
+    )
+    return (
+        manager.events.total,
+        manager.events.recent().tobytes(),
+        len(manager.trip_log),
+        manager.trip_log.recent().tobytes(),
+        trains,
+    )
+
+
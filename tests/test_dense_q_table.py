@@ -0,0 +1,140 @@
+import contextlib
+import io
+import os
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from Agent.DenseQTable import DenseQTable
+from Agent.QlearningAgent import QLearningAgent
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QTABLE = os.path.join(ROOT, "Agent", "Qtables", "q_table.pkl")
+
+
+def random_state(rng):
+    return tuple(rng.randrange(d) for d in DenseQTable.STATE_DIMS)
+
+
+def quiet(f, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return f(*args)
+
+
+@pytest.mark.parametrize("backend", QLearningAgent.BACKENDS)
+def test_pickle_round_trip(backend, tmp_path):
+    """Les dues taules llegeixen i escriuen el mateix pickle {(estat, acció): valor}."""
+    with open(QTABLE, "rb") as f:
+        original = pickle.load(f)
+
+    agent = QLearningAgent(backend=backend)
+    quiet(agent.load_table, QTABLE)
+    assert len(agent.q) == len(original)
+    assert agent.qtable_snapshot() == original
+
+    path = str(tmp_path / "q.pkl")
+    quiet(agent.save_table, path)
+    with open(path, "rb") as f:
+        saved = pickle.load(f)
+    assert type(saved) is dict and saved == original
+
+    other = QLearningAgent(backend="dense" if backend == "dict" else "dict")
+    quiet(other.load_table, path)
+    assert other.qtable_snapshot() == original
+
+
+def test_dense_ignores_states_it_cannot_encode():
+    table = quiet(DenseQTable, {((0,) * 7, 1): 2.0, ((99,) * 7, 1): 5.0, ((0,) * 3, 0): 1.0})
+    assert table.to_dict() == {((0,) * 7, 1): 2.0}
+    assert ((0,) * 7, 0) not in table and table[((0,) * 7, 0)] == 0.0 and len(table) == 1
+
+
+def test_dense_matches_dict_for_action_and_update():
+    """Amb la mateixa llavor, les dues taules prenen les mateixes decisions i aprenen el mateix."""
+    agents = [QLearningAgent(alpha=0.3, gamma=0.9, epsilon=0.2, backend=b, seed=4) for b in ("dict", "dense")]
+    rng = random.Random(0)
+    states = [random_state(rng) for _ in range(40)]  # Pocs estats: es repeteixen i hi ha empats
+
+    for _ in range(3000):
+        s, s2 = rng.choice(states), rng.choice(states + [None])
+        r = rng.choice([-4.1, -0.1, 0.4, 100.0])
+        actions = [agent.action(s) for agent in agents]
+        assert actions[0] == actions[1]
+        for agent in agents:
+            agent.update(s, actions[0], r, s2)
+
+    dict_table, dense_table = agents[0].qtable_snapshot(), agents[1].qtable_snapshot()
+    assert dense_table == {k: v for k, v in dict_table.items() if k in dense_table}
+    assert not any(v for k, v in dict_table.items() if k not in dense_table)
+
+
+def test_action_batch_uses_the_greedy_action():
+    table = DenseQTable()
+    s1, s2, s3 = (1, 2, 0, 1, 0, 0, 0), (3, 0, 1, 1, 2, 1, 0), (0,) * 7
+    table[(s1, 2)] = 5.0
+    table[(s2, 1)] = -1.0
+    table[(s2, 3)] = 0.5
+    idx = table.encode_many([s1, s2, s3])
+    assert table.greedy_actions(idx).tolist() == [2, 3, 0]
+
+    for backend in QLearningAgent.BACKENDS:
+        agent = QLearningAgent(epsilon=0.0, backend=backend, seed=1)
+        for key, value in table.items():
+            agent.q[key] = value
+        assert agent.action_batch([s1, s2, s1]) == [2, 3, 2]
+        # Empat (estat nou): qualsevol acció, a l'atzar
+        assert {agent.action_batch([s3])[0] for _ in range(200)} == {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize("backend", QLearningAgent.BACKENDS)
+def test_action_batch_matches_action(backend):
+    """Un lot consumeix el generador com les crides a action() una a una, en ordre."""
+    rng = random.Random(5)
+    states = [random_state(rng) for _ in range(30)]
+    values = {(s, a): float(rng.choice([0, 1, 1, 2])) for s in states[:20] for a in range(4)}  # Amb empats
+    one_by_one, batched = (QLearningAgent(epsilon=0.3, backend=backend, seed=2) for _ in range(2))
+    for agent in (one_by_one, batched):
+        for key, value in values.items():
+            agent.q[key] = value
+
+    lots = [[rng.choice(states) for _ in range(rng.randrange(1, 12))] for _ in range(50)]
+    assert [batched.action_batch(lot) for lot in lots] == [[one_by_one.action(s) for s in lot] for lot in lots]
+    assert batched.py_rng.getstate() == one_by_one.py_rng.getstate()
+
+
+def test_td_update_many_splits_repeated_pairs_into_waves():
+    """Un lot amb parelles (s, a) repetides i files llegides després d'escriure-les dona el mateix que en ordre."""
+    rng = random.Random(3)
+    states = [random_state(rng) for _ in range(5)]
+    batch = []
+    for _ in range(200):
+        s, s2 = rng.choice(states), rng.choice(states)
+        batch.append((s, rng.randrange(4), rng.uniform(-5, 5), None if rng.random() < 0.1 else s2))
+    # Dues vegades seguides la mateixa parella, i una transició que llegeix la fila que s'acaba d'escriure
+    batch[10:10] = [(states[0], 1, 3.0, states[1]), (states[0], 1, -2.0, states[0]), (states[2], 0, 1.0, states[0])]
+
+    one_by_one, batched = DenseQTable(), DenseQTable()
+    for s, a, r, s2 in batch:
+        one_by_one.td_update(s, a, r, s2, 0.5, 0.9)
+    s, a, r, s2 = zip(*batch)
+    batched.td_update_many(batched.encode_many(s), a, r,
+                           batched.encode_many([x if y is None else y for x, y in zip(s, s2)]),
+                           [y is None for y in s2], 0.5, 0.9)
+
+    np.testing.assert_array_equal(batched.q_values, one_by_one.q_values)
+    np.testing.assert_array_equal(batched.known, one_by_one.known)
+
+
+def test_update_batch_matches_update():
+    rng = random.Random(8)
+    states = [random_state(rng) for _ in range(6)]
+    transitions = [(rng.choice(states), rng.randrange(4), rng.uniform(-5, 5), rng.choice(states + [None]))
+                   for _ in range(300)]
+    for backend in QLearningAgent.BACKENDS:
+        one_by_one, batched = (QLearningAgent(alpha=0.4, gamma=0.95, backend=backend) for _ in range(2))
+        for t in transitions:
+            one_by_one.update(*t)
+        batched.update_batch(transitions)
+        assert batched.qtable_snapshot() == one_by_one.qtable_snapshot()
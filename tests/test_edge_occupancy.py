@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from Enviroment.EdgeOccupancy import EdgeOccupancy
+
+
+class Reference:
+    """Ocupació de referència: la llista que es reordenava sencera a cada canvi."""
+
+    def __init__(self):
+        self.items = []  # [train_id, progrés, seq]
+        self.seq = 0
+
+    def update(self, train_id, progress):
+        self.seq += 1
+        self.items = [item for item in self.items if item[0] != train_id]
+        self.items.append([train_id, progress, self.seq])
+        self.items.sort(key=lambda item: (-item[1], item[2]))
+
+    def remove(self, train_id):
+        self.items = [item for item in self.items if item[0] != train_id]
+
+    def ordered(self):
+        return [(train_id, progress) for train_id, progress, _ in self.items]
+
+
+def check_links(occupancy, expected):
+    assert list(occupancy) == expected
+    assert len(occupancy) == len(expected)
+    assert occupancy.head() == (expected[0] if expected else None)
+    assert occupancy.tail() == (expected[-1] if expected else None)
+    for i, (train_id, _) in enumerate(expected):
+        assert occupancy.leader(train_id) == (expected[i - 1] if i > 0 else None)
+        assert occupancy.follower(train_id) == (expected[i + 1] if i + 1 < len(expected) else None)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_order_matches_full_resort(seed):
+    rng = random.Random(seed)
+    occupancy, reference = EdgeOccupancy(), Reference()
+    for _ in range(300):
+        train_id = rng.randrange(8)
+        if rng.random() < 0.2:
+            assert occupancy.remove(train_id) == (train_id in [item[0] for item in reference.items])
+            reference.remove(train_id)
+        else:
+            # Progressos discrets perquè hi hagi empats
+            progress = rng.choice([0.0, 0.25, 0.5, 0.75, 1.0, rng.random()])
+            occupancy.update(train_id, progress)
+            reference.update(train_id, progress)
+        check_links(occupancy, reference.ordered())
+
+
+def test_ties_put_the_latest_update_behind():
+    occupancy = EdgeOccupancy()
+    occupancy.update(1, 0.5)
+    occupancy.update(2, 0.5)
+    occupancy.update(1, 0.5)
+    assert list(occupancy) == [(2, 0.5), (1, 0.5)]
+
+
+def test_overtaking_relinks_neighbours():
+    occupancy = EdgeOccupancy()
+    for train_id, progress in [(1, 0.9), (2, 0.6), (3, 0.3), (4, 0.0)]:
+        occupancy.update(train_id, progress)
+    occupancy.update(4, 0.95)
+    check_links(occupancy, [(4, 0.95), (1, 0.9), (2, 0.6), (3, 0.3)])
+    occupancy.update(4, 0.1)
+    check_links(occupancy, [(1, 0.9), (2, 0.6), (3, 0.3), (4, 0.1)])
+
+
+def test_version_changes_on_every_mutation():
+    occupancy = EdgeOccupancy()
+    versions = [occupancy.version]
+
+    occupancy.update(1, 0.1)
+    versions.append(occupancy.version)
+    occupancy.update(1, 0.2)  # In situ, sense recol·locar
+    versions.append(occupancy.version)
+    occupancy.remove(1)
+    versions.append(occupancy.version)
+    assert versions == sorted(set(versions))
+
+    # Treure un tren que no hi és no canvia res
+    occupancy.remove(1)
+    assert occupancy.version == versions[-1]
+    occupancy.clear()
+    assert occupancy.version > versions[-1]
+
+
+def test_snapshot_restore_keeps_order_and_ties():
+    occupancy = EdgeOccupancy()
+    for train_id, progress in [(1, 0.5), (2, 0.5), (3, 0.8), (4, 0.0)]:
+        occupancy.update(train_id, progress)
+    saved = occupancy.snapshot()
+
+    occupancy.update(4, 0.99)
+    occupancy.remove(3)
+    occupancy.restore(saved)
+    check_links(occupancy, list(saved))
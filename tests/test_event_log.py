@@ -0,0 +1,110 @@
+import numpy as np
+
+from Enviroment.EventLog import EventLog
+
+
+def record(log, times, kind=EventLog.DEPART):
+    for t in times:
+        log.record(kind, float(t), train=int(t), node=f"E{t % 3}", next_node=f"E{(t + 1) % 3}", track=1)
+
+
+def times(events):
+    return events['time'].tolist()
+
+
+def test_ring_keeps_the_newest_events():
+    log = EventLog(capacity=4)
+    record(log, range(10))
+
+    assert log.total == 10
+    assert len(log) == 4
+    assert log.dropped == 6
+    assert times(log.recent()) == [6, 7, 8, 9]
+    assert times(log.recent(2)) == [8, 9]
+    assert times(log.recent(100)) == [6, 7, 8, 9]
+    assert log.drain() == 0
+
+
+def test_drain_writes_every_event_before_overwriting(tmp_path):
+    path = str(tmp_path / "events.bin")
+    log = EventLog(capacity=4, path=path)
+    record(log, range(10))
+    assert log.dropped == 0
+    assert log.drain() == 2
+
+    events, names = EventLog.read(path)
+    assert times(events) == list(range(10))
+    assert names == log.names == ["E0", "E1", "E2"]
+    assert [names[i] for i in events['node']] == [f"E{t % 3}" for t in range(10)]
+    assert len(log) == 4 and log.drain() == 0
+
+
+def test_rewind_discards_the_branch():
+    log = EventLog(capacity=8)
+    record(log, range(5))
+    mark = log.mark()
+    record(log, range(5, 8))
+
+    log.rewind(mark)
+    assert log.total == 5
+    assert times(log.recent()) == [0, 1, 2, 3, 4]
+
+    record(log, [50, 51])
+    assert times(log.recent()) == [0, 1, 2, 3, 4, 50, 51]
+
+
+def test_rewind_after_the_branch_wrapped_the_ring():
+    """Les files sobreescrites per la branca ja no tornen: només queden les que no ha tocat."""
+    log = EventLog(capacity=4)
+    record(log, range(3))
+    mark = log.mark()
+    record(log, range(3, 9))
+
+    log.rewind(mark)
+    assert log.total == 3
+    assert times(log.recent()) == [] and len(log) == 0
+
+    log = EventLog(capacity=4)
+    record(log, range(3))
+    mark = log.mark()
+    record(log, range(3, 5))  # Sobreescriu només l'esdeveniment 0
+
+    log.rewind(mark)
+    assert times(log.recent()) == [1, 2]
+    assert log.dropped == 1
+    record(log, [60, 61])
+    assert times(log.recent()) == [1, 2, 60, 61]
+
+
+def test_rewind_keeps_what_is_already_on_file(tmp_path):
+    path = str(tmp_path / "events.bin")
+    log = EventLog(capacity=4, path=path)
+    record(log, range(3))
+    mark = log.mark()
+    record(log, range(3, 8))  # L'esdeveniment 3 de la branca ja s'ha buidat
+
+    log.rewind(mark)
+    assert log.total == 4
+    assert times(log.recent()) == [] and log.drain() == 0
+    record(log, [40])
+    log.drain()
+    assert times(EventLog.read(path)[0]) == [0, 1, 2, 3, 40]
+
+
+def test_clear_forgets_the_buffer():
+    log = EventLog(capacity=4)
+    record(log, range(6))
+    log.clear()
+    assert len(log) == 0 and log.dropped == 0 and log.total == 6
+    record(log, [7])
+    assert times(log.recent()) == [7]
+
+
+def test_lines_describe_events():
+    log = EventLog(capacity=4)
+    log.record(EventLog.OBSTACLE, 12.0, -1, "BLANES", "TORDERA", 2, 30.0)
+    log.record(EventLog.ARRIVE, 15.5, 7, "TORDERA", None, 1, np.nan)
+
+    first, second = log.lines()
+    assert "OBSTACLE" in first and "Xarxa" in first and "BLANES->TORDERA (Via 2)" in first
+    assert "Tren 7" in second and "TORDERA->Fi" in second and second.endswith("nan")
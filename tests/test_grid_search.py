@@ -0,0 +1,61 @@
+import pytest
+
+from Rodalies_training import RodaliesTraining
+
+pytest.importorskip("matplotlib")
+
+PARAMS = {'alpha': 0.5, 'gamma': 0.9, 'epsilon_decay': 0.8, 'label': 'Prova'}
+
+
+def small_config(tmp_path, name):
+    return dict(
+        OUTPUT_DIR=str(tmp_path / name / "out"),
+        PLOTS_DIR=str(tmp_path / name / "plots"),
+        BRAINS_DIR=str(tmp_path / name / "brains"),
+        TOTAL_DAYS=6,
+        MINUTES_PER_DAY=180,
+        SEED=21,
+        SAVE_FULL_CSV=False,
+        HYPERPARAMS_GRID=[PARAMS],
+    )
+
+
+def test_config_round_trips_instance_overrides(tmp_path):
+    trainer = RodaliesTraining(**small_config(tmp_path, "a"))
+    trainer.WORLDS = 2
+    config = trainer._config()
+    assert config['WORLDS'] == 2 and config['TOTAL_DAYS'] == 6
+    assert RodaliesTraining(**config)._config() == config
+
+
+def test_unknown_option_is_rejected():
+    with pytest.raises(AttributeError):
+        RodaliesTraining(TOTAL_DAY=10)
+
+
+def test_parallel_worker_runs_the_same_configuration(tmp_path):
+    parallel = RodaliesTraining(**small_config(tmp_path, "parallel"))
+    results = parallel.run_grid_search_parallel(workers=1)
+
+    sequential = RodaliesTraining(**small_config(tmp_path, "sequential"))
+    history, _, _ = sequential.run_experiment(PARAMS, brain_name="q_table_Prova")
+
+    assert len(results['Prova']) == 6
+    assert results['Prova'] == history
+
+
+def test_sequential_grid_search_plots_every_configuration(tmp_path):
+    second = {'alpha': 0.1, 'gamma': 0.99, 'epsilon_decay': 0.9, 'label': 'Segona'}
+    config = small_config(tmp_path, "grid")
+    config['HYPERPARAMS_GRID'] = [PARAMS, second]
+    results = RodaliesTraining(**config).run_grid_search()
+
+    assert list(results) == ['Prova', 'Segona']
+    assert all(len(history) == 6 for history in results.values())
+    assert (tmp_path / "grid" / "plots" / "curriculum_comparison.png").exists()
+    assert (tmp_path / "grid" / "out" / "report_Prova.txt").exists()
+    assert (tmp_path / "grid" / "out" / "report_Segona.txt").exists()
+
+    # Amb una sola configuració (sense Q-Table prèvia), el mateix resultat que la versió paral·lela
+    parallel = RodaliesTraining(**small_config(tmp_path, "parallel")).run_grid_search_parallel(workers=1)
+    assert results['Prova'] == parallel['Prova']
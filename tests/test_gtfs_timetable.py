@@ -0,0 +1,199 @@
+import contextlib
+import io
+import math
+import zipfile
+
+import numpy as np
+import pytest
+
+from Enviroment.EventLog import EventLog
+from Enviroment.GtfsTimetable import GtfsTimetable
+from Enviroment.TrafficManager import TrafficManager
+from simulation import greedy_agent
+
+STOPS = """stop_id,stop_name
+T,Tordera
+B,blanes
+M,Malgrat de Mar
+SS,Sta. Susanna
+X,Aeroport
+"""
+
+TRIPS = """route_id,service_id,trip_id,direction_id
+R1,LAB,t1,1
+R1,LAB,t2,1
+R1,FES,t3,0
+R2,LAB,t4,0
+R1,LAB,t5,1
+"""
+
+# Columnes en un altre ordre i files desordenades: l'ordre és el de stop_sequence
+STOP_TIMES = """trip_id,stop_sequence,stop_id,arrival_time,departure_time
+t1,3,M,06:12:00,06:12:30
+t1,1,T,06:00:00,06:00:00
+t2,5,SS,06:45:00,
+t1,2,B,06:06:00,06:07:00
+t2,1,T,06:30:00,06:30:00
+t3,1,SS,24:10:00,24:10:00
+t3,2,B,,
+t3,3,T,24:30:00,24:30:00
+t4,1,X,05:00:00,05:00:00
+t4,2,B,05:20:00,05:20:00
+t5,1,T,07:00:00,07:00:00
+t5,2,B,07:08:00,07:08:00
+t1,4,UNKNOWN,06:20:00,06:20:00
+"""
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = str(tmp_path / "gtfs.zip")
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("stops.txt", STOPS)
+        z.writestr("trips.txt", TRIPS)
+        z.writestr("stop_times.txt", STOP_TIMES)
+    return path
+
+
+def names(timetable, stops):
+    return [timetable.stop_ids[s] for s in stops]
+
+
+def test_parse_time():
+    assert GtfsTimetable.parse_time("06:07:30") == 367.5
+    assert GtfsTimetable.parse_time("25:00:00") == 1500
+    assert math.isnan(GtfsTimetable.parse_time(""))
+
+
+def test_stop_times_in_csr_order(feed):
+    timetable = GtfsTimetable.load(feed)
+    assert len(timetable) == 5
+    assert list(timetable.trip_direction) == [1, 1, 0, 0, 1]
+    assert list(np.diff(timetable.trip_offsets)) == [3, 2, 3, 2, 2]
+
+    stops, arrivals, departures = timetable.trip_stops(timetable.trip_index["t1"])
+    assert names(timetable, stops) == ["T", "B", "M"]
+    assert arrivals.tolist() == [360, 366, 372]
+    assert departures.tolist() == [360, 367, 372.5]
+
+    # Sense sortida, la de l'arribada; sense cap de les dues, NaN; passat la mitjanit, més de 24 h
+    _, _, departures = timetable.trip_stops(timetable.trip_index["t2"])
+    assert departures.tolist() == [390, 405]
+    stops, arrivals, _ = timetable.trip_stops(timetable.trip_index["t3"])
+    assert names(timetable, stops) == ["SS", "B", "T"]
+    assert arrivals[0] == 1450 and math.isnan(arrivals[1])
+
+
+def test_segment_times_are_means(feed):
+    timetable = GtfsTimetable.load(feed)
+    by_id = {(timetable.stop_ids[a], timetable.stop_ids[b]): t for (a, b), t in timetable.segment_times.items()}
+    assert by_id == {("T", "B"): 7.0, ("B", "M"): 5.0, ("T", "SS"): 15.0, ("X", "B"): 20.0}
+
+
+def test_filters(feed):
+    timetable = GtfsTimetable.load(feed, route_ids=["R1"])
+    assert timetable.trip_ids == ["t1", "t2", "t3", "t5"]
+    assert len(timetable.stop_ids) == 5
+    assert timetable.trips(service_ids=["LAB"]) == [0, 1, 3]
+    assert timetable.trips(route_ids=["R2"]) == []
+
+
+def new_manager():
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = TrafficManager(is_training=False, seed=1)
+        manager.brain = greedy_agent()
+        manager.reset_day()
+    return manager
+
+
+def load(manager, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return manager.load_timetable(*args, **kwargs)
+
+
+def test_node_map_and_segment_times_by_name(feed):
+    timetable = GtfsTimetable.load(feed)
+    manager = new_manager()
+    node_map = timetable.node_map(manager.nodes, manager._normalize_name, {"SS": "SANTA SUSANNA"})
+    assert sorted(timetable.stop_ids[s] for s in node_map) == ["B", "M", "SS", "T"]
+    assert timetable.segment_times_by_name(node_map) == {
+        ("TORDERA", "BLANES"): 7.0, ("BLANES", "MALGRAT DE MAR"): 5.0, ("TORDERA", "SANTA SUSANNA"): 15.0,
+    }
+
+
+def test_load_timetable_compiles_trips(feed):
+    manager = new_manager()
+    # Sense la correspondència, Sta. Susanna no és a la xarxa i t2 es queda amb una sola parada
+    assert load(manager, feed, service_ids=["LAB"]) == 2
+    assert load(manager, GtfsTimetable.load(feed), service_ids=["LAB"], stop_names={"SS": "SANTA SUSANNA"}) == 3
+    assert [start for start, _, _ in manager.timetable] == [360, 390, 420]
+    assert manager.segment_times[("TORDERA", "BLANES")] == 7.0
+
+    # L'exprés passa per Blanes i Malgrat, però només té hora a les parades del GTFS
+    _, express, track = manager.timetable[1]
+    assert [n.name for n in express.route_nodes] == ["TORDERA", "BLANES", "MALGRAT DE MAR", "SANTA SUSANNA"]
+    schedule = express.schedule(390)
+    assert schedule == {manager.nodes["TORDERA"].id: 390, manager.nodes["SANTASUSANNA"].id: 405}
+    assert track == 1
+
+    # Les sortides que ja han passat no es fan
+    manager.sim_time = 400
+    assert load(manager, feed, service_ids=["LAB"], stop_names={"SS": "SANTA SUSANNA"}) == 3
+    assert manager._timetable_pos == 2
+
+    assert load(manager, None) == 0 and manager.timetable is None
+
+
+def test_trains_leave_at_gtfs_times(feed):
+    manager = new_manager()
+    load(manager, feed, service_ids=["LAB"], stop_names={"SS": "SANTA SUSANNA"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(600):
+            manager.update(1.0)
+
+    spawns = manager.events.recent()
+    spawns = spawns[spawns["kind"] == EventLog.SPAWN]
+    assert spawns["time"].tolist() == [360, 390, 420]
+
+    rows = manager.trip_log.recent()
+    first = rows[rows["train"] == spawns["train"][0]]
+    assert [manager.trip_log.names[s] for s in first["station"]] == ["TORDERA", "BLANES", "MALGRAT DE MAR"]
+    assert first["scheduled"].tolist() == [360, 366, 372]
+    assert not np.isnan(first["actual"]).any()
+
+
+def test_restore_returns_to_the_timetable_position(feed):
+    manager = new_manager()
+    load(manager, feed, service_ids=["LAB"], stop_names={"SS": "SANTA SUSANNA"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(380):
+            manager.update(1.0)
+        snap = manager.snapshot()
+        for _ in range(120):
+            manager.update(1.0)
+        spawned = manager.events.total
+        manager.restore(snap)
+        assert manager._timetable_pos == 1
+        for _ in range(120):
+            manager.update(1.0)
+    assert manager.events.total == spawned
+
+
+def test_line_trains_follow_the_current_segment_times(feed):
+    """Les rutes precompilades de les línies es refan quan load_timetable canvia segment_times."""
+    manager = new_manager()
+
+    def spawned_schedule(line_name):
+        train = manager.spawn_line_train(line_name)
+        assert train is not None
+        manager._retire_train(train)  # Deixa la via de sortida lliure per al següent
+        assert train.schedule == manager.calculate_schedule(train.route_nodes, manager.sim_time)
+        return train.schedule
+
+    before = {line: spawned_schedule(line) for line in ("R1_NORD", "R1_SUD")}
+    load(manager, feed, service_ids=["LAB"])
+    after = {line: spawned_schedule(line) for line in ("R1_NORD", "R1_SUD")}
+    assert after != before  # Tordera-Blanes ara triga 7 minuts, com al GTFS
+
+    load(manager, None)
+    assert {line: spawned_schedule(line) for line in ("R1_NORD", "R1_SUD")} == after
@@ -0,0 +1,69 @@
+import contextlib
+import io
+
+import pytest
+
+from Enviroment.TrafficManager import TrafficManager
+from simulation import CASES, MINUTES, advance, fingerprint, learning_agent, new_world
+
+
+def sparse_world(case, **modes):
+    """Un tren per línia cada 5 hores: entre sortides, la xarxa es queda buida."""
+    manager = new_world(learning_agent, case, is_training=True, **modes)
+    manager.SPAWN_INTERVAL = 300
+    return manager
+
+
+def count_updates(monkeypatch):
+    calls = []
+    update = TrafficManager.update
+
+    def counted(manager, dt_minutes):
+        calls.append(manager.sim_time)
+        return update(manager, dt_minutes)
+
+    monkeypatch.setattr(TrafficManager, "update", counted)
+    return calls
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("modes", [{}, {"event_driven": True}, {"batched": True}], ids=["sequential", "event_driven", "batched"])
+def test_advance_until_matches_plain_ticking(monkeypatch, case, modes):
+    _, dt = CASES[case]
+    expected = advance(sparse_world(case, **modes), MINUTES, case)
+
+    manager = sparse_world(case, **modes)
+    updates = count_updates(monkeypatch)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager.advance_until(MINUTES, dt)
+
+    assert len(updates) < 0.9 * MINUTES / dt
+    assert manager.sim_time == expected.sim_time
+    assert fingerprint(manager) == fingerprint(expected)
+    assert dict(manager.brain.q) == dict(expected.brain.q)
+
+
+def test_skip_idle_ticks_stops_before_the_next_event():
+    manager = sparse_world("r1_dt2")
+    with contextlib.redirect_stdout(io.StringIO()):
+        while manager.active_trains or manager.sim_time < 60:
+            manager.update(2.0)
+    assert manager.skip_idle_ticks(2.0, max_ticks=3) == 3
+
+    # Res a saltar: l'update següent ja fa alguna cosa
+    start = manager.sim_time
+    next_event = manager.next_event_time(2.0)
+    skipped = manager.skip_idle_ticks(2.0)
+    assert manager.sim_time == start + 2.0 * skipped == next_event - 2.0
+    assert manager.skip_idle_ticks(2.0) == 0
+    assert manager.next_event_time(2.0) == next_event
+
+    # Fins on s'ha saltat, cada update hauria deixat el món igual
+    plain = sparse_world("r1_dt2")
+    advance(plain, start, "r1_dt2")
+    events = plain.events.total
+    advance(plain, next_event - 2.0 - start, "r1_dt2")
+    assert plain.events.total == events and not plain.active_trains
+    assert fingerprint(plain) == fingerprint(manager)
+
+    assert manager.skip_idle_ticks(2.0, end_time=manager.sim_time) == 0
@@ -0,0 +1,99 @@
+"""
+Els modes d'execució del TrafficManager són optimitzacions: amb la mateixa llavor han de
+donar exactament la mateixa simulació que el mode seqüencial.
+
+- event_driven: els trens adormits no es visiten, però quan es desperten reprodueixen els
+  ticks que s'han saltat. Equivalent fins i tot amb un agent que explora i aprèn.
+- fast_forward: els trens en creuer no consulten l'agent. Equivalent amb un agent que no
+  aprèn i que no fa servir números aleatoris per decidir. QLearningAgent.action en consumeix
+  a cada crida (epsilon i desempats), i saltar-ne crides canvia els desempats posteriors.
+- batched/vectorized: els trens decideixen per lots (DecisionBatch), en el mateix ordre i amb
+  els mateixos números aleatoris que el mode seqüencial; vectorized és el mateix càlcul que
+  batched amb NumPy.
+"""
+import pytest
+
+from Enviroment.EventLog import EventLog
+from simulation import CASES, PolicyAgent, fingerprint, greedy_agent, learning_agent, simulate
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("seed", [5, 17])
+def test_event_driven_matches_sequential_with_learning_agent(case, seed):
+    sequential = simulate(learning_agent, case, seed)
+    event_driven = simulate(learning_agent, case, seed, event_driven=True)
+    assert len(sequential.trip_log) > 0
+    assert fingerprint(event_driven) == fingerprint(sequential)
+    assert dict(event_driven.brain.q) == dict(sequential.brain.q)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_event_driven_matches_sequential_with_greedy_agent(case):
+    expected = fingerprint(simulate(greedy_agent, case))
+    assert fingerprint(simulate(greedy_agent, case, event_driven=True)) == expected
+
+
+class QTablePolicy:
+    """La millor acció de la Q-Table desada, amb desempat per la primera (sense atzar)."""
+
+    def __init__(self):
+        self.agent = greedy_agent()
+
+    def __call__(self, state):
+        qs = [self.agent.q[(state, a)] for a in range(4)]
+        return qs.index(max(qs))
+
+
+POLICIES = {
+    "accelerate": lambda: PolicyAgent(lambda state: 0),
+    "mixed": lambda: PolicyAgent(lambda state: sum(i * v for i, v in enumerate(state)) % 4),
+    "q_table": lambda: PolicyAgent(QTablePolicy()),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_fast_forward_matches_sequential_with_deterministic_agent(policy, case):
+    expected = fingerprint(simulate(POLICIES[policy], case))
+    assert fingerprint(simulate(POLICIES[policy], case, event_driven=True)) == expected
+    assert fingerprint(simulate(POLICIES[policy], case, fast_forward=True)) == expected
+
+
+@pytest.mark.parametrize("case", ["r1_dt0.5", "synthetic_dt1"])
+def test_fast_forward_actually_cruises(case):
+    """Sense trens en creuer, la prova d'equivalència de fast_forward no provaria res."""
+    cruising = []
+    simulate(POLICIES["q_table"], case, fast_forward=True, on_tick=lambda m: cruising.append(m.scheduler.cruising_count))
+    assert max(cruising) > 0
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("seed", [5, 17])
+def test_batched_matches_sequential(case, seed):
+    """Amb un agent que explora i aprèn, i amb les ajudes d'entrenament (is_training)."""
+    sequential = simulate(learning_agent, case, seed, is_training=True)
+    batched = simulate(learning_agent, case, seed, is_training=True, batched=True)
+    assert len(sequential.trip_log) > 0
+    assert fingerprint(batched) == fingerprint(sequential)
+    assert dict(batched.brain.q) == dict(sequential.brain.q)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_batched_matches_sequential_with_greedy_agent(case):
+    expected = fingerprint(simulate(greedy_agent, case))
+    assert fingerprint(simulate(greedy_agent, case, batched=True)) == expected
+    assert fingerprint(simulate(greedy_agent, case, batched=True, event_driven=True)) == expected
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_vectorized_matches_batched(case):
+    batched = simulate(learning_agent, case, is_training=True, batched=True)
+    vectorized = simulate(learning_agent, case, is_training=True, vectorized=True)
+    assert fingerprint(vectorized) == fingerprint(batched)
+    assert dict(vectorized.brain.q) == dict(batched.brain.q)
+
+
+def test_vectorized_case_has_atp_stops_and_switches():
+    """Sense aquests esdeveniments, la prova anterior no provaria el seu ordre dins del tick."""
+    events = simulate(learning_agent, "synthetic_dt1", is_training=True, vectorized=True).events.recent()
+    for kind in (EventLog.ATP, EventLog.STOP, EventLog.TRACK_SWITCH):
+        assert (events['kind'] == kind).sum() > 0
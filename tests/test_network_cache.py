@@ -0,0 +1,86 @@
+import contextlib
+import io
+import pickle
+
+import pytest
+
+from Enviroment.Datas import Datas
+from Enviroment.NetworkCache import NetworkCache
+from Enviroment.TrafficManager import TrafficManager
+
+
+@pytest.fixture
+def compilations(monkeypatch, tmp_path):
+    """Els TrafficManager del test fan servir una cache buida a tmp_path; retorna les compilacions del CSV."""
+    monkeypatch.setattr(NetworkCache.__init__, "__defaults__", (str(tmp_path),))
+    calls = []
+    compile_network = TrafficManager._compile_network
+
+    def counted(manager):
+        calls.append(manager)
+        return compile_network(manager)
+
+    monkeypatch.setattr(TrafficManager, "_compile_network", counted)
+    return calls
+
+
+def new_manager():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TrafficManager(seed=1)
+
+
+def network(manager):
+    return sorted(manager.nodes), sorted((e.node1.name, e.node2.name, e.track_id) for e in manager.all_edges)
+
+
+def test_key_depends_on_the_connections_and_the_format(monkeypatch, tmp_path):
+    cache = NetworkCache(str(tmp_path))
+    csv, connections = TrafficManager.NETWORK_CSV, Datas.network_connections()
+    key = cache.key(csv, connections, 1400, 900)
+    assert cache.key(csv, list(connections), 1400, 900) == key
+
+    assert cache.key(csv, connections[:-1], 1400, 900) != key
+    assert cache.key(csv, connections, 1400, 901) != key
+    monkeypatch.setitem(Datas.LINES, "R1", Datas.LINES["R1"][:-1])
+    assert cache.key(csv, Datas.network_connections(), 1400, 900) != key
+    monkeypatch.undo()
+
+    monkeypatch.setattr(NetworkCache, "FORMAT_VERSION", NetworkCache.FORMAT_VERSION + 1)
+    assert cache.key(csv, connections, 1400, 900) != key
+
+
+def test_manager_reuses_the_compiled_network(compilations):
+    first = new_manager()
+    assert len(compilations) == 1
+    second = new_manager()
+    assert len(compilations) == 1
+    assert network(second) == network(first)
+
+
+def test_changing_the_connections_rebuilds_the_network(monkeypatch, compilations):
+    full = new_manager()
+    monkeypatch.setitem(Datas.LINES, "R1", Datas.LINES["R1"][:-1])
+    shorter = new_manager()
+    assert len(compilations) == 2
+    assert len(shorter.nodes) == len(full.nodes) - 1
+    assert len(shorter.all_edges) == len(full.all_edges) - 4
+
+    # Tornant a les connexions originals, la compilació guardada segueix valent
+    monkeypatch.setitem(Datas.LINES, "R1", full.lines["R1_NORD"])
+    assert network(new_manager()) == network(full)
+    assert len(compilations) == 2
+
+
+def test_a_file_with_an_old_format_is_rebuilt(compilations):
+    manager = new_manager()
+    cache = manager.network_cache
+    key = cache.key(manager.NETWORK_CSV, Datas.network_connections(), manager.width, manager.height)
+    with open(cache.path(key), "rb") as f:
+        compiled = pickle.load(f)
+    with open(cache.path(key), "wb") as f:
+        pickle.dump(dict(compiled, version=NetworkCache.FORMAT_VERSION - 1), f)
+
+    assert cache.load(key) is None
+    assert network(new_manager()) == network(manager)
+    assert len(compilations) == 2
+    assert cache.load(key)['version'] == NetworkCache.FORMAT_VERSION
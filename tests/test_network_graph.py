@@ -0,0 +1,69 @@
+import contextlib
+import io
+
+import pytest
+
+from Enviroment.SyntheticNetwork import SyntheticNetwork
+from Enviroment.TrafficManager import TrafficManager
+
+
+@pytest.fixture(scope="module")
+def manager():
+    """Tres línies que comparteixen el tronc: fins a la primera estació d'enllaç, totes tres."""
+    network = SyntheticNetwork.generate(n_stations=30, n_lines=3, segment_km=(2.0, 5.0), seed=11)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TrafficManager(is_training=False, seed=1, network=network)
+
+
+def node(manager, name):
+    return manager.graph.nodes[manager.graph.node_index[name]]
+
+
+def test_every_line_segment_has_both_tracks_in_both_directions(manager):
+    graph = manager.graph
+    for line, stations in manager.lines.items():
+        if line not in manager.spawn_lines: continue
+        for a, b in zip(stations, stations[1:]):
+            u, v = node(manager, a), node(manager, b)
+            for track_id in (0, 1):
+                edge = graph.edge_between(u, v, track_id)
+                assert (edge.node1, edge.node2, edge.track_id) == (u, v, track_id)
+                assert graph.edges[edge.id] is edge
+                assert graph.edge_id(u.index, v.index, track_id) == edge.id
+                assert graph.get_edge(a, b, track_id) is edge
+                assert edge.inverse_edge is graph.edge_between(v, u, track_id)
+                assert edge.inverse_edge.inverse_edge is edge
+            assert graph.edge_between(u, v, 2) is None
+
+
+def test_shared_trunk_stations_connect_every_line(manager):
+    graph = manager.graph
+    l1, l2, l3 = manager.lines["L1"], manager.lines["L2"], manager.lines["L3"]
+    # Un sol tram de tronc per parella d'estacions, encara que el recorrin diverses línies
+    assert len(graph.edges) == 4 * (len(graph.nodes) - 1)
+
+    junction = l1[[a == b for a, b in zip(l1, l2)].index(False) - 1]
+    assert junction in l2 and junction in l3
+    neighbors = {graph.nodes[i].name for i in graph.neighbors(node(manager, junction).index)}
+    after = {line[line.index(junction) + 1] for line in (l1, l2, l3)}
+    assert len(after) == 2  # El ramal de L1 i el tronc que continua
+    assert neighbors == after | {l1[l1.index(junction) - 1]}
+
+    assert graph.edge_between(node(manager, l1[0]), node(manager, l1[-1])) is None
+
+
+@pytest.mark.parametrize("first, second", [("L1", "L2"), ("L1", "L3"), ("L2", "L3")])
+def test_shortest_path_between_lines_goes_through_the_junction(manager, first, second):
+    """D'un final de línia a un altre, enrere pel ramal fins a l'enllaç i pel tronc fins al ramal de l'altra."""
+    a, b = manager.lines[first], manager.lines[second]
+    shared = [x == y for x, y in zip(a, b)].index(False)
+    expected = a[shared - 1:][::-1] + b[shared:]
+
+    graph = manager.graph
+    path = graph.shortest_path(node(manager, a[-1]).index, node(manager, b[-1]).index)
+    assert [graph.nodes[i].name for i in path] == expected
+    for u, v in zip(path, path[1:]):
+        assert graph.edge_id(u, v) >= 0
+
+    start = node(manager, a[0]).index
+    assert graph.shortest_path(start, start) == [start]
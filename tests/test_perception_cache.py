@@ -0,0 +1,90 @@
+import pytest
+
+from simulation import CASES, greedy_agent, learning_agent, new_world, simulate
+
+
+def count_computations(train):
+    """Crides a _compute_perception del tren (les que no ha pogut servir la cache)."""
+    calls = []
+    compute = train._compute_perception
+
+    def counted(watched):
+        calls.append(train.sim_time)
+        return compute(watched)
+
+    train._compute_perception = counted
+    return calls
+
+
+@pytest.fixture
+def world():
+    manager = new_world(greedy_agent)
+    train = manager.spawn_line_train("R1_NORD")
+    assert train is not None
+    return manager, train
+
+
+def test_perception_is_reused_until_a_watched_edge_changes(world):
+    manager, train = world
+    calls = count_computations(train)
+    edge = train.current_edge
+
+    first = train.sense()
+    assert train.sense() is first and len(calls) == 1
+
+    # Una via que el tren no mira
+    watched = {edge, edge.inverse_edge, train.get_parallel_edge().inverse_edge}
+    elsewhere = next(e for e in manager.all_edges if e not in watched)
+    manager.update_train_position(elsewhere, 900, 0.5)
+    assert train.sense() is first and len(calls) == 1
+
+    # Un tren davant a la mateixa via
+    manager.update_train_position(edge, 901, 0.5)
+    assert train.sense()[0] == pytest.approx(0.5 * edge.real_length_km)
+    assert len(calls) == 2
+
+    # Un tren de cara per la mateixa via física
+    assert train.sense()[2] == float('inf')
+    manager.update_train_position(edge.inverse_edge, 902, 0.5)
+    assert train.sense()[2] < float('inf')
+    assert len(calls) == 3
+
+    # El propi moviment actualitza la via del tren
+    train.distance_covered = 0.1
+    manager.update_train_position(edge, train.id, train.distance_covered / train.total_distance)
+    assert train.sense()[0] == pytest.approx(0.5 * edge.real_length_km - 0.1)
+    assert len(calls) == 4
+
+    manager.remove_train_from_edge(edge, 901)
+    assert train.sense()[0] == float('inf')
+    assert train.sense() == train._compute_perception([])
+
+
+def test_arrival_invalidates_the_perception(world):
+    """En arribar, la distància canvia sense passar per l'ocupació de la via."""
+    _, train = world
+    calls = count_computations(train)
+    train.sense()
+    train.distance_covered = train.total_distance - 0.01
+    train.arrive_at_station_logic()
+
+    assert train.is_waiting and train._perception_deps is None
+    perception = train.sense()
+    assert len(calls) == 2
+    assert perception == train._compute_perception([])
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("modes", [{}, {"fast_forward": True}, {"vectorized": True}], ids=["sequential", "fast_forward", "vectorized"])
+def test_cached_perception_is_always_current(case, modes):
+    """Al final de cada tick, el que retorna la cache és el mateix que una percepció feta de nou."""
+    checked = []
+
+    def check(manager):
+        for train in manager.active_trains:
+            if train.finished or not train.current_edge: continue
+            assert train.sense() == train._compute_perception([])
+            checked.append(train.id)
+
+    simulate(learning_agent, case, on_tick=check, **modes)
+    assert len(checked) > 1000
@@ -0,0 +1,76 @@
+import pytest
+
+from Enviroment.Profiler import Profiler
+from simulation import MINUTES, fingerprint, learning_agent, simulate
+
+
+def installed():
+    return [owner.__dict__[name] for owner, name, _ in Profiler.probes()]
+
+
+@pytest.fixture
+def originals():
+    originals = installed()
+    yield originals
+    if Profiler._active is not None:
+        Profiler._active.disable()
+    assert installed() == originals
+
+
+def test_disable_restores_the_original_methods(originals):
+    profiler = Profiler()
+    profiler.enable()
+    probes = installed()
+    assert all(probe is not original for probe, original in zip(probes, originals))
+    assert all(probe.__wrapped__ is original for probe, original in zip(probes, originals))
+
+    profiler.enable()  # Ja activat: no embolcalla dues vegades
+    assert installed() == probes
+
+    profiler.disable()
+    assert installed() == originals
+    assert Profiler._active is None
+    profiler.disable()
+    assert installed() == originals
+
+
+def test_enabling_another_profiler_replaces_the_active_one(originals):
+    first, second = Profiler(), Profiler()
+    first.enable()
+    second.enable()
+    assert not first.enabled and Profiler._active is second
+    assert all(probe.__wrapped__ is original for probe, original in zip(installed(), originals))
+
+    first.disable()  # Ja no té sondes: no toca les de l'altre
+    assert Profiler._active is second
+    second.disable()
+    assert installed() == originals
+
+
+def test_profiled_day_is_the_same_day(originals):
+    expected = fingerprint(simulate(learning_agent))
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        assert fingerprint(simulate(learning_agent)) == expected
+    finally:
+        profiler.disable()
+    profiler.end_day()
+
+    stats = profiler.per_day()
+    assert stats["tick"][1] == MINUTES / 2
+    assert stats["perception"][1] > 0 and stats["agent.update"][1] > 0
+    assert profiler.report().count("ms (") == len(stats)
+
+
+def test_a_failing_call_is_counted_and_propagated(originals):
+    from Enviroment.TrafficManager import TrafficManager
+
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        with pytest.raises(AttributeError):
+            TrafficManager.update(None, 2.0)
+    finally:
+        profiler.disable()
+    assert profiler._current["tick"][1] == 1
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import random
+
+import numpy as np
+
+from Enviroment.TrafficManager import TrafficManager
+from simulation import fingerprint, learning_agent, simulate
+
+
+def world(seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TrafficManager(is_training=True, seed=seed)
+
+
+def draws(rng, n=5):
+    return [rng.random() for _ in range(n)]
+
+
+def test_same_seed_gives_the_same_streams():
+    first, second = world(5), world(5)
+    assert draws(first.rng) == draws(second.rng)
+    assert draws(first.train_rng(3)) == draws(second.train_rng(3))
+    assert first.brain.py_rng.getstate() == second.brain.py_rng.getstate()
+
+    # Una SeedSequence filla reprodueix el mateix món que la mateixa filla
+    children = np.random.SeedSequence(7).spawn(2)
+    again = np.random.SeedSequence(7).spawn(2)
+    assert draws(world(children[1]).rng) == draws(world(again[1]).rng)
+
+
+def test_streams_are_independent():
+    manager = world(5)
+    streams = [manager.rng, manager.brain.py_rng, manager.train_rng(1), manager.train_rng(2)]
+    streams += [world(6).rng, world(6).train_rng(1)]
+    children = np.random.SeedSequence(5).spawn(2)
+    streams += [world(children[0]).rng, world(children[1]).rng]
+    sequences = [tuple(draws(rng)) for rng in streams]
+    assert len(set(sequences)) == len(sequences)
+
+
+def test_train_stream_does_not_depend_on_the_spawn_order():
+    manager = world(5)
+    expected = draws(manager.train_rng(4))
+    for train_id in range(1, 4):
+        draws(manager.train_rng(train_id))
+    draws(manager.rng)
+    assert draws(manager.train_rng(4)) == expected
+
+
+def test_simulation_ignores_the_global_random():
+    """Ni el llegeix (el resultat no depèn de random.seed) ni el modifica."""
+    random.seed(0)
+    state = random.getstate()
+    expected = fingerprint(simulate(learning_agent, seed=5))
+    assert random.getstate() == state
+
+    random.seed(1)
+    assert fingerprint(simulate(learning_agent, seed=5)) == expected
+    assert fingerprint(simulate(learning_agent, seed=6)) != expected
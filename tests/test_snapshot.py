@@ -0,0 +1,115 @@
+"""
+Un snapshot restaurat ha de continuar exactament igual que un món bessó que no ha tornat
+enrere, i una branca (TrafficManager.branch) no ha de deixar rastre: ni esdeveniments, ni
+trajectes, ni trens, ni ocupació de les vies, ni aprenentatge de l'agent (sense learn).
+"""
+import pytest
+
+from simulation import CASES, PolicyAgent, advance, fingerprint, greedy_agent, learning_agent, new_world
+
+MODES = {
+    "sequential": {},
+    "event_driven": {"event_driven": True},
+    "fast_forward": {"fast_forward": True},
+    "batched": {"batched": True},
+    "vectorized": {"vectorized": True},
+}
+
+
+def occupancy(manager):
+    """(tren, progrés) de cada via ocupada, en l'ordre de la via."""
+    return {(e.node1.name, e.node2.name, e.track_id): list(occ) for e, occ in manager._train_positions.items() if occ}
+
+
+def learned(agent):
+    """La Q-Table sense les entrades a zero (un agent congelat les crea només de consultar-les)."""
+    return {key: value for key, value in agent.q.items() if value}
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_restore_repeats_the_same_continuation(mode):
+    manager = advance(new_world(greedy_agent, **MODES[mode]), 300)
+    snap = manager.snapshot()
+
+    expected = fingerprint(advance(manager, 240))
+    expected_occupancy = occupancy(manager)
+    for _ in range(2):
+        manager.restore(snap)
+        assert fingerprint(advance(manager, 240)) == expected
+        assert occupancy(manager) == expected_occupancy
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("mode", sorted(set(MODES) - {"fast_forward"}))
+def test_branch_leaves_no_trace(mode, case):
+    """Un món amb branques acaba igual (i amb la mateixa Q-Table) que un bessó sense."""
+    twin = advance(new_world(learning_agent, case, **MODES[mode]), 600, case)
+    manager = new_world(learning_agent, case, **MODES[mode])
+    for _ in range(3):
+        advance(manager, 200, case)
+        q_before = learned(manager.brain)
+        with manager.branch():
+            advance(manager, 120, case)
+            assert manager.brain.frozen
+        assert not manager.brain.frozen
+        assert learned(manager.brain) == q_before
+
+    assert len(twin.trip_log) > 0
+    assert fingerprint(manager) == fingerprint(twin)
+    assert occupancy(manager) == occupancy(twin)
+    assert learned(manager.brain) == learned(twin.brain)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_fast_forward_branch_leaves_no_trace(case):
+    """
+    El snapshot desperta els trens en creuer, i amb fast_forward això només és invisible
+    si l'agent decideix sense atzar (vegeu WakeScheduler).
+    """
+    def make_agent():
+        return PolicyAgent(lambda state: sum(i * v for i, v in enumerate(state)) % 4)
+
+    twin = advance(new_world(make_agent, case, fast_forward=True), 600, case)
+    manager = new_world(make_agent, case, fast_forward=True)
+    for _ in range(3):
+        advance(manager, 200, case)
+        with manager.branch():
+            advance(manager, 120, case)
+
+    assert fingerprint(manager) == fingerprint(twin)
+    assert occupancy(manager) == occupancy(twin)
+
+
+def test_branch_learns_only_when_asked():
+    manager = advance(new_world(learning_agent), 300)
+    q_before = learned(manager.brain)
+    with manager.branch(learn=True):
+        advance(manager, 120)
+        assert not manager.brain.frozen
+    assert learned(manager.brain) != q_before
+
+
+def test_branch_from_a_given_snapshot():
+    """Amb un snapshot, la branca comença (i acaba) al snapshot, no a l'estat actual."""
+    manager = advance(new_world(greedy_agent), 300)
+    snap = manager.snapshot()
+    expected = fingerprint(manager)
+    advance(manager, 120)
+
+    with manager.branch(snap):
+        assert manager.sim_time == snap.sim_time
+        assert fingerprint(manager) == expected
+        advance(manager, 60)
+    assert fingerprint(manager) == expected
+
+
+def test_restore_discards_rows_after_the_snapshot():
+    manager = advance(new_world(greedy_agent), 300)
+    snap = manager.snapshot()
+    events, trips = manager.events.total, len(manager.trip_log)
+    advance(manager, 240)
+    assert manager.events.total > events and len(manager.trip_log) > trips
+
+    manager.restore(snap)
+    assert manager.events.total == events
+    assert len(manager.trip_log) == trips
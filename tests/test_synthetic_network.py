@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from Enviroment.Edge import Edge
+from Enviroment.SyntheticNetwork import SyntheticNetwork
+
+PARAMS = [
+    dict(n_stations=30, n_lines=2, segment_km=(6.0, 12.0)),
+    dict(n_stations=120, n_lines=4, branches=2, segment_km=(2.0, 5.0)),
+    dict(n_stations=12, n_lines=1, trunk_stations=12 - 1),
+]
+
+
+def data(network):
+    return network.stations, network.connections, network.lines, network.segment_times
+
+
+def length_km(network, a, b):
+    position = {st['norm']: (st['x'], st['y']) for st in network.stations}
+    (x1, y1), (x2, y2) = position[a], position[b]
+    return math.hypot(x2 - x1, y2 - y1) * Edge.PIXELS_TO_KM
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_same_seed_gives_the_same_network(params):
+    network = SyntheticNetwork.generate(seed=3, **params)
+    assert data(SyntheticNetwork.generate(seed=3, **params)) == data(network)
+    assert data(SyntheticNetwork.generate(seed=4, **params)) != data(network)
+
+
+@pytest.mark.parametrize("params", PARAMS)
+def test_network_is_connected(params):
+    network = SyntheticNetwork.generate(seed=3, **params)
+    names = [st['norm'] for st in network.stations]
+    assert len(set(names)) == len(names) == params['n_stations']
+
+    # Un arbre: una connexió menys que estacions i totes accessibles des de l'inici del tronc
+    assert len(network.connections) == len(names) - 1
+    neighbors = {name: set() for name in names}
+    for a, b in network.connections:
+        neighbors[a].add(b)
+        neighbors[b].add(a)
+    seen, pending = {names[0]}, [names[0]]
+    while pending:
+        for other in neighbors[pending.pop()] - seen:
+            seen.add(other)
+            pending.append(other)
+    assert seen == set(names)
+
+    # Cada línia és un camí per les connexions, amb la tornada al revés
+    n_lines = params['n_lines'] * (1 + params.get('branches', 0))
+    assert len(network.lines) == 2 * n_lines
+    for line, stations in network.lines.items():
+        if line.endswith("_SUD"): continue
+        assert stations[0] == names[0]
+        assert network.lines[f"{line}_SUD"] == stations[::-1]
+        for a, b in zip(stations, stations[1:]):
+            assert b in neighbors[a]
+    assert set().union(*network.lines.values()) == set(names)
+
+
+def test_segments_follow_the_requested_lengths():
+    network = SyntheticNetwork.generate(n_stations=50, n_lines=3, segment_km=(2.0, 5.0), seed=8)
+    assert set(network.segment_times) == set(network.connections)
+    for (a, b), minutes in network.segment_times.items():
+        km = length_km(network, a, b)
+        assert 2.0 - 1e-9 <= km <= 5.0 + 1e-9
+        expected = km / SyntheticNetwork.REFERENCE_SPEED_KMH * 60.0 * SyntheticNetwork.SCHEDULE_MARGIN
+        assert minutes == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("params", [
+    dict(n_stations=10, n_lines=0),
+    dict(n_stations=10, n_lines=2, trunk_stations=1),
+    dict(n_stations=6, n_lines=3, trunk_stations=4),
+])
+def test_impossible_networks_are_rejected(params):
+    with pytest.raises(ValueError):
+        SyntheticNetwork.generate(seed=1, **params)
@@ -0,0 +1,64 @@
+from Enviroment.EdgeType import EdgeType
+from Enviroment.EventLog import EventLog
+from simulation import MINUTES, advance, fingerprint, learning_agent, new_world, simulate
+
+
+def test_two_worlds_in_one_process_do_not_share_state():
+    """Un món que avança intercalat amb un altre acaba igual que si estigués sol."""
+    alone = fingerprint(simulate(learning_agent, seed=5))
+
+    first = new_world(learning_agent, seed=5)
+    second = new_world(learning_agent, seed=9)
+    for _ in range(MINUTES // 2):
+        advance(first, 2)
+        advance(second, 2)
+    assert fingerprint(first) == alone
+    assert fingerprint(second) != alone
+
+    assert not set(first.all_edges) & set(second.all_edges)
+    assert not set(first.nodes.values()) & set(second.nodes.values())
+
+    # Una avaria en un món no arriba a l'altre
+    first.reset_network_status()
+    edge = second.all_edges[0]
+    edge.edge_type = EdgeType.OBSTACLE
+    second.report_issue(edge.node1.name, edge.node2.name, edge.track_id)
+    assert first.all_edges[0].edge_type == EdgeType.NORMAL
+    assert first.check_alert(edge.node1.name, edge.node2.name, edge.track_id) == 0
+
+
+def check_train_edges(manager):
+    """L'índex invers tren -> vies diu exactament el mateix que l'ocupació de les vies."""
+    from_positions = {}
+    for edge, occupancy in manager._train_positions.items():
+        for train_id, _ in occupancy:
+            from_positions.setdefault(train_id, set()).add(edge)
+    assert from_positions == dict(manager._train_edges)
+
+
+def test_train_edges_follow_moves_and_removals():
+    manager = new_world(learning_agent)
+    a, b, c = manager.all_edges[:3]
+    manager.update_train_position(a, 1, 0.2)
+    manager.update_train_position(b, 1, 0.0)  # Canvia de via: un moment a totes dues
+    manager.update_train_position(a, 2, 0.5)
+    manager.update_train_position(c, 3, 0.1)
+    check_train_edges(manager)
+
+    manager.remove_train_from_edge(a, 1)
+    manager.remove_train_from_edge(c, 3)
+    check_train_edges(manager)
+    assert set(manager._train_edges) == {1, 2}
+
+    manager.remove_train(2)
+    manager.remove_train(99)
+    check_train_edges(manager)
+    assert dict(manager._train_edges) == {1: {b}}
+
+
+def test_train_edges_stay_consistent_during_a_day():
+    """Amb trens que entren, canvien de via i es retiren (a la xarxa sintètica hi ha canvis de via)."""
+    manager = simulate(learning_agent, "synthetic_dt1", seed=17, on_tick=check_train_edges)
+    events = manager.events.recent()
+    assert (events['kind'] == EventLog.TRACK_SWITCH).sum() > 0
+    assert len(manager.trip_log) > 0
@@ -0,0 +1,174 @@
+import gzip
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from Enviroment.TripLog import TripLog
+
+
+def make_train(train_id, names, arrived=None, start=0.0):
+    """Tren mínim per a TripLog.record_train: una parada cada 5 minuts i arribades 1 minut tard."""
+    nodes = [SimpleNamespace(id=i, name=name) for i, name in enumerate(names)]
+    schedule = {n.id: start + 5.0 * i for i, n in enumerate(nodes)}
+    arrived = len(nodes) if arrived is None else arrived
+    actuals = {n.name: schedule[n.id] + 1.0 for n in nodes[:arrived]}
+    return SimpleNamespace(id=train_id, route_nodes=nodes, schedule=schedule, arrival_logs=actuals)
+
+
+STATIONS = ["A", "B", "C", "D"]
+
+
+def test_rows_follow_route_order_and_mark_missing_arrivals():
+    log = TripLog()
+    log.record_train(make_train(7, STATIONS, arrived=2), day=3)
+
+    rows = log.recent()
+    assert rows['train'].tolist() == [7] * 4
+    assert rows['day'].tolist() == [3] * 4
+    assert rows['stop'].tolist() == [1, 2, 3, 4]
+    assert [log.names[s] for s in rows['station']] == STATIONS
+    assert rows['delay'][:2].tolist() == [1.0, 1.0]
+    assert np.isnan(rows['actual'][2:]).all() and np.isnan(rows['delay'][2:]).all()
+
+
+def test_chunks_are_appended_to_file_and_read_back(tmp_path):
+    path = str(tmp_path / "trips.bin")
+    log = TripLog(path, chunk_rows=10)
+    for t in range(1, 8):
+        log.record_train(make_train(t, STATIONS), day=1)
+        # Mai queden més files al buffer que les d'un bloc
+        assert len(log.recent()) <= 10
+    log.close()
+
+    rows, names = TripLog.read(path)
+    assert isinstance(rows, np.memmap)
+    assert len(rows) == len(log) == 28
+    assert rows['train'].tolist() == [t for t in range(1, 8) for _ in STATIONS]
+    assert names == STATIONS
+
+
+def test_compressed_log_is_gzip_and_reads_the_same(tmp_path):
+    path = str(tmp_path / "trips.bin.gz")
+    log = TripLog(path, chunk_rows=6, compress=True)
+    for t in range(1, 5):
+        log.record_train(make_train(t, STATIONS), day=2)
+    log.close()
+
+    with open(path, 'rb') as f:
+        assert f.read(2) == b'\x1f\x8b'
+    with gzip.open(path, 'rb') as f:
+        assert len(f.read()) == 16 * TripLog.DTYPE.itemsize
+    rows, _ = TripLog.read(path)
+    assert len(rows) == 16 and set(rows['day'].tolist()) == {2}
+
+
+def test_train_longer_than_a_chunk(tmp_path):
+    path = str(tmp_path / "trips.bin")
+    log = TripLog(path, chunk_rows=3)
+    log.record_train(make_train(1, STATIONS), day=1)
+    log.record_train(make_train(2, STATIONS[:2]), day=1)
+    log.close()
+
+    rows, _ = TripLog.read(path)
+    assert rows['train'].tolist() == [1, 1, 1, 1, 2, 2]
+
+
+def test_empty_log_reads_as_empty(tmp_path):
+    path = str(tmp_path / "trips.bin")
+    TripLog(path).close()
+    rows, names = TripLog.read(path)
+    assert len(rows) == 0 and names == []
+
+
+def test_last_train_survives_flush(tmp_path):
+    log = TripLog(str(tmp_path / "trips.bin"))
+    log.record_train(make_train(1, STATIONS), day=1)
+    log.record_train(make_train(2, STATIONS[:3]), day=1)
+    log.close()
+
+    assert log.last_train()['train'].tolist() == [2, 2, 2]
+    log.record_train(make_train(3, STATIONS[:2]), day=2)
+    assert log.last_train()['train'].tolist() == [3, 3]
+
+
+def test_rewind_drops_only_unflushed_rows(tmp_path):
+    log = TripLog(str(tmp_path / "trips.bin"), chunk_rows=8)
+    log.record_train(make_train(1, STATIONS), day=1)
+    mark = log.mark()
+    log.record_train(make_train(2, STATIONS), day=1)
+    log.rewind(mark)
+    assert len(log) == 4
+    assert log.last_train()['train'].tolist() == [1] * 4
+
+    # Les files ja escrites no es poden descartar
+    log.record_train(make_train(3, STATIONS), day=1)
+    log.record_train(make_train(4, STATIONS), day=1)  # flush del bloc anterior
+    log.rewind(mark)
+    assert len(log) == 8
+
+
+def test_report_keeps_last_train_sample(tmp_path):
+    from Rodalies_training import RodaliesTraining
+
+    class Trainer(RodaliesTraining):
+        OUTPUT_DIR = str(tmp_path)
+        PLOTS_DIR = str(tmp_path)
+        BRAINS_DIR = str(tmp_path)
+        TOTAL_DAYS = 1
+
+    trainer = Trainer()
+    params = {'label': 'Prova', 'epsilon_decay': 0.5}
+    log = TripLog(str(tmp_path / "trips.bin"))
+    log.record_train(make_train(1, STATIONS), day=1)
+    # run_experiment tanca el registre abans de generar l'informe
+    log.close()
+    trainer._save_report(log, params, [1.0])
+
+    report = (tmp_path / "report_Prova.txt").read_text(encoding="utf-8")
+    assert "MOSTRA DE L'ÚLTIM TREN" in report
+    for name in STATIONS:
+        assert name in report
+
+
+def test_full_csv_is_built_from_the_log(tmp_path):
+    from Rodalies_training import RodaliesTraining
+
+    class Trainer(RodaliesTraining):
+        OUTPUT_DIR = str(tmp_path)
+        PLOTS_DIR = str(tmp_path)
+        BRAINS_DIR = str(tmp_path)
+
+    log = TripLog(str(tmp_path / "trips.bin"))
+    log.record_train(make_train(1, STATIONS, arrived=3), day=4)
+    Trainer()._close_trip_log(log, {'label': 'Prova'})
+
+    lines = (tmp_path / "FULL_DATA_Prova.csv").read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("Tren_ID;Dia;")
+    assert len(lines) == 5
+    assert lines[1].split(';')[:6] == ['1', '4', 'A', 'D', 'A', '1']
+    assert lines[4].endswith("CANCEL·LAT/NO ARRIBAT")
+
+
+@pytest.mark.parametrize("worlds", [1, 2])
+def test_run_experiment_saves_first_world_log(tmp_path, worlds):
+    pytest.importorskip("matplotlib")
+    from Rodalies_training import RodaliesTraining
+
+    class Trainer(RodaliesTraining):
+        OUTPUT_DIR = str(tmp_path / "out")
+        PLOTS_DIR = str(tmp_path / "plots")
+        BRAINS_DIR = str(tmp_path / "brains")
+        TOTAL_DAYS = 6
+        MINUTES_PER_DAY = 240
+        WORLDS = worlds
+        SEED = 11
+        SAVE_FULL_CSV = False
+
+    params = {'alpha': 0.1, 'gamma': 0.99, 'epsilon_decay': 0.8, 'label': 'Prova'}
+    _, logs, _ = Trainer().run_experiment(params)
+
+    assert logs.path == str(tmp_path / "out" / "TRIPS_Prova.bin")
+    rows, _ = TripLog.read(logs.path)
+    assert len(rows) == len(logs) > 0
+    assert len(logs.last_train()) > 0
@@ -0,0 +1,86 @@
+import contextlib
+import io
+
+import numpy as np
+
+from Enviroment.DecisionBatch import DecisionBatch
+from Enviroment.VectorEnv import VectorEnv
+from simulation import MINUTES, PolicyAgent, fingerprint, learning_agent, new_world
+
+DT = 1.0
+# (cas, llavor) de cada món: dos mons de la R1 amb llavors diferents i un de la xarxa sintètica
+WORLDS = [("r1_dt2", 5), ("r1_dt2", 9), ("synthetic_dt1", 3)]
+
+
+def mixed_policy():
+    return PolicyAgent(lambda state: sum(i * v for i, v in enumerate(state)) % 4)
+
+
+def new_worlds(brain, reset=True, **modes):
+    managers = [new_world(lambda: brain, case, seed, **modes) for case, seed in WORLDS]
+    if reset:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for manager in managers:
+                manager.reset_day()  # El mateix que fa VectorEnv.reset
+    return managers
+
+
+def vector_env(brain):
+    env = VectorEnv(new_worlds(brain, reset=False, batched=True), brain, dt_minutes=DT, minutes_per_day=MINUTES)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env.reset()
+    return env
+
+
+def test_each_world_evolves_as_an_independent_manager():
+    """Amb un agent determinista, cada món fa exactament el que faria sol, tick a tick."""
+    env = vector_env(mixed_policy())
+    alone = new_worlds(mixed_policy(), batched=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(int(MINUTES / DT)):
+            obs, rewards, dones = env.step()
+            for i, manager in enumerate(alone):
+                batch = DecisionBatch(manager.brain, DT)
+                manager.begin_tick(DT)
+                manager.visit_batched(batch, DT)
+                batch.flush()
+                assert rewards[i] == batch.rewards[manager]
+            assert np.array_equal(obs[:, :2], [[m.sim_time, len(m.active_trains)] for m in alone])
+
+    assert dones.all()
+    assert np.count_nonzero(rewards) > 0
+    assert [fingerprint(m) for m in env.managers] == [fingerprint(m) for m in alone]
+
+
+def test_shared_agent_learns_as_if_worlds_were_updated_one_after_another():
+    """Amb un agent que aprèn, el resultat és el de fer update() de cada món en ordre amb el mateix agent."""
+    env = vector_env(learning_agent())
+    brain = learning_agent()
+    sequential = new_worlds(brain)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not env.dones.all():
+            env.step()
+            for manager in sequential:
+                manager.update(DT)
+
+    assert [fingerprint(m) for m in env.managers] == [fingerprint(m) for m in sequential]
+    assert dict(env.brain.q) == dict(brain.q)
+    assert len(brain.q) > 0
+
+
+def test_finished_worlds_wait_for_reset():
+    env = vector_env(mixed_policy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(10):
+            env.step()
+        env.dones[1] = True
+        before = fingerprint(env.managers[1])
+        obs, rewards, dones = env.step()
+        assert fingerprint(env.managers[1]) == before and rewards[1] == 0.0
+        assert obs[1, 0] == obs[0, 0] - DT
+
+        env.reset([1])
+        assert not env.dones.any()
+        assert env.managers[1].sim_time == 0.0
@@ -0,0 +1,86 @@
+from Enviroment.EventLog import EventLog
+from Enviroment.Train import Train
+from Enviroment.WakeScheduler import WakeScheduler
+from simulation import advance, greedy_agent, learning_agent, new_world, simulate
+
+
+def count_visits(monkeypatch):
+    """Quants cops perceive (el tick complet d'un tren) s'ha cridat per a cada tren."""
+    visits = {}
+    perceive = Train.perceive
+
+    def counted(train, dt_minutes):
+        visits[train.id] = visits.get(train.id, 0) + 1
+        return perceive(train, dt_minutes)
+
+    monkeypatch.setattr(Train, "perceive", counted)
+    return visits
+
+
+def test_sleeping_trains_are_skipped_and_catch_up(monkeypatch):
+    """Menys visites que el mode seqüencial, i al final del dia els trens on haurien de ser."""
+    visits = count_visits(monkeypatch)
+    sleeping = []
+    event_driven = simulate(learning_agent, "r1_dt0.5", event_driven=True,
+                            on_tick=lambda m: sleeping.append(m.scheduler.sleeping_count))
+    event_driven_visits = sum(visits.values())
+    visits.clear()
+    sequential = simulate(learning_agent, "r1_dt0.5")
+
+    assert max(sleeping) > 0
+    assert event_driven_visits < 0.75 * sum(visits.values())
+
+    event_driven.scheduler.wake_all()
+    state = lambda m: sorted((t.id, t.sim_time, t.wait_timer, t.distance_covered) for t in m.active_trains)
+    assert state(event_driven) == state(sequential)
+
+
+def test_blocked_train_sleeps_until_the_next_segment_changes(monkeypatch):
+    manager = new_world(greedy_agent, event_driven=True)
+    train = manager.spawn_line_train("R1_NORD")
+    u, v = train.route_nodes[1], train.route_nodes[2]
+    blockers = [manager.edge_between(u, v, track) for track in (0, 1)]
+
+    # A l'estació, a punt de sortir, però amb les dues vies del tram següent just ocupades
+    train.arrive_at_station_logic()
+    train.wait_timer = 0.1
+    for track, edge in enumerate(blockers):
+        manager.update_train_position(edge, 900 + track, 0.01)
+    advance(manager, 2)
+    assert train.track_blocked
+    assert manager.scheduler._sleeping[train.id].kind == WakeScheduler.TRACK
+
+    visits = count_visits(monkeypatch)
+    advance(manager, 4)
+    elsewhere = next(e for e in manager.all_edges if e.node1 not in (u, v) and e.node2 not in (u, v))
+    manager.update_train_position(elsewhere, 950, 0.5)
+    assert train.id in manager.scheduler._sleeping and train.id not in visits
+
+    # S'allibera una via: es desperta, posa al dia el rellotge i surt al tick següent
+    manager.remove_train_from_edge(blockers[0], 900)
+    assert train.id not in manager.scheduler._sleeping
+    assert train.sim_time == manager.sim_time
+    advance(manager, 2)
+    assert visits[train.id] == 1
+    assert train.node is u and train.current_edge is blockers[0]
+
+    departures = manager.events.recent()
+    departures = departures[(departures["kind"] == EventLog.DEPART) & (departures["train"] == train.id)]
+    assert departures["time"].tolist() == [manager.sim_time]
+
+
+def test_waiting_train_wakes_on_the_tick_its_timer_runs_out(monkeypatch):
+    manager = new_world(greedy_agent, event_driven=True)
+    train = manager.spawn_line_train("R1_NORD")
+    train.arrive_at_station_logic()
+    train.wait_timer = 9.0
+    advance(manager, 2)
+    assert manager.scheduler._sleeping[train.id].kind == WakeScheduler.TIMER
+
+    # Amb ticks de 2 minuts, els 7 minuts que queden s'esgoten al quart tick
+    visits = count_visits(monkeypatch)
+    advance(manager, 6)
+    assert train.id not in visits
+    advance(manager, 2)
+    assert visits[train.id] == 1 and not train.is_waiting
+    assert train.sim_time == manager.sim_time